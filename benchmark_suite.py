@@ -0,0 +1,286 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable, Iterable, NamedTuple, Optional, Union
+
+from bestsupport_units_tests.dimension_analysis import find_formula
+from bestsupport_units_tests.dimension_solver import _solve_system
+from bestsupport_units_tests.quantity import Quantity, ERROR_CALCULATION_TYPE_NAMES
+from bestsupport_units_tests.units_benchmarks import measure_import_time
+from bestsupport_units_tests.units_format import render_unit, format_quantities, _RENDER_CACHE
+from bestsupport_units_tests.units_lib import UnitBase, unit_dim, kg, m, s
+from bestsupport_units_tests.units_list import COMPOSITE_UNITS
+
+# Воспроизводимый набор замеров горячих путей: операций в секунду и память (tracemalloc) на каждый случай.
+# Результаты сохраняются в JSON как эталон; прогон с --baseline падает (код 1), если случай стал медленнее
+# или прожорливее эталона больше чем на порог.
+#
+#   python -m bestsupport_units_tests.benchmark_suite --save baseline.json
+#   python -m bestsupport_units_tests.benchmark_suite --baseline baseline.json --threshold 0.25
+
+BASELINE_VERSION = 1
+
+MIN_TIME = 0.2  # секунд на один повтор (число вызовов подбирается timeit.autorange)
+REPEAT = 5
+ALLOC_CALLS = 1000
+THRESHOLD = 0.25
+# Рост пика памяти меньше этого числа байт регрессией не считается (шум аллокатора и кэшей)
+ALLOC_SLACK_BYTES = 1024
+
+IMPORT_MODULE = "bestsupport_units_tests.quantity"
+IMPORT_REPEAT = 3
+
+PATH_UNION = Union[str, os.PathLike]
+
+BENCHMARK_CASES = dict[str, Callable[[], Any]]
+
+
+class BenchmarkResult(NamedTuple):
+    ops_per_sec: float
+    peak_bytes: int  # пик памяти за ALLOC_CALLS вызовов сверх начального уровня
+    retained_bytes_per_op: float  # память, оставшаяся занятой после вызовов (кэши, утечки)
+
+
+class Regression(NamedTuple):
+    case: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self) -> str:
+        change = (self.current - self.baseline) / self.baseline if self.baseline else float("inf")
+        return f"{self.case}: {self.metric} {self.baseline:.6g} -> {self.current:.6g} ({change:+.1%})"
+
+
+def unit_cases() -> BENCHMARK_CASES:
+    newton = UnitBase(COMPOSITE_UNITS["Н"])
+    velocity = m / s
+    newton_copy = UnitBase(COMPOSITE_UNITS["Н"])
+
+    return {
+        "unit.mul": lambda: newton * velocity,
+        "unit.div": lambda: newton / velocity,
+        "unit.pow": lambda: velocity ** 2,
+        "unit.pow_fraction": lambda: velocity ** 0.5,
+        "unit.eq": lambda: newton == newton_copy,
+        "unit.hash": lambda: hash(newton),
+    }
+
+
+def quantity_cases() -> BENCHMARK_CASES:
+    cases = {}
+    for error_calc_type in ERROR_CALCULATION_TYPE_NAMES:
+        mass = Quantity(2.5, kg, error=0.1, error_calculation_type=error_calc_type)
+        mass2 = Quantity(1.5, kg, error=0.05, error_calculation_type=error_calc_type)
+        acc = Quantity(9.81, m / s ** 2, error=0.01, error_calculation_type=error_calc_type)
+
+        cases.update({
+            f"quantity.{error_calc_type}.add": lambda mass=mass, mass2=mass2: mass + mass2,
+            f"quantity.{error_calc_type}.sub": lambda mass=mass, mass2=mass2: mass - mass2,
+            f"quantity.{error_calc_type}.mul": lambda mass=mass, acc=acc: mass * acc,
+            f"quantity.{error_calc_type}.truediv": lambda mass=mass, acc=acc: mass / acc,
+            f"quantity.{error_calc_type}.pow": lambda acc=acc: acc ** 2,
+        })
+    return cases
+
+
+def format_cases() -> BENCHMARK_CASES:
+    force_unit = kg * m / s ** 2
+    force = Quantity(19.62, force_unit, error=0.981)
+    column = [Quantity(index, force_unit, error=0.1) for index in range(100)]
+
+    def render_uncached() -> str:
+        _RENDER_CACHE.clear()
+        return render_unit(force_unit)
+
+    return {
+        "format.unit_str": lambda: str(force_unit),
+        "format.unit_render_uncached": render_uncached,
+        "format.unit_latex": lambda: render_unit(force_unit, "latex"),
+        "format.quantity_str": lambda: str(force),
+        "format.quantities_100": lambda: format_quantities(column),
+    }
+
+
+def lookup_cases() -> BENCHMARK_CASES:
+    return {
+        "unit_dim.base": lambda: unit_dim("м", True),
+        "unit_dim.composite": lambda: unit_dim("Н", True),
+        "unit_dim.special": lambda: unit_dim("эВ", True),
+        "unit_dim.unknown": lambda: unit_dim("неизвестная", False),
+    }
+
+
+def solver_cases() -> BENCHMARK_CASES:
+    # Период маятника: T = k * l^(1/2) * g^(-1/2), масса в ядре не участвует
+    to_find = {"l": m, "g": m / s ** 2, "m": kg}
+
+    def solve_cold():
+        _solve_system.cache_clear()
+        return find_formula(to_find, s)
+
+    return {
+        "find_formula.cold": solve_cold,
+        "find_formula.cached": lambda: find_formula(to_find, s),
+    }
+
+
+BENCHMARK_GROUPS: dict[str, Callable[[], BENCHMARK_CASES]] = {
+    "unit": unit_cases,
+    "quantity": quantity_cases,
+    "format": format_cases,
+    "unit_dim": lookup_cases,
+    "find_formula": solver_cases,
+}
+
+
+def measure_allocations(op: Callable[[], Any], calls: int = ALLOC_CALLS) -> tuple[int, float]:
+    """(пик байт сверх начального уровня, оставшиеся занятыми байты на вызов)"""
+    op()  # прогрев кэшей, чтобы не считать их заполнение
+    gc.collect()
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        start_current, _ = tracemalloc.get_traced_memory()
+        for _ in range(calls):
+            op()
+        gc.collect()
+        end_current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not started:
+            tracemalloc.stop()
+    return peak - start_current, (end_current - start_current) / calls
+
+
+def run_case(op: Callable[[], Any], min_time: float = MIN_TIME, repeat: int = REPEAT,
+             alloc_calls: int = ALLOC_CALLS) -> BenchmarkResult:
+    timer = timeit.Timer(op)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    # Лучший из повторов: остальные замеры искажены фоновой нагрузкой, а не кодом
+    best = min(timer.repeat(repeat=repeat, number=number))
+    peak_bytes, retained = measure_allocations(op, alloc_calls)
+    return BenchmarkResult(number / best, peak_bytes, retained)
+
+
+def run_import_case(module: str = IMPORT_MODULE, repeat: int = IMPORT_REPEAT) -> BenchmarkResult:
+    # Импорт идёт в отдельном процессе: "операция" - один холодный импорт, память не замеряется
+    best_us = min(measure_import_time(module)[0] for _ in range(repeat))
+    return BenchmarkResult(1e6 / max(best_us, 1), 0, 0.0)
+
+
+def select_cases(only: Optional[Iterable[str]] = None) -> BENCHMARK_CASES:
+    """Случаи из BENCHMARK_GROUPS, имена которых начинаются с одного из префиксов only"""
+    prefixes = tuple(only) if only else ("",)
+    cases = {}
+    for group in BENCHMARK_GROUPS.values():
+        cases.update((name, op) for name, op in group().items() if name.startswith(prefixes))
+    return cases
+
+
+def run_suite(only: Optional[Iterable[str]] = None, min_time: float = MIN_TIME, repeat: int = REPEAT,
+              include_import: bool = True, report: Optional[Callable[[str, BenchmarkResult], None]] = None
+              ) -> dict[str, BenchmarkResult]:
+    results = {}
+    for name, op in select_cases(only).items():
+        results[name] = run_case(op, min_time, repeat)
+        if report is not None:
+            report(name, results[name])
+
+    prefixes = tuple(only) if only else ("",)
+    if include_import and f"import.{IMPORT_MODULE}".startswith(prefixes):
+        name = f"import.{IMPORT_MODULE}"
+        results[name] = run_import_case()
+        if report is not None:
+            report(name, results[name])
+    return results
+
+
+def environment_info() -> dict[str, str]:
+    # Сравнивать эталоны с другой машины или версии Python бессмысленно - сохраняем, на чём замерено
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+    }
+
+
+def save_baseline(path: PATH_UNION, results: dict[str, BenchmarkResult]) -> None:
+    data = {
+        "version": BASELINE_VERSION,
+        "environment": environment_info(),
+        "results": {name: result._asdict() for name, result in results.items()},
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def load_baseline(path: PATH_UNION) -> dict[str, BenchmarkResult]:
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    if data.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Unsupported benchmark baseline version {data.get('version')}")
+    return {name: BenchmarkResult(**result) for name, result in data["results"].items()}
+
+
+def compare_results(results: dict[str, BenchmarkResult], baseline: dict[str, BenchmarkResult],
+                    threshold: float = THRESHOLD) -> list[Regression]:
+    """Случаи, ставшие медленнее или тяжелее по памяти эталона больше чем на threshold (доля).
+
+    Случаи, которых нет в эталоне, не сравниваются.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result.ops_per_sec < base.ops_per_sec * (1 - threshold):
+            regressions.append(Regression(name, "ops_per_sec", base.ops_per_sec, result.ops_per_sec))
+        if result.peak_bytes > base.peak_bytes * (1 + threshold) + ALLOC_SLACK_BYTES:
+            regressions.append(Regression(name, "peak_bytes", base.peak_bytes, result.peak_bytes))
+    return regressions
+
+
+def print_result(name: str, result: BenchmarkResult) -> None:
+    print(f"{name:<40} {result.ops_per_sec:>14,.0f} оп/с {result.peak_bytes:>10,} Б пик "
+          f"{result.retained_bytes_per_op:>10,.1f} Б/оп остаётся")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Замеры горячих путей BestUnits")
+    parser.add_argument("--baseline", help="JSON-эталон для сравнения")
+    parser.add_argument("--save", help="сохранить результаты как JSON-эталон")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"допустимое ухудшение в долях (по умолчанию {THRESHOLD})")
+    parser.add_argument("--only", action="append", help="префикс имени случая (можно несколько)")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="секунд на повтор")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--no-import", action="store_true", help="не замерять время импорта")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.only, args.min_time, args.repeat, not args.no_import, print_result)
+
+    if args.save:
+        save_baseline(args.save, results)
+
+    if args.baseline:
+        regressions = compare_results(results, load_baseline(args.baseline), args.threshold)
+        if regressions:
+            print(f"Регрессии (порог {args.threshold:.0%}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"Регрессий нет (порог {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
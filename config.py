@@ -8,7 +8,49 @@ DEFAULT_ERROR_CALCULATION_TYPE = "MAX_DEVIATION"
 DECIMAL_PRECISE = 6
 
 SORT_MEASURES_BY_DIM_POWER = True
+# Степени надстрочными символами: "м·с⁻²" вместо "м*с^(-2)" (парсер понимает оба вида)
+SUPERSCRIPT_POWERS = False
 
+# Инструментация (instrumentation.py): DEBUG - счётчики созданных Quantity/UnitBase, преобразований чисел и
+# проверок размерности; DETAILED_DEBUG - ещё и гистограммы времени операторов; TESTS_DEBUG - отчёт после тестов
 DEBUG = False
 DETAILED_DEBUG = False
 TESTS_DEBUG = False
+
+# Хранение вектора размерности UnitBase: "numpy" (ndarray) или "tuple" (tuple из int/Fraction, быстрее);
+# "sparse" - пары (размерность, показатель) только для ненулевых степеней: для десятков и сотен базовых размерностей,
+# добавленных через UnitRegistry.register_base_dimension (плотные бэкенды ограничены LEN_DIM размерностями)
+UNIT_DIM_BACKEND = "tuple"
+# UNIT_DIM_BACKEND = "numpy"
+# UNIT_DIM_BACKEND = "sparse"
+# Показатели степеней размерности хранятся точно (int/Fraction): дробные float/Decimal приводятся к ближайшей
+# дроби со знаменателем не больше DIM_MAX_DENOMINATOR, если отличаются от неё не больше чем на DIM_EXPONENT_TOLERANCE
+# (Decimal - не больше единицы последнего знака)
+DIM_MAX_DENOMINATOR = 1000
+DIM_EXPONENT_TOLERANCE = 1e-9
+
+# Числовой тип Quantity по умолчанию: "decimal" (точность DECIMAL_PRECISE), "float" (быстрее) или "fraction"
+NUMERIC_BACKEND = "decimal"
+# NUMERIC_BACKEND = "float"
+
+# Кэш развёрнутой таблицы обозначений единиц (units_registry): файл пересобирается, если таблицы изменились.
+# UNIT_TABLE_CACHE_DIR = None - каталог __pycache__ рядом с модулями библиотеки
+UNIT_TABLE_CACHE = True
+UNIT_TABLE_CACHE_DIR = None
+
+# Размер LRU-кэша разобранных строк единиц (units_parsing.parse_unit_str)
+UNIT_PARSE_CACHE_SIZE = 1024
+
+# Подбор единиц для вывода (Quantity.best_unit): инженерные приставки (шаг 10^3) к единицам СИ
+BEST_UNIT_PREFIXES = ("п", "н", "мк", "м", "", "к", "М", "Г", "Т")
+# Наибольшая приставка для отдельных единиц: большие значения выражаются специальными единицами (ч, год, а.е.)
+BEST_UNIT_MAX_PREFIX = {"с": "", "м": "к"}
+# Специальные единицы, участвующие в подборе (без приставок)
+BEST_UNIT_SPECIAL_UNITS = ("т", "мин", "ч", "сут", "год", "л", "а.е.", "св.год", "пк")
+
+# Имена для размерностей с несколькими единицами (Гц/Бк, Гр/Зв) по предметным областям (Quantity.to_base)
+NAMED_UNIT_PRIORITY = {
+    "default": ("Гц", "Гр"),
+    "radiation": ("Бк", "Гр"),  # активность и поглощённая доза
+    "dosimetry": ("Бк", "Зв"),  # активность и эквивалентная доза
+}
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from fractions import Fraction
+from functools import lru_cache
+from math import lcm, gcd
+from typing import NamedTuple, Mapping, Iterable, Optional, Union
+
+from bestsupport_units_tests.units_dim import DIM_KEY, dim_items, dim_key_order, to_exponent
+from bestsupport_units_tests.units_lib import UnitBase
+
+# Точное решение систем показателей степеней: known = Π to_find[i] ** x[i]
+# Матрица (базовые размерности) x n из векторов cur_dim, метод Гаусса над Fraction, ядро матрицы - безразмерные π-группы
+
+
+class ExponentSolution(NamedTuple):
+    variables: tuple[str, ...]
+    exponents: dict[str, Union[int, Fraction]]  # частное решение (свободные показатели = 0)
+    pi_groups: tuple[dict[str, int], ...]  # базис безразмерных комбинаций (теорема Бакингема), целые показатели
+
+    @property
+    def is_unique(self) -> bool:
+        return not self.pi_groups
+
+
+def unit_exponents(unit: UnitBase) -> dict[DIM_KEY, Fraction]:
+    # Только ненулевые показатели: добавленные базовые размерности разреженного бэкенда тоже учитываются
+    return {key: Fraction(exponent) for key, exponent in dim_items(unit.cur_dim)}
+
+
+def reduce_row_echelon(rows: list[list[Fraction]], columns: int) -> list[int]:
+    """Приведение к ступенчатому виду на месте (по первым columns столбцам), возвращает столбцы ведущих элементов"""
+    pivots = []
+    row = 0
+
+    for col in range(columns):
+        if row == len(rows):
+            break
+
+        pivot = next((ind for ind in range(row, len(rows)) if rows[ind][col] != 0), None)
+        if pivot is None:
+            continue
+
+        rows[row], rows[pivot] = rows[pivot], rows[row]
+        pivot_value = rows[row][col]
+        rows[row] = [value / pivot_value for value in rows[row]]
+
+        for ind in range(len(rows)):
+            coef = rows[ind][col]
+            if ind != row and coef != 0:
+                rows[ind] = [value - coef * pivot_row_value for value, pivot_row_value in zip(rows[ind], rows[row])]
+
+        pivots.append(col)
+        row += 1
+
+    return pivots
+
+
+def integer_vector(vector: list[Fraction]) -> list[int]:
+    multiplier = lcm(*(value.denominator for value in vector))
+    integers = [int(value * multiplier) for value in vector]
+
+    divisor = gcd(*integers)
+    first_nonzero = next(value for value in integers if value != 0)
+    if first_nonzero < 0:
+        divisor = -divisor
+    return [value // divisor for value in integers]
+
+
+@lru_cache(maxsize=4096)
+def _solve_system(units: tuple[UnitBase, ...], target: UnitBase) -> Optional[tuple[tuple, tuple]]:
+    # Позиционное решение: (частное решение, базис ядра); None - система несовместна
+    columns = len(units)
+    unit_dims = [unit_exponents(unit) for unit in units]
+    target_dim = unit_exponents(target)
+
+    # Строки - только размерности, встречающиеся хотя бы у одной единицы (нулевые строки ничего не дают)
+    dim_keys = sorted(set(target_dim).union(*unit_dims), key=dim_key_order)
+    rows = [
+        [unit_dim.get(key, Fraction(0)) for unit_dim in unit_dims] + [target_dim.get(key, Fraction(0))]
+        for key in dim_keys
+    ]
+
+    pivots = reduce_row_echelon(rows, columns)
+
+    for row in rows[len(pivots):]:
+        if row[-1] != 0:
+            return None
+
+    particular = [Fraction(0)] * columns
+    for row_id, col in enumerate(pivots):
+        particular[col] = rows[row_id][-1]
+
+    nullspace = []
+    for free_col in range(columns):
+        if free_col in pivots:
+            continue
+        vector = [Fraction(0)] * columns
+        vector[free_col] = Fraction(1)
+        for row_id, col in enumerate(pivots):
+            vector[col] = -rows[row_id][free_col]
+        nullspace.append(tuple(integer_vector(vector)))
+
+    return tuple(map(to_exponent, particular)), tuple(nullspace)
+
+
+def solve_exponents(to_find: Mapping[str, UnitBase], known: UnitBase) -> Optional[ExponentSolution]:
+    """Показатели x, при которых known = Π to_find[name] ** x[name]; None, если решения нет"""
+    variables = tuple(to_find)
+    solved = _solve_system(tuple(to_find.values()), known)
+    if solved is None:
+        return None
+
+    particular, nullspace = solved
+    return ExponentSolution(
+        variables,
+        dict(zip(variables, particular)),
+        tuple(dict(zip(variables, vector)) for vector in nullspace),
+    )
+
+
+def solve_exponents_batch(candidates: Iterable[Mapping[str, UnitBase]],
+                          known: UnitBase) -> list[Optional[ExponentSolution]]:
+    """Решение для многих наборов переменных; одинаковые наборы размерностей решаются один раз"""
+    return [solve_exponents(to_find, known) for to_find in candidates]
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from typing import Callable, Optional, Sequence, Union
+
+import numpy as np
+from numpy import ndarray
+
+from bestsupport_units_tests.quantity import MAX_DEVIATION, AVG_SQRT_DEVIATION
+
+# Векторизованное распространение погрешностей.
+# Ядра выбираются один раз на операцию по словарю, а не ветвлением по строке на каждый элемент.
+# Линейное (первого порядка) распространение: σ_f² = J·Σ·Jᵀ, J - якобиан по входам, Σ - ковариация входов.
+# Метод Монте-Карло: N выборок входов за один векторизованный проход, σ_f - выборочное отклонение.
+
+MONTE_CARLO_DRAWS = 10_000
+MONTE_CARLO_MAX_ELEMENTS = 1 << 22  # выборок * строк за один проход (ограничение памяти)
+
+
+def _sum_errors(error1: ndarray, error2: ndarray) -> ndarray:
+    return error1 + error2
+
+
+# Сложение независимых вкладов погрешности: предельная погрешность складывается, СКО - в квадратуре
+ERROR_COMBINE_KERNELS: dict[str, Callable[[ndarray, ndarray], ndarray]] = {
+    MAX_DEVIATION: _sum_errors,
+    AVG_SQRT_DEVIATION: np.hypot,
+}
+
+
+def _sum_abs_terms(terms: ndarray) -> ndarray:
+    return np.abs(terms).sum(axis=-1)
+
+
+def _quadrature_terms(terms: ndarray) -> ndarray:
+    return np.sqrt(np.einsum("...i,...i->...", terms, terms))
+
+
+# Свёртка вкладов J[:, i]·e[:, i] по последней оси
+ERROR_REDUCE_KERNELS: dict[str, Callable[[ndarray], ndarray]] = {
+    MAX_DEVIATION: _sum_abs_terms,
+    AVG_SQRT_DEVIATION: _quadrature_terms,
+}
+
+
+def _cumulative_sum(errors: ndarray, axis: int) -> ndarray:
+    return np.cumsum(errors, axis=axis)
+
+
+def _cumulative_quadrature(errors: ndarray, axis: int) -> ndarray:
+    return np.sqrt(np.cumsum(np.square(errors), axis=axis))
+
+
+# Погрешности накопленных сумм (cumsum) вдоль оси
+ERROR_ACCUMULATE_KERNELS: dict[str, Callable[[ndarray, int], ndarray]] = {
+    MAX_DEVIATION: _cumulative_sum,
+    AVG_SQRT_DEVIATION: _cumulative_quadrature,
+}
+
+
+def get_error_kernel(kernels: dict[str, Callable], error_calc_type: str) -> Callable:
+    kernel = kernels.get(error_calc_type)
+    if kernel is None:
+        raise TypeError(f"Unknown error (inaccuracy) calculation type {error_calc_type}")
+    return kernel
+
+
+def propagate_linear(jacobian: ndarray, errors: Optional[ndarray] = None, covariance: Optional[ndarray] = None,
+                     error_calc_type: str = AVG_SQRT_DEVIATION) -> ndarray:
+    """Погрешности n значений по якобиану (n, k).
+
+    errors (n, k) или (k,) - независимые погрешности входов;
+    covariance (k, k) - общая ковариация входов или (n, k, k) - своя для каждой строки.
+    С ковариацией результат всегда СКО: sqrt(J·Σ·Jᵀ).
+    """
+    jacobian = np.asarray(jacobian, dtype=np.float64)
+
+    if covariance is not None:
+        covariance = np.asarray(covariance, dtype=np.float64)
+        if covariance.ndim == 2:
+            variance = np.einsum("ni,ij,nj->n", jacobian, covariance, jacobian)
+        elif covariance.ndim == 3:
+            variance = np.einsum("ni,nij,nj->n", jacobian, covariance, jacobian)
+        else:
+            raise ValueError(f"Covariance must have shape (k, k) or (n, k, k), got {covariance.shape}")
+        # Отрицательная дисперсия возможна только из-за округления (ковариация положительно полуопределена)
+        return np.sqrt(np.maximum(variance, 0.0))
+
+    if errors is None:
+        return np.zeros(jacobian.shape[0])
+    return get_error_kernel(ERROR_REDUCE_KERNELS, error_calc_type)(jacobian * errors)
+
+
+def errors_covariance(errors: ndarray, correlation: Optional[ndarray] = None) -> ndarray:
+    """Ковариация (n, k, k) из погрешностей (n, k) и общей корреляционной матрицы (k, k)"""
+    errors = np.asarray(errors, dtype=np.float64)
+    if correlation is None:
+        correlation = np.eye(errors.shape[-1])
+    return errors[..., :, None] * np.asarray(correlation, dtype=np.float64) * errors[..., None, :]
+
+
+def covariance_root(covariance: ndarray) -> ndarray:
+    """L, для которой L·Lᵀ = Σ; работает и со стеком матриц (n, k, k)"""
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        # Вырожденная ковариация (вход без погрешности): корень через собственное разложение
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        return eigenvectors * np.sqrt(np.maximum(eigenvalues, 0.0))[..., None, :]
+
+
+def sample_inputs(means: ndarray, errors: Optional[ndarray] = None, covariance: Optional[ndarray] = None,
+                  draws: int = MONTE_CARLO_DRAWS, rng: Union[np.random.Generator, int, None] = None) -> ndarray:
+    """Нормальные выборки входов формы (draws, n, k) вокруг средних means (n, k)"""
+    rng = np.random.default_rng(rng)
+    means = np.asarray(means, dtype=np.float64)
+    noise = rng.standard_normal((draws, *means.shape))
+
+    if covariance is not None:
+        lower = covariance_root(np.asarray(covariance, dtype=np.float64))
+        if lower.ndim == 2:
+            return means + noise @ lower.T
+        return means + np.einsum("nij,dnj->dni", lower, noise)
+
+    if errors is None:
+        return np.broadcast_to(means, noise.shape).copy()
+    return means + noise * np.asarray(errors, dtype=np.float64)
+
+
+def propagate_monte_carlo(func: Callable[[Sequence[ndarray]], ndarray], means: ndarray,
+                          errors: Optional[ndarray] = None, covariance: Optional[ndarray] = None,
+                          draws: int = MONTE_CARLO_DRAWS,
+                          rng: Union[np.random.Generator, int, None] = None) -> tuple[ndarray, ndarray]:
+    """(среднее, СКО) для func по выборкам входов.
+
+    func получает список k массивов формы (draws, строк) и возвращает массив той же формы.
+    Строки обрабатываются блоками, чтобы выборки занимали не больше MONTE_CARLO_MAX_ELEMENTS чисел.
+    """
+    rng = np.random.default_rng(rng)
+    means = np.asarray(means, dtype=np.float64)
+    rows = means.shape[0]
+    block = max(1, MONTE_CARLO_MAX_ELEMENTS // max(1, draws))
+
+    result_means = np.empty(rows)
+    result_errors = np.empty(rows)
+    for start in range(0, rows, block):
+        end = min(rows, start + block)
+        block_errors = None if errors is None else np.broadcast_to(errors, means.shape)[start:end]
+        block_covariance = covariance if covariance is None or np.ndim(covariance) == 2 else covariance[start:end]
+        samples = sample_inputs(means[start:end], block_errors, block_covariance, draws, rng)
+        results = func([samples[..., ind] for ind in range(means.shape[1])])
+        result_means[start:end] = results.mean(axis=0)
+        result_errors[start:end] = results.std(axis=0, ddof=1)
+
+    return result_means, result_errors
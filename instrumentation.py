@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter_ns
+from typing import Any, Callable, Iterator, Optional
+
+from bestsupport_units_tests.numeric_backends import NUMERIC_BACKENDS
+from bestsupport_units_tests.quantity import Quantity
+from bestsupport_units_tests.units_lib import UnitBase, _INTERNED_UNITS, _OPERATIONS_CACHE
+
+# Счётчики операций и гистограммы времени операторов для поиска "лишней" алгебры единиц в формулах.
+# Выключенная инструментация ничего не стоит: методы классов подменяются обёртками только в enable()
+# и возвращаются на место в disable(). config.DEBUG включает счётчики при импорте quantity,
+# config.DETAILED_DEBUG - ещё и замер времени.
+#
+#   with profile() as result:
+#       run_pipeline()
+#   print(result.report())
+
+HISTOGRAM_BUCKETS = 48  # корзина i - вызовы длительностью [2^i, 2^(i+1)) нс
+
+QUANTITY_OPERATORS = ("__add__", "__radd__", "__sub__", "__rsub__", "__mul__", "__rmul__",
+                      "__truediv__", "__rtruediv__", "__pow__", "__rpow__")
+UNIT_OPERATORS = ("__mul__", "__truediv__", "__pow__", "__neg__")
+
+
+class TimingHistogram:
+    __slots__ = ("count", "total_ns", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ns = 0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+
+    def record(self, elapsed_ns: int) -> None:
+        self.count += 1
+        self.total_ns += elapsed_ns
+        self.buckets[min(elapsed_ns.bit_length(), HISTOGRAM_BUCKETS) - 1 if elapsed_ns else 0] += 1
+
+    def copy(self) -> TimingHistogram:
+        histogram = TimingHistogram()
+        histogram.count, histogram.total_ns, histogram.buckets = self.count, self.total_ns, self.buckets.copy()
+        return histogram
+
+    def __sub__(self, other: TimingHistogram) -> TimingHistogram:
+        histogram = TimingHistogram()
+        histogram.count = self.count - other.count
+        histogram.total_ns = self.total_ns - other.total_ns
+        histogram.buckets = [bucket - other_bucket for bucket, other_bucket in zip(self.buckets, other.buckets)]
+        return histogram
+
+    def mean_ns(self) -> float:
+        return self.total_ns / self.count if self.count else 0.0
+
+    def percentile_ns(self, fraction: float) -> int:
+        """Верхняя граница корзины, в которую попадает доля fraction вызовов (оценка сверху)"""
+        threshold = fraction * self.count
+        seen = 0
+        for ind, bucket in enumerate(self.buckets):
+            seen += bucket
+            if bucket and seen >= threshold:
+                return 1 << (ind + 1)
+        return 0
+
+
+COUNTERS: Counter[str] = Counter()
+TIMINGS: dict[str, TimingHistogram] = {}
+
+# (класс, имя атрибута, исходный атрибут из __dict__) - для восстановления в disable()
+_PATCHES: list[tuple[type, str, Any]] = []
+_TIMINGS_ENABLED = False
+
+
+def _patch(owner: type, name: str, make_wrapper: Callable[[Callable], Callable]) -> None:
+    # Берётся сырой атрибут из __dict__, чтобы classmethod/staticmethod обернуть и вернуть без изменений
+    original = owner.__dict__[name]
+    if isinstance(original, (classmethod, staticmethod)):
+        patched = type(original)(make_wrapper(original.__func__))
+    else:
+        patched = make_wrapper(original)
+    _PATCHES.append((owner, name, original))
+    setattr(owner, name, patched)
+
+
+def _counting(counter: str) -> Callable[[Callable], Callable]:
+    def make_wrapper(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            COUNTERS[counter] += 1
+            return func(*args, **kwargs)
+        return wrapper
+    return make_wrapper
+
+
+def _growth_counting(counter: str, table: dict) -> Callable[[Callable], Callable]:
+    # Вызов считается созданием, если после него таблица интернирования/кэша выросла
+    def make_wrapper(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            size = len(table)
+            result = func(*args, **kwargs)
+            if len(table) != size:
+                COUNTERS[counter] += 1
+            return result
+        return wrapper
+    return make_wrapper
+
+
+def _timed(timing: str) -> Callable[[Callable], Callable]:
+    def make_wrapper(func: Callable) -> Callable:
+        histogram = TIMINGS.setdefault(timing, TimingHistogram())
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.record(perf_counter_ns() - start)
+        return wrapper
+    return make_wrapper
+
+
+def is_enabled() -> bool:
+    return bool(_PATCHES)
+
+
+def timings_enabled() -> bool:
+    return _TIMINGS_ENABLED
+
+
+def enable(timings: bool = False) -> None:
+    """Подмена методов обёртками со счётчиками (и замером времени операторов, если timings)"""
+    global _TIMINGS_ENABLED
+    disable()
+
+    _patch(Quantity, "__init__", _counting("Quantity.created"))
+    _patch(Quantity, "__from_trusted__", _counting("Quantity.created"))
+    _patch(Quantity, "__same_backend__", _counting("Quantity.backend_checks"))
+    _patch(UnitBase, "__intern__", _counting("UnitBase.lookups"))
+    # Поверх счётчика обращений: вложенная обёртка считает только новые объекты
+    _patch(UnitBase, "__intern__", _growth_counting("UnitBase.created", _INTERNED_UNITS))
+    _patch(UnitBase, "__cached_operation__", _growth_counting("UnitBase.operation_cache_misses", _OPERATIONS_CACHE))
+    _patch(UnitBase, "__add__", _counting("UnitBase.dimension_checks"))
+    _patch(UnitBase, "__sub__", _counting("UnitBase.dimension_checks"))
+    for name, backend in NUMERIC_BACKENDS.items():
+        _patch(backend, "convert", _counting(f"{name}.convert"))
+
+    if timings:
+        for operator in QUANTITY_OPERATORS:
+            _patch(Quantity, operator, _timed(f"Quantity.{operator}"))
+        for operator in UNIT_OPERATORS:
+            _patch(UnitBase, operator, _timed(f"UnitBase.{operator}"))
+    _TIMINGS_ENABLED = timings
+
+
+def disable() -> None:
+    """Возврат исходных методов (в обратном порядке - обёртки одного атрибута могут быть вложены)"""
+    global _TIMINGS_ENABLED
+    while _PATCHES:
+        owner, name, original = _PATCHES.pop()
+        setattr(owner, name, original)
+    _TIMINGS_ENABLED = False
+
+
+def reset() -> None:
+    COUNTERS.clear()
+    for histogram in TIMINGS.values():
+        histogram.__init__()
+
+
+class Profile:
+    """Счётчики и гистограммы, накопленные внутри блока profile()"""
+
+    def __init__(self) -> None:
+        self.counters: Counter[str] = Counter()
+        self.timings: dict[str, TimingHistogram] = {}
+
+    def report(self) -> str:
+        lines = [f"{name:<36} {count:>12}" for name, count in sorted(self.counters.items())]
+        for name, histogram in sorted(self.timings.items()):
+            if histogram.count:
+                lines.append(f"{name:<36} {histogram.count:>12} вызовов, среднее {histogram.mean_ns():.0f} нс, "
+                             f"p50 < {histogram.percentile_ns(0.5)} нс, p99 < {histogram.percentile_ns(0.99)} нс")
+        return "\n".join(lines)
+
+
+@contextmanager
+def profile(timings: bool = True) -> Iterator[Profile]:
+    """Профиль блока кода; инструментация включается на время блока, если была выключена.
+
+    Профили могут быть вложены: каждый получает разницу счётчиков между входом и выходом.
+    """
+    was_enabled, had_timings = is_enabled(), timings_enabled()
+    if not was_enabled or (timings and not had_timings):
+        enable(timings=timings or had_timings)
+
+    counters_before = COUNTERS.copy()
+    timings_before = {name: histogram.copy() for name, histogram in TIMINGS.items()}
+    result = Profile()
+    try:
+        yield result
+    finally:
+        result.counters = COUNTERS - counters_before
+        result.timings = {
+            name: histogram - timings_before.get(name, TimingHistogram())
+            for name, histogram in TIMINGS.items()
+        }
+        if not was_enabled:
+            disable()
+        elif timings and not had_timings:
+            enable(timings=False)
+
+
+def get_profile(timings: Optional[bool] = None) -> Profile:
+    """Всё накопленное с последнего reset() (для DEBUG-режима, включённого из config)"""
+    result = Profile()
+    result.counters = COUNTERS.copy()
+    if timings is None:
+        timings = _TIMINGS_ENABLED
+    if timings:
+        result.timings = {name: histogram.copy() for name, histogram in TIMINGS.items()}
+    return result
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import math
+from decimal import Decimal
+from fractions import Fraction
+from typing import Any, Literal, TypeAlias, Union
+
+# Числовые бэкенды Quantity: в каком типе хранятся value и error и как считаются sqrt/ln/pow.
+# Decimal - точный по DECIMAL_PRECISE знакам, float - быстрый, Fraction - точный для рациональных операций
+
+NUMERIC_BACKEND_NAMES: TypeAlias = Literal["decimal", "float", "fraction"]
+BACKEND_VALUE_UNION: TypeAlias = Union[Decimal, float, Fraction]
+
+
+class DecimalBackend:
+    name = "decimal"
+    value_type = Decimal
+
+    @staticmethod
+    def convert(value: Any) -> Decimal:
+        if type(value) is Decimal:
+            return value
+        if isinstance(value, Fraction):
+            return Decimal(value.numerator) / Decimal(value.denominator)
+        if isinstance(value, (int, float, str, Decimal)):
+            return Decimal(str(value))
+
+        raise TypeError(f"Unknown numeric type {type(value)}")
+
+    @staticmethod
+    def sqrt(value: Decimal) -> Decimal:
+        return value.sqrt()
+
+    @staticmethod
+    def ln(value: Decimal) -> Decimal:
+        return value.ln()
+
+    @staticmethod
+    def pow(base: Decimal, power: Any) -> Decimal:
+        if isinstance(power, int):
+            return base ** power
+        return base ** DecimalBackend.convert(power)
+
+
+class FloatBackend:
+    name = "float"
+    value_type = float
+
+    @staticmethod
+    def convert(value: Any) -> float:
+        if type(value) is float:
+            return value
+        if isinstance(value, (int, float, str, Decimal, Fraction)):
+            return float(value)
+
+        raise TypeError(f"Unknown numeric type {type(value)}")
+
+    @staticmethod
+    def sqrt(value: float) -> float:
+        return math.sqrt(value)
+
+    @staticmethod
+    def ln(value: float) -> float:
+        return math.log(value)
+
+    @staticmethod
+    def pow(base: float, power: Any) -> float:
+        return base ** float(power)
+
+
+class FractionBackend:
+    # sqrt, ln и дробные степени в общем случае иррациональны: считаются во float и возвращаются в Fraction
+    name = "fraction"
+    value_type = Fraction
+
+    @staticmethod
+    def convert(value: Any) -> Fraction:
+        if type(value) is Fraction:
+            return value
+        if isinstance(value, float):
+            # Как и Decimal(str(x)): 0.1 -> 1/10, а не двоичное приближение
+            return Fraction(str(value))
+        if isinstance(value, (int, str, Decimal, Fraction)):
+            return Fraction(value)
+
+        raise TypeError(f"Unknown numeric type {type(value)}")
+
+    @staticmethod
+    def sqrt(value: Fraction) -> Fraction:
+        return FractionBackend.convert(math.sqrt(value))
+
+    @staticmethod
+    def ln(value: Fraction) -> Fraction:
+        return FractionBackend.convert(math.log(value))
+
+    @staticmethod
+    def pow(base: Fraction, power: Any) -> Fraction:
+        result = base ** FractionBackend.convert(power)
+        if isinstance(result, Fraction):
+            return result
+        return FractionBackend.convert(result)
+
+
+NUMERIC_BACKENDS = {
+    DecimalBackend.name: DecimalBackend,
+    FloatBackend.name: FloatBackend,
+    FractionBackend.name: FractionBackend,
+}
+
+
+def get_numeric_backend(name: NUMERIC_BACKEND_NAMES):
+    if name not in NUMERIC_BACKENDS:
+        raise ValueError(f"Unknown numeric backend {name} (available: {', '.join(NUMERIC_BACKENDS)})")
+    return NUMERIC_BACKENDS[name]
@@ -2,115 +2,166 @@ from __future__ import annotations
 
 import decimal
 from decimal import Decimal
-from typing import Union, Literal, TypeAlias, get_args, Final, Optional
-
-from numpy import ndarray
-
-from bestsupport_units_tests.config import DECIMAL_PRECISE, DEFAULT_ERROR_CALCULATION_TYPE
+from fractions import Fraction
+from typing import Union, Literal, TypeAlias, get_args, Final, Optional, TYPE_CHECKING
+
+from bestsupport_units_tests.config import DECIMAL_PRECISE, DEFAULT_ERROR_CALCULATION_TYPE, NUMERIC_BACKEND, DEBUG, \
+    DETAILED_DEBUG
+from bestsupport_units_tests.numeric_backends import get_numeric_backend, NUMERIC_BACKEND_NAMES, BACKEND_VALUE_UNION
+from bestsupport_units_tests.units_conversion import ConvertedQuantity, resolve_unit, si_factor
+from bestsupport_units_tests.units_format import format_quantity
+from bestsupport_units_tests.units_ladder import best_unit
+from bestsupport_units_tests.units_naming import named_unit_str
 from bestsupport_units_tests.units_lib import UnitBase, NUMERIC_UNION, NUMERIC_TYPE, kg, m, DIMENSIONLESS
 
+if TYPE_CHECKING:
+    from numpy import ndarray
+
 MATH_VALUE_UNION: TypeAlias = Union["Quantity", NUMERIC_UNION]
 
 MAX_DEVIATION: Final[str] = "MAX_DEVIATION"
 AVG_SQRT_DEVIATION: Final[str] = "AVG_SQRT_DEVIATION"
 
 ERROR_CALCULATION_TYPES: TypeAlias = Literal["MAX_DEVIATION", "AVG_SQRT_DEVIATION"]
+ERROR_CALCULATION_TYPE_NAMES: Final[tuple[str, ...]] = get_args(ERROR_CALCULATION_TYPES)
 
 decimal.getcontext().prec = DECIMAL_PRECISE
 
 
-# todo: Сделать методы .to(unit) и .normalize() для перевода в СИ
-# todo: Сделать метод для перевода в составные единицы (из фундаментальных в, например, 'Н') .to_base()
 # todo: Добавить константы (G = Quantity(6.674e-11, m**3 / (kg*s**2)))
-# todo: Парсер (parse("9.81 м/с²") → Quantity(9.81, m/s**2))
-# todo: Перевод в наиболее подходящие единицы .best_unit() (Quantity(3600, "с").best_unit()  # "1 ч"; Quantity(1500, "м").best_unit()  # "1.5 км")
-# todo: Добавить LaTeX-вид
-# todo: Добавить возможность добавлять свои единицы измерения, переводы (масштабируемость, а ещё приколы по типу “мана”, “энергия выстрела из railgun”)
 
 
 class Quantity:
-    value: Decimal
+    # Тип value и error задаётся числовым бэкендом (config.NUMERIC_BACKEND или numeric_backend=...)
+    value: BACKEND_VALUE_UNION
     measure: UnitBase
-    error: Decimal
+    error: BACKEND_VALUE_UNION
 
-    def __init__(self, init_value: Union[NUMERIC_UNION, str], init_measure: Optional[UnitBase, ndarray] = None,
+    __slots__ = ("value", "measure", "error", "error_calc_type", "numeric_backend")
+
+    def __init__(self, init_value: Union[NUMERIC_UNION, str],
+                 init_measure: Optional[UnitBase, ndarray, tuple, str] = None,
                  error: Optional[NUMERIC_UNION, str] = None,
-                 error_calculation_type: ERROR_CALCULATION_TYPES = DEFAULT_ERROR_CALCULATION_TYPE) -> None:
-        if isinstance(init_value, (int, float, str)):
-            self.value: Decimal = Decimal(str(init_value))
-        elif isinstance(init_value, Decimal):
-            self.value: Decimal = init_value
+                 error_calculation_type: ERROR_CALCULATION_TYPES = DEFAULT_ERROR_CALCULATION_TYPE,
+                 numeric_backend: Optional[NUMERIC_BACKEND_NAMES] = None) -> None:
+        self.numeric_backend = get_numeric_backend(NUMERIC_BACKEND if numeric_backend is None else numeric_backend)
+
+        if isinstance(init_value, (int, float, str, Decimal, Fraction)):
+            self.value: BACKEND_VALUE_UNION = self.numeric_backend.convert(init_value)
         else:
             raise TypeError(f"Unknown type of init_value {type(init_value)}")
 
-        if isinstance(init_measure, ndarray) or init_measure is None:
-            self.measure: UnitBase = UnitBase(init_measure)
-        elif isinstance(init_measure, UnitBase):
+        # Строка единиц ("км/ч") переводит значение и погрешность в СИ
+        factor = 1.0
+        if isinstance(init_measure, UnitBase):
             self.measure: UnitBase = init_measure
+        elif isinstance(init_measure, str):
+            self.measure, factor = resolve_unit(init_measure)
+        elif init_measure is None or hasattr(init_measure, "__len__"):
+            # Вектор размерности: tuple, list или ndarray (без импорта NumPy)
+            self.measure: UnitBase = UnitBase(init_measure)
         else:
             raise TypeError(f"Unknown type of init_measure {type(init_measure)}")
 
-        if isinstance(error, (int, float, str)):
-            self.error: Decimal = Decimal(str(error))
-        elif isinstance(error, Decimal):
-            self.error: Decimal = error
+        if isinstance(error, (int, float, str, Decimal, Fraction)):
+            self.error: BACKEND_VALUE_UNION = self.numeric_backend.convert(error)
         elif error is None:
-            self.error: Decimal = Decimal("0")
+            self.error: BACKEND_VALUE_UNION = self.numeric_backend.convert(0)
         else:
             raise TypeError(f"Unknown type of error (inaccuracy) {type(error)}")
 
-        if error_calculation_type in get_args(ERROR_CALCULATION_TYPES):
+        if factor != 1.0:
+            factor = self.numeric_backend.convert(factor)
+            self.value, self.error = self.value * factor, self.error * factor
+
+        if error_calculation_type in ERROR_CALCULATION_TYPE_NAMES:
             self.error_calc_type = error_calculation_type
         else:
             raise TypeError(f"Unknown error (inaccuracy) calculation type {error_calculation_type}")
 
-    def __calc_error_addsub__(self, error1: Decimal, error2: Decimal) -> Decimal:
+    def __calc_error_addsub__(self, error1: BACKEND_VALUE_UNION, error2: BACKEND_VALUE_UNION) -> BACKEND_VALUE_UNION:
         if self.error_calc_type == MAX_DEVIATION:
             return error1 + error2
         elif self.error_calc_type == AVG_SQRT_DEVIATION:
-            return (error1 ** 2 + error2 ** 2).sqrt()
+            return self.numeric_backend.sqrt(error1 ** 2 + error2 ** 2)
 
         raise TypeError(f"Unknown error (inaccuracy) calculation type {self.error_calc_type}")
 
-    def __calc_error_muldiv__(self, q1: Quantity, q2: Quantity, q3_new_value: Decimal) -> Decimal:
+    def __calc_error_muldiv__(self, q1: Quantity, q2: Quantity,
+                              q3_new_value: BACKEND_VALUE_UNION) -> BACKEND_VALUE_UNION:
         if self.error_calc_type == MAX_DEVIATION:
-            return q3_new_value * (q1.error / q1.value + q2.error / q2.value)
+            return abs(q3_new_value) * (abs(q1.error / q1.value) + abs(q2.error / q2.value))
         elif self.error_calc_type == AVG_SQRT_DEVIATION:
-            return q3_new_value * ((q1.error / q1.value) ** 2 + (q2.error / q2.value) ** 2).sqrt()
+            return abs(q3_new_value) * self.numeric_backend.sqrt((q1.error / q1.value) ** 2 + (q2.error / q2.value) ** 2)
 
         raise TypeError(f"Unknown error (inaccuracy) calculation type {self.error_calc_type}")
 
-    def __calc_error_pow_numeric_power__(self, q1_base: Quantity, q2_power: NUMERIC_UNION,
-                                         q3_new_value: Decimal) -> Decimal:
-        if self.error_calc_type == MAX_DEVIATION:
-            return q3_new_value * (abs(q2_power) * q1.error / q1.value)
-        elif self.error_calc_type == AVG_SQRT_DEVIATION:
-            return q3_new_value * (abs(q2_power) * q1_base.error / q1_base.value)
+    def __calc_error_pow_numeric_power__(self, q1_base: Quantity, q2_power: BACKEND_VALUE_UNION,
+                                         q3_new_value: BACKEND_VALUE_UNION) -> BACKEND_VALUE_UNION:
+        if self.error_calc_type == MAX_DEVIATION or self.error_calc_type == AVG_SQRT_DEVIATION:
+            return abs(q3_new_value * q2_power * q1_base.error / q1_base.value)
 
         raise TypeError(f"Unknown error (inaccuracy) calculation type {self.error_calc_type}")
 
-    def __calc_error_pow__(self, q1_base: Quantity, q2_power: Quantity, q3_new_value: Decimal) -> Decimal:
+    def __calc_error_pow__(self, q1_base: Quantity, q2_power: Quantity,
+                           q3_new_value: BACKEND_VALUE_UNION) -> BACKEND_VALUE_UNION:
         if self.error_calc_type == MAX_DEVIATION or self.error_calc_type == AVG_SQRT_DEVIATION:
             under_sqrt = (q2_power.value * (q1_base.error / q1_base.value)) ** 2 + (
-                    q1_base.value.ln() * q2_power.error) ** 2
-            return q3_new_value * under_sqrt.sqrt()
+                    self.numeric_backend.ln(q1_base.value) * q2_power.error) ** 2
+            return abs(q3_new_value) * self.numeric_backend.sqrt(under_sqrt)
 
         raise TypeError(f"Unknown error (inaccuracy) calculation type {self.error_calc_type}")
 
-    def __calc_error_pow_numeric_base__(self, q1_base: Decimal, q2_power: Quantity, q3_new_value: Decimal) -> Decimal:
+    def __calc_error_pow_numeric_base__(self, q1_base: BACKEND_VALUE_UNION, q2_power: Quantity,
+                                        q3_new_value: BACKEND_VALUE_UNION) -> BACKEND_VALUE_UNION:
         if self.error_calc_type == MAX_DEVIATION or self.error_calc_type == AVG_SQRT_DEVIATION:
-            return q1_base ** q2_power.value * q1_base.ln() * q2_power.error
+            return abs(q3_new_value * self.numeric_backend.ln(q1_base) * q2_power.error)
 
         raise TypeError(f"Unknown error (inaccuracy) calculation type {self.error_calc_type}")
 
-    def __new_quantity__(self, new_value: Decimal, new_measure: UnitBase, error: Optional[Decimal] = None) -> Quantity:
+    @classmethod
+    def __from_trusted__(cls, value: BACKEND_VALUE_UNION, measure: UnitBase, error: BACKEND_VALUE_UNION,
+                         error_calc_type: ERROR_CALCULATION_TYPES, numeric_backend) -> Quantity:
+        # Без проверок: только для значений, уже приведённых к numeric_backend (результаты операций)
+        quantity = object.__new__(cls)
+        quantity.value = value
+        quantity.measure = measure
+        quantity.error = error
+        quantity.error_calc_type = error_calc_type
+        quantity.numeric_backend = numeric_backend
+        return quantity
+
+    def __new_quantity__(self, new_value: BACKEND_VALUE_UNION, new_measure: UnitBase,
+                         error: Optional[BACKEND_VALUE_UNION] = None) -> Quantity:
         if error is None:
             error = self.error
-        return Quantity(new_value, new_measure, error=error, error_calculation_type=self.error_calc_type)
+        return Quantity.__from_trusted__(new_value, new_measure, error, self.error_calc_type, self.numeric_backend)
+
+    def __same_backend__(self, other: Quantity) -> Quantity:
+        if other.numeric_backend is self.numeric_backend:
+            return other
+        return Quantity.__from_trusted__(self.numeric_backend.convert(other.value), other.measure,
+                                         self.numeric_backend.convert(other.error), other.error_calc_type,
+                                         self.numeric_backend)
 
     def is_dimensionless(self) -> bool:
         return self.measure.is_dimensionless()
 
+    def to(self, unit: str) -> ConvertedQuantity:
+        """Значение и погрешность в единицах unit (например, "км/ч"); сама величина хранится в СИ"""
+        factor = self.numeric_backend.convert(si_factor(self.measure, unit))
+        return ConvertedQuantity(self.value / factor, self.error / factor, unit)
+
+    def to_base(self, domain: str = "default") -> ConvertedQuantity:
+        """Размерность через именованные единицы: кг*м^2*с^(-2) -> Дж, кг*м^2*с^(-1) -> Дж*с (значение не меняется)"""
+        return ConvertedQuantity(self.value, self.error, named_unit_str(self.measure, domain))
+
+    def best_unit(self) -> ConvertedQuantity:
+        """Значение в наиболее подходящих единицах: Quantity(3600, "с") -> 1 ч, Quantity(1500, "м") -> 1.5 км"""
+        unit, factor = best_unit(self.measure, float(abs(self.value)))
+        factor = self.numeric_backend.convert(factor)
+        return ConvertedQuantity(self.value / factor, self.error / factor, unit)
+
     def __str__(self) -> str:
         if self.measure.is_dimensionless():
             measure_str = ""
@@ -124,6 +175,9 @@ class Quantity:
 
         return f"{self.value}{error_str}{measure_str}"
 
+    def to_latex(self) -> str:
+        return format_quantity(self, "latex")
+
     def __repr__(self) -> str:
         if self.error == 0:
             return f"Quantity({self.value}, {repr(self.measure)})"
@@ -135,8 +189,11 @@ class Quantity:
     def __add__(self, other: MATH_VALUE_UNION) -> Quantity:
         if isinstance(other, NUMERIC_UNION):
             if self.is_dimensionless():
-                return self.__new_quantity__(self.value + Decimal(str(other)), self.measure)
+                return self.__new_quantity__(self.value + self.numeric_backend.convert(other), self.measure)
             raise TypeError(f"Quantity must be dimensionless in __add__ (with numeric operand), got {type(other)}")
+        if not isinstance(other, Quantity):
+            return NotImplemented
+        other = self.__same_backend__(other)
 
         new_error = self.__calc_error_addsub__(self.error, other.error)
         return self.__new_quantity__(self.value + other.value, self.measure + other.measure, error=new_error)
@@ -146,14 +203,17 @@ class Quantity:
             raise TypeError(f"Summand must be numeric in __radd__, got {type(other)}")
 
         if self.is_dimensionless():
-            return self.__new_quantity__(self.value + Decimal(str(other)), self.measure)
+            return self.__new_quantity__(self.value + self.numeric_backend.convert(other), self.measure)
         raise TypeError(f"Quantity must be dimensionless in __radd__ (with numeric operand), got {type(other)}")
 
     def __sub__(self, other: MATH_VALUE_UNION) -> Quantity:
         if isinstance(other, NUMERIC_UNION):
             if self.is_dimensionless():
-                return self.__new_quantity__(self.value - Decimal(str(other)), self.measure)
+                return self.__new_quantity__(self.value - self.numeric_backend.convert(other), self.measure)
             raise TypeError(f"Quantity must be dimensionless in __sub__ (with numeric operand), got {type(other)}")
+        if not isinstance(other, Quantity):
+            return NotImplemented
+        other = self.__same_backend__(other)
 
         new_error = self.__calc_error_addsub__(self.error, other.error)
         return self.__new_quantity__(self.value - other.value, self.measure - other.measure, error=new_error)
@@ -163,12 +223,16 @@ class Quantity:
             raise TypeError(f"Summand must be numeric in __rsub__, got {type(other)}")
 
         if self.is_dimensionless():
-            return self.__new_quantity__(Decimal(str(other)) - self.value, self.measure)
+            return self.__new_quantity__(self.numeric_backend.convert(other) - self.value, self.measure)
         raise TypeError(f"Quantity must be dimensionless in __rsub__ (with numeric operand), got {type(other)}")
 
     def __mul__(self, other: MATH_VALUE_UNION) -> Quantity:
         if isinstance(other, NUMERIC_UNION):
-            return self.__new_quantity__(self.value * Decimal(str(other)), self.measure)
+            other = self.numeric_backend.convert(other)
+            return self.__new_quantity__(self.value * other, self.measure, error=self.error * abs(other))
+        if not isinstance(other, Quantity):
+            return NotImplemented
+        other = self.__same_backend__(other)
 
         new_value = self.value * other.value
         new_error = self.__calc_error_muldiv__(self, other, new_value)
@@ -176,13 +240,18 @@ class Quantity:
 
     def __rmul__(self, other: NUMERIC_UNION) -> Quantity:
         if isinstance(other, NUMERIC_TYPE):
-            return self.__new_quantity__(self.value * other, self.measure)
+            other = self.numeric_backend.convert(other)
+            return self.__new_quantity__(self.value * other, self.measure, error=self.error * abs(other))
 
         raise TypeError(f"Multiplier must be numeric in __rmul__, got {type(other)}")
 
     def __truediv__(self, other: MATH_VALUE_UNION) -> Quantity:
         if isinstance(other, NUMERIC_UNION):
-            return self.__new_quantity__(self.value / Decimal(str(other)), self.measure)
+            other = self.numeric_backend.convert(other)
+            return self.__new_quantity__(self.value / other, self.measure, error=self.error / abs(other))
+        if not isinstance(other, Quantity):
+            return NotImplemented
+        other = self.__same_backend__(other)
 
         new_value = self.value / other.value
         new_error = self.__calc_error_muldiv__(self, other, new_value)
@@ -190,18 +259,23 @@ class Quantity:
 
     def __rtruediv__(self, other: NUMERIC_UNION) -> Quantity:
         if isinstance(other, NUMERIC_TYPE):
-            return self.__new_quantity__(other / self.value, self.measure ** -1)
+            new_value = self.numeric_backend.convert(other) / self.value
+            new_error = abs(new_value * self.error / self.value)
+            return self.__new_quantity__(new_value, self.measure ** -1, error=new_error)
 
         raise TypeError(f"Multiplier must be numeric in __rtruediv__, got {type(other)}")
 
     def __pow__(self, power: MATH_VALUE_UNION) -> Quantity:
         if isinstance(power, NUMERIC_TYPE):
-            new_value = self.value ** power
-            new_error = self.__calc_error_pow_numeric_power__(self, power, new_value)
+            new_value = self.numeric_backend.pow(self.value, power)
+            new_error = self.__calc_error_pow_numeric_power__(self, self.numeric_backend.convert(power), new_value)
             return self.__new_quantity__(new_value, self.measure ** power, error=new_error)
+        if not isinstance(power, Quantity):
+            return NotImplemented
+        power = self.__same_backend__(power)
 
         if power.is_dimensionless():
-            new_value = self.value ** power.value
+            new_value = self.numeric_backend.pow(self.value, power.value)
             new_error = self.__calc_error_pow__(self, power, new_value)
             return self.__new_quantity__(new_value, self.measure ** power.value, error=new_error)
 
@@ -212,13 +286,21 @@ class Quantity:
             if not self.is_dimensionless():
                 raise TypeError(f"Power must be dimensionless, but power is {repr(self.measure)}")
 
-            new_value = base ** self.value
+            base = self.numeric_backend.convert(base)
+            new_value = self.numeric_backend.pow(base, self.value)
             new_error = self.__calc_error_pow_numeric_base__(base, self, new_value)
 
             return self.__new_quantity__(new_value, DIMENSIONLESS, error=new_error)
         raise TypeError(f"Multiplier must be numeric in __rtruediv__, got {type(base)}")
 
 
+if DEBUG or DETAILED_DEBUG:
+    # Импорт здесь, а не в начале модуля: instrumentation сам импортирует Quantity
+    from bestsupport_units_tests.instrumentation import enable
+
+    enable(timings=DETAILED_DEBUG)
+
+
 if __name__ == "__main__":
     q1 = Quantity(2, kg / m, error=0.1)
     q2 = Quantity(7, kg / m)
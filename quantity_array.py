@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+from typing import Union, Optional, TypeAlias, Iterable, Iterator, Any
+
+import numpy as np
+from numpy import ndarray
+
+from bestsupport_units_tests.config import DEFAULT_ERROR_CALCULATION_TYPE
+from bestsupport_units_tests.error_propagation import ERROR_COMBINE_KERNELS, ERROR_REDUCE_KERNELS, get_error_kernel
+from bestsupport_units_tests.quantity import Quantity, ERROR_CALCULATION_TYPES, ERROR_CALCULATION_TYPE_NAMES
+from bestsupport_units_tests.units_conversion import ConvertedQuantity, resolve_unit, from_si
+from bestsupport_units_tests.units_ladder import column_best_unit
+from bestsupport_units_tests.units_lib import UnitBase, NUMERIC_TYPE, NUMERIC_UNION, DIMENSIONLESS
+
+ARRAY_MATH_VALUE_UNION: TypeAlias = Union["QuantityArray", Quantity, NUMERIC_UNION, ndarray]
+
+
+# Векторизованные формулы погрешностей. errors=None означает нулевую погрешность (без лишних массивов).
+# Способ сложения вкладов (сумма или квадратура) выбирается ядром из error_propagation
+
+def addsub_error(error1: Optional[ndarray], error2: Optional[ndarray], error_calc_type: str) -> Optional[ndarray]:
+    combine = get_error_kernel(ERROR_COMBINE_KERNELS, error_calc_type)
+    if error1 is None:
+        return error2
+    if error2 is None:
+        return error1
+    return combine(error1, error2)
+
+
+def mul_error(values1: ndarray, error1: Optional[ndarray], values2: ndarray, error2: Optional[ndarray],
+              error_calc_type: str) -> Optional[ndarray]:
+    # |v1·v2|·(e1/|v1| + e2/|v2|) = |v2|·e1 + |v1|·e2, без деления на нулевые значения
+    combine = get_error_kernel(ERROR_COMBINE_KERNELS, error_calc_type)
+    if error1 is None and error2 is None:
+        return None
+    if error2 is None:
+        return np.abs(values2) * error1
+    if error1 is None:
+        return np.abs(values1) * error2
+    return combine(np.abs(values2) * error1, np.abs(values1) * error2)
+
+
+def div_error(new_values: ndarray, error1: Optional[ndarray], values2: ndarray, error2: Optional[ndarray],
+              error_calc_type: str) -> Optional[ndarray]:
+    # |v1/v2|·(e1/|v1| + e2/|v2|) = (e1 + |v1/v2|·e2) / |v2|
+    combine = get_error_kernel(ERROR_COMBINE_KERNELS, error_calc_type)
+    if error1 is None and error2 is None:
+        return None
+    if error2 is None:
+        return error1 / np.abs(values2)
+    if error1 is None:
+        return np.abs(new_values) * error2 / np.abs(values2)
+    return combine(error1, np.abs(new_values) * error2) / np.abs(values2)
+
+
+def relative_error(values: ndarray, errors: ndarray) -> ndarray:
+    errors = np.broadcast_to(errors, np.shape(values))
+    return np.divide(errors, np.abs(values), out=np.zeros(np.shape(values)), where=errors != 0)
+
+
+class QuantityArray:
+    values: ndarray
+    measure: UnitBase
+    errors: Optional[ndarray]
+
+    # Протоколы NumPy (quantity_numpy): ufunc и функции NumPy считаются по values,
+    # единица - один раз на вызов; неподдержанные отклоняются TypeError, а не уходят в object-массив
+    def __array_ufunc__(self, ufunc: Any, method: str, *inputs: Any, **kwargs: Any) -> Any:
+        return array_ufunc(ufunc, method, inputs, kwargs)
+
+    def __array_function__(self, func: Any, types: tuple[type, ...], args: tuple[Any, ...],
+                           kwargs: dict[str, Any]) -> Any:
+        return array_function(func, types, args, kwargs)
+
+    def __init__(self, values: Union[Iterable[NUMERIC_UNION], ndarray],
+                 measure: Optional[UnitBase, ndarray, tuple, str] = None,
+                 errors: Optional[Iterable[NUMERIC_UNION], ndarray, NUMERIC_UNION] = None,
+                 error_calculation_type: ERROR_CALCULATION_TYPES = DEFAULT_ERROR_CALCULATION_TYPE) -> None:
+        self.values: ndarray = np.asarray(values, dtype=np.float64)
+
+        factor = 1.0
+        if isinstance(measure, (ndarray, tuple, list)) or measure is None:
+            self.measure: UnitBase = UnitBase(measure)
+        elif isinstance(measure, UnitBase):
+            self.measure: UnitBase = measure
+        elif isinstance(measure, str):
+            self.measure, factor = resolve_unit(measure)
+        else:
+            raise TypeError(f"Unknown type of measure {type(measure)}")
+
+        if errors is None:
+            self.errors: Optional[ndarray] = None
+        else:
+            errors = np.asarray(errors, dtype=np.float64)
+            if errors.shape != self.values.shape:
+                errors = np.broadcast_to(errors, self.values.shape)
+            self.errors: Optional[ndarray] = errors
+
+        if factor != 1.0:
+            self.values = self.values * factor
+            if self.errors is not None:
+                self.errors = self.errors * factor
+
+        if error_calculation_type not in ERROR_CALCULATION_TYPE_NAMES:
+            raise TypeError(f"Unknown error (inaccuracy) calculation type {error_calculation_type}")
+        self.error_calc_type = error_calculation_type
+
+    @classmethod
+    def from_quantities(cls, quantities: Iterable[Quantity]) -> QuantityArray:
+        quantities = list(quantities)
+        if not quantities:
+            raise ValueError("Cannot build QuantityArray from empty sequence")
+
+        measure = quantities[0].measure
+        for quantity in quantities:
+            if quantity.measure is not measure:
+                raise ValueError(f"All quantities must have same measure ({measure} != {quantity.measure})")
+
+        values = np.fromiter((quantity.value for quantity in quantities), dtype=np.float64, count=len(quantities))
+        errors = np.fromiter((quantity.error for quantity in quantities), dtype=np.float64, count=len(quantities))
+
+        return cls(values, measure, errors if errors.any() else None, quantities[0].error_calc_type)
+
+    def to_quantities(self) -> list[Quantity]:
+        return list(self)
+
+    def __new_array__(self, values: ndarray, measure: UnitBase, errors: Optional[ndarray]) -> QuantityArray:
+        return QuantityArray(values, measure, errors, self.error_calc_type)
+
+    @staticmethod
+    def __unpack_operand__(other: Any) -> Optional[tuple[ndarray, Optional[ndarray], UnitBase]]:
+        if isinstance(other, QuantityArray):
+            return other.values, other.errors, other.measure
+        if isinstance(other, Quantity):
+            return np.float64(other.value), (np.float64(other.error) if other.error else None), other.measure
+        if isinstance(other, NUMERIC_TYPE):
+            return np.float64(other), None, DIMENSIONLESS
+        if isinstance(other, ndarray):
+            return other.astype(np.float64, copy=False), None, DIMENSIONLESS
+        return None
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.values.shape
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self) -> Iterator[Quantity]:
+        for index in range(len(self.values)):
+            yield self[index]
+
+    def __getitem__(self, key: Any) -> Union[Quantity, QuantityArray]:
+        values = self.values[key]
+        errors = None if self.errors is None else self.errors[key]
+
+        if np.ndim(values) == 0:
+            return Quantity(float(values), self.measure, error=None if errors is None else float(errors),
+                            error_calculation_type=self.error_calc_type)
+        return self.__new_array__(values, self.measure, errors)
+
+    def is_dimensionless(self) -> bool:
+        return self.measure.is_dimensionless()
+
+    def to(self, unit: str) -> ConvertedQuantity:
+        """Массивы значений и погрешностей в единицах unit - одно умножение на закэшированный множитель"""
+        return from_si(self.values, self.errors, self.measure, unit)
+
+    def best_unit(self) -> ConvertedQuantity:
+        """Вся колонка в одной подходящей единице (подбирается по медиане значений)"""
+        unit, factor = column_best_unit(self.values, self.measure)
+        errors = None if self.errors is None else self.errors / factor
+        return ConvertedQuantity(self.values / factor, errors, unit)
+
+    def __str__(self) -> str:
+        measure_str = "" if self.measure.is_dimensionless() else f" {self.measure}"
+        if self.errors is None:
+            return f"{self.values}{measure_str}"
+        return f"{self.values} ± {self.errors}{measure_str}"
+
+    def __repr__(self) -> str:
+        if self.errors is None:
+            return f"QuantityArray({self.values!r}, {self.measure!r})"
+        return f"QuantityArray({self.values!r}±{self.errors!r}, {self.measure!r})"
+
+    # Reductions
+
+    def __total_error__(self) -> Optional[float]:
+        if self.errors is None:
+            return None
+        return float(get_error_kernel(ERROR_REDUCE_KERNELS, self.error_calc_type)(self.errors.ravel()))
+
+    def sum(self) -> Quantity:
+        return Quantity(float(self.values.sum()), self.measure, error=self.__total_error__(),
+                        error_calculation_type=self.error_calc_type)
+
+    def mean(self) -> Quantity:
+        count = self.values.size
+        if not count:
+            raise ValueError("Mean of empty QuantityArray")
+
+        error = self.__total_error__()
+        return Quantity(float(self.values.sum()) / count, self.measure, error=None if error is None else error / count,
+                        error_calculation_type=self.error_calc_type)
+
+    def min(self) -> Quantity:
+        # argmin возвращает плоский номер: для N-мерного массива он переводится в индекс по осям
+        return self[np.unravel_index(int(np.argmin(self.values)), self.values.shape)]
+
+    def max(self) -> Quantity:
+        return self[np.unravel_index(int(np.argmax(self.values)), self.values.shape)]
+
+    # Arithmetic: размерность проверяется один раз на всю операцию
+
+    def __add__(self, other: ARRAY_MATH_VALUE_UNION) -> QuantityArray:
+        operand = self.__unpack_operand__(other)
+        if operand is None:
+            return NotImplemented
+        values, errors, measure = operand
+
+        new_measure = self.measure + measure
+        new_errors = addsub_error(self.errors, errors, self.error_calc_type)
+        return self.__new_array__(self.values + values, new_measure, new_errors)
+
+    def __radd__(self, other: ARRAY_MATH_VALUE_UNION) -> QuantityArray:
+        return self.__add__(other)
+
+    def __sub__(self, other: ARRAY_MATH_VALUE_UNION) -> QuantityArray:
+        operand = self.__unpack_operand__(other)
+        if operand is None:
+            return NotImplemented
+        values, errors, measure = operand
+
+        new_measure = self.measure - measure
+        new_errors = addsub_error(self.errors, errors, self.error_calc_type)
+        return self.__new_array__(self.values - values, new_measure, new_errors)
+
+    def __rsub__(self, other: ARRAY_MATH_VALUE_UNION) -> QuantityArray:
+        operand = self.__unpack_operand__(other)
+        if operand is None:
+            return NotImplemented
+        values, errors, measure = operand
+
+        new_measure = measure - self.measure
+        new_errors = addsub_error(errors, self.errors, self.error_calc_type)
+        return self.__new_array__(values - self.values, new_measure, new_errors)
+
+    def __mul__(self, other: ARRAY_MATH_VALUE_UNION) -> QuantityArray:
+        operand = self.__unpack_operand__(other)
+        if operand is None:
+            return NotImplemented
+        values, errors, measure = operand
+
+        new_measure = self.measure * measure
+        new_errors = mul_error(self.values, self.errors, values, errors, self.error_calc_type)
+        return self.__new_array__(self.values * values, new_measure, new_errors)
+
+    def __rmul__(self, other: ARRAY_MATH_VALUE_UNION) -> QuantityArray:
+        return self.__mul__(other)
+
+    def __truediv__(self, other: ARRAY_MATH_VALUE_UNION) -> QuantityArray:
+        operand = self.__unpack_operand__(other)
+        if operand is None:
+            return NotImplemented
+        values, errors, measure = operand
+
+        new_measure = self.measure / measure
+        new_values = self.values / values
+        new_errors = div_error(new_values, self.errors, values, errors, self.error_calc_type)
+        return self.__new_array__(new_values, new_measure, new_errors)
+
+    def __rtruediv__(self, other: ARRAY_MATH_VALUE_UNION) -> QuantityArray:
+        operand = self.__unpack_operand__(other)
+        if operand is None:
+            return NotImplemented
+        values, errors, measure = operand
+
+        new_measure = measure / self.measure
+        new_values = values / self.values
+        new_errors = div_error(new_values, errors, self.values, self.errors, self.error_calc_type)
+        return self.__new_array__(new_values, new_measure, new_errors)
+
+    def __pow__(self, power: Union[Quantity, NUMERIC_UNION]) -> QuantityArray:
+        if isinstance(power, NUMERIC_TYPE):
+            new_values = self.values ** float(power)
+            new_errors = None
+            if self.errors is not None:
+                new_errors = abs(float(power)) * np.abs(new_values) * relative_error(self.values, self.errors)
+            return self.__new_array__(new_values, self.measure ** power, new_errors)
+
+        if isinstance(power, Quantity) and power.is_dimensionless():
+            power_value, power_error = float(power.value), float(power.error)
+            new_values = self.values ** power_value
+
+            new_errors = None
+            if self.errors is not None or power_error:
+                base_part = power_value * relative_error(self.values, 0.0 if self.errors is None else self.errors)
+                power_part = np.log(self.values) * power_error
+                new_errors = np.abs(new_values) * np.hypot(base_part, power_part)
+            return self.__new_array__(new_values, self.measure ** power.value, new_errors)
+
+        raise TypeError(f"Power must be numeric or dimensionless Quantity, got {type(power)}")
+
+    def __rpow__(self, base: NUMERIC_UNION) -> QuantityArray:
+        if not isinstance(base, NUMERIC_TYPE):
+            return NotImplemented
+        if not self.is_dimensionless():
+            raise TypeError(f"Power must be dimensionless, but power is {repr(self.measure)}")
+
+        base = float(base)
+        new_values = base ** self.values
+        new_errors = None
+        if self.errors is not None:
+            new_errors = np.abs(new_values * np.log(base)) * self.errors
+        return self.__new_array__(new_values, DIMENSIONLESS, new_errors)
+
+    def __neg__(self) -> QuantityArray:
+        return self.__new_array__(-self.values, self.measure, self.errors)
+
+    def __abs__(self) -> QuantityArray:
+        return self.__new_array__(np.abs(self.values), self.measure, self.errors)
+
+
+# Импорт здесь, а не в начале модуля: quantity_numpy сам импортирует QuantityArray
+from bestsupport_units_tests.quantity_numpy import array_ufunc, array_function  # noqa: E402
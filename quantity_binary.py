@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import os
+import struct
+from fractions import Fraction
+from typing import Iterable, NamedTuple, Optional, Union
+
+import numpy as np
+from numpy import ndarray
+
+from bestsupport_units_tests.config import NUMERIC_BACKEND, DEFAULT_ERROR_CALCULATION_TYPE
+from bestsupport_units_tests.numeric_backends import get_numeric_backend, NUMERIC_BACKEND_NAMES
+from bestsupport_units_tests.quantity import Quantity, ERROR_CALCULATION_TYPE_NAMES
+from bestsupport_units_tests.quantity_array import QuantityArray
+from bestsupport_units_tests.units_dim import DIM_KEY, dim_items, to_exponent
+from bestsupport_units_tests.units_lib import UnitBase
+from bestsupport_units_tests.units_list import LEN_DIM
+
+# Колоночный двоичный формат величин (little-endian, все секции выровнены по 8 байт):
+#   заголовок  | magic, версия, флаги, число строк, число единиц, длина вектора размерности, число осей,
+#              | размер списка добавленных базовых размерностей в байтах
+#   форма      | int64[осей] - форма массива значений (строки хранятся плоско, в порядке C)
+#   размерности| UTF-8, через "\0" - обозначения добавленных базовых размерностей (шт, руб), если они есть
+#   единицы    | int64[единиц, длина, 2] - показатели степеней как (числитель, знаменатель): LEN_DIM встроенных
+#              | размерностей, затем добавленные в порядке списка
+#   values     | float64[строк] - значения в СИ
+#   errors     | float64[строк] - только если установлен флаг HAS_ERRORS
+#   unit_id    | uint32[строк] - номер строки в таблице единиц
+#   error_type | uint8[строк] - номер в ERROR_CALCULATION_TYPE_NAMES
+# Значения хранятся во float64: точность Decimal/Fraction сверх double при сохранении теряется
+
+MAGIC = b"BSQ1"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHHQIIII")
+ALIGNMENT = 8
+
+FLAG_HAS_ERRORS = 1
+
+PATH_UNION = Union[str, os.PathLike]
+
+
+class QuantityColumns(NamedTuple):
+    units: tuple[UnitBase, ...]
+    values: ndarray
+    errors: Optional[ndarray]  # None - все погрешности нулевые
+    unit_ids: ndarray
+    error_types: ndarray
+    shape: tuple[int, ...]  # форма QuantityArray; для списка величин - (строк,)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def _padding(offset: int) -> int:
+    return -offset % ALIGNMENT
+
+
+def _extra_dimensions(units: list[UnitBase]) -> tuple[str, ...]:
+    # Добавленные базовые размерности (есть только у разреженного бэкенда), которые встречаются в единицах
+    return tuple(sorted({key for unit in units for key, _ in dim_items(unit.cur_dim) if isinstance(key, str)}))
+
+
+def _encode_units(units: list[UnitBase], extra_dimensions: tuple[str, ...]) -> ndarray:
+    columns: dict[DIM_KEY, int] = {symbol: LEN_DIM + ind for ind, symbol in enumerate(extra_dimensions)}
+    table = np.zeros((len(units), LEN_DIM + len(extra_dimensions), 2), dtype="<i8")
+    table[:, :, 1] = 1
+    for unit_id, unit in enumerate(units):
+        for key, dim in dim_items(unit.cur_dim):
+            exponent = Fraction(dim)
+            table[unit_id, columns.get(key, key)] = exponent.numerator, exponent.denominator
+    return table
+
+
+def _decode_units(table: ndarray, extra_dimensions: tuple[str, ...]) -> tuple[UnitBase, ...]:
+    # Словарь {ключ: показатель}: плотный бэкенд отклонит добавленные размерности ValueError
+    keys = list(range(LEN_DIM)) + list(extra_dimensions)
+    return tuple(
+        UnitBase({key: to_exponent(Fraction(int(numerator), int(denominator)))
+                  for key, (numerator, denominator) in zip(keys, unit.tolist()) if numerator})
+        for unit in table
+    )
+
+
+def _write_section(file, array: ndarray) -> None:
+    file.write(array.tobytes())
+    file.write(b"\0" * _padding(array.nbytes))
+
+
+def save_columns(path: PATH_UNION, values: ndarray, errors: Optional[ndarray], unit_ids: ndarray,
+                 error_types: ndarray, units: list[UnitBase], shape: Optional[tuple[int, ...]] = None) -> None:
+    rows = len(values)
+    flags = FLAG_HAS_ERRORS if errors is not None else 0
+    shape = (rows,) if shape is None else tuple(shape)
+    if int(np.prod(shape, dtype=np.int64)) != rows:
+        raise ValueError(f"Shape {shape} does not match {rows} rows")
+
+    extra_dimensions = _extra_dimensions(units)
+    symbols = "\0".join(extra_dimensions).encode()
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, flags, rows, len(units), LEN_DIM + len(extra_dimensions),
+                               len(shape), len(symbols)))
+        file.write(b"\0" * _padding(HEADER.size))
+
+        _write_section(file, np.array(shape, dtype="<i8"))
+        _write_section(file, np.frombuffer(symbols, dtype="u1"))
+        _write_section(file, _encode_units(units, extra_dimensions))
+        _write_section(file, np.ascontiguousarray(values, dtype="<f8"))
+        if errors is not None:
+            _write_section(file, np.ascontiguousarray(errors, dtype="<f8"))
+        _write_section(file, np.ascontiguousarray(unit_ids, dtype="<u4"))
+        _write_section(file, np.ascontiguousarray(error_types, dtype="u1"))
+
+
+def save_quantities(path: PATH_UNION, quantities: Union[QuantityArray, Iterable[Quantity]]) -> None:
+    """Запись QuantityArray или последовательности Quantity (единицы могут различаться)"""
+    if isinstance(quantities, QuantityArray):
+        rows = quantities.values.size
+        error_type = ERROR_CALCULATION_TYPE_NAMES.index(quantities.error_calc_type)
+        save_columns(path, quantities.values.ravel(), None if quantities.errors is None else quantities.errors.ravel(),
+                     np.zeros(rows, dtype="<u4"), np.full(rows, error_type, dtype="u1"), [quantities.measure],
+                     quantities.values.shape)
+        return
+
+    quantities = list(quantities)
+    unit_ids: dict[UnitBase, int] = {}
+    error_types = {name: ind for ind, name in enumerate(ERROR_CALCULATION_TYPE_NAMES)}
+
+    rows = len(quantities)
+    values = np.fromiter((quantity.value for quantity in quantities), dtype="<f8", count=rows)
+    errors = np.fromiter((quantity.error for quantity in quantities), dtype="<f8", count=rows)
+    ids = np.fromiter((unit_ids.setdefault(quantity.measure, len(unit_ids)) for quantity in quantities),
+                      dtype="<u4", count=rows)
+    types = np.fromiter((error_types[quantity.error_calc_type] for quantity in quantities), dtype="u1", count=rows)
+
+    save_columns(path, values, errors if errors.any() else None, ids, types, list(unit_ids))
+
+
+def load_columns(path: PATH_UNION) -> QuantityColumns:
+    """Колонки файла как numpy.memmap только для чтения (без копирования данных)"""
+    with open(path, "rb") as file:
+        header = file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"File '{path}' is too short for quantity binary header")
+
+    magic, version, flags, rows, unit_count, dim_len, ndim, symbols_size = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"File '{path}' is not a quantity binary file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported quantity binary format version {version}")
+
+    offset = HEADER.size + _padding(HEADER.size)
+
+    def section(dtype: str, shape: tuple[int, ...]) -> ndarray:
+        nonlocal offset
+        size = int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+        if size == 0:
+            array = np.empty(shape, dtype=dtype)
+        else:
+            array = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+        offset += size + _padding(size)
+        return array
+
+    shape = tuple(section("<i8", (ndim,)).tolist())
+    symbols = section("u1", (symbols_size,)).tobytes().decode()
+    extra_dimensions = tuple(symbols.split("\0")) if symbols else ()
+    if dim_len != LEN_DIM + len(extra_dimensions):
+        raise ValueError(f"Dimension length mismatch: file has {dim_len}, "
+                         f"expected {LEN_DIM} built-in and {len(extra_dimensions)} added dimensions")
+    units = _decode_units(section("<i8", (unit_count, dim_len, 2)), extra_dimensions)
+    values = section("<f8", (rows,))
+    errors = section("<f8", (rows,)) if flags & FLAG_HAS_ERRORS else None
+    unit_ids = section("<u4", (rows,))
+    error_types = section("u1", (rows,))
+
+    return QuantityColumns(units, values, errors, unit_ids, error_types, shape)
+
+
+def load_quantity_array(path: PATH_UNION) -> QuantityArray:
+    """QuantityArray поверх memmap; файл должен содержать одну единицу и один тип погрешности"""
+    columns = load_columns(path)
+    if len(columns.units) != 1:
+        raise ValueError(f"Expected single unit in '{path}', got {len(columns.units)}")
+
+    error_type = DEFAULT_ERROR_CALCULATION_TYPE
+    if len(columns):
+        first_type, last_type = int(columns.error_types.min()), int(columns.error_types.max())
+        if first_type != last_type:
+            raise ValueError(f"Expected single error calculation type in '{path}'")
+        error_type = ERROR_CALCULATION_TYPE_NAMES[first_type]
+
+    # reshape и np.asarray в QuantityArray не копируют memmap с dtype float64
+    values = columns.values.reshape(columns.shape)
+    errors = None if columns.errors is None else columns.errors.reshape(columns.shape)
+    return QuantityArray(values, columns.units[0], errors, error_type)
+
+
+def load_quantities(path: PATH_UNION, numeric_backend: Optional[NUMERIC_BACKEND_NAMES] = None) -> list[Quantity]:
+    columns = load_columns(path)
+    backend = get_numeric_backend(NUMERIC_BACKEND if numeric_backend is None else numeric_backend)
+    zero_error = backend.convert(0)
+
+    errors = columns.errors.tolist() if columns.errors is not None else None
+    return [
+        Quantity.__from_trusted__(
+            backend.convert(value),
+            columns.units[unit_id],
+            zero_error if errors is None else backend.convert(errors[ind]),
+            ERROR_CALCULATION_TYPE_NAMES[error_type],
+            backend,
+        )
+        for ind, (value, unit_id, error_type) in enumerate(zip(columns.values.tolist(), columns.unit_ids.tolist(),
+                                                                columns.error_types.tolist()))
+    ]
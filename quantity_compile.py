@@ -0,0 +1,487 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, NamedTuple, Optional, Sequence, Union, Literal
+
+import numpy as np
+from numpy import ndarray
+
+from bestsupport_units_tests.config import DEFAULT_ERROR_CALCULATION_TYPE
+from bestsupport_units_tests.error_propagation import propagate_linear, propagate_monte_carlo, MONTE_CARLO_DRAWS
+from bestsupport_units_tests.quantity import Quantity, ERROR_CALCULATION_TYPES, ERROR_CALCULATION_TYPE_NAMES, \
+    MAX_DEVIATION
+from bestsupport_units_tests.quantity_array import QuantityArray
+from bestsupport_units_tests.units_conversion import resolve_unit
+from bestsupport_units_tests.units_lib import UnitBase, NUMERIC_TYPE, NUMERIC_UNION, DIMENSIONLESS
+
+# Компиляция формул над Quantity: формула один раз вызывается на TraceNode-заглушках,
+# размерности проверяются и выводятся при трассировке, а для вычислений генерируется
+# функция на NumPy, которая считает только значения и погрешности (без UnitBase и ветвлений Quantity).
+
+TRACE_OPERAND_UNION = Union["TraceNode", Quantity, NUMERIC_UNION]
+
+
+class TraceOp(NamedTuple):
+    op: str  # "input", "const", "add", "sub", "mul", "div", "pow_const", "pow", "rpow_const", "neg", "abs"
+    args: tuple[int, ...]  # индексы узлов-операндов
+    param: Any = None  # номер входа, номер константы или числовая степень/основание
+
+
+class _Trace:
+    def __init__(self) -> None:
+        self.ops: list[TraceOp] = []
+        self.constants: list[float] = []
+        self.const_errors: dict[int, int] = {}  # узел-константа -> номер константы с её погрешностью
+
+    def add(self, op: str, args: tuple[int, ...], measure: UnitBase, param: Any = None) -> TraceNode:
+        self.ops.append(TraceOp(op, args, param))
+        return TraceNode(self, len(self.ops) - 1, measure)
+
+    def add_constant(self, value: Any) -> int:
+        self.constants.append(float(value))
+        return len(self.constants) - 1
+
+    def operand(self, other: TRACE_OPERAND_UNION) -> Optional[TraceNode]:
+        if isinstance(other, TraceNode):
+            if other.trace is not self:
+                raise ValueError("Cannot mix placeholders from different traced formulas")
+            return other
+        if isinstance(other, Quantity):
+            node = self.add("const", (), other.measure, self.add_constant(other.value))
+            if other.error:
+                self.const_errors[node.index] = self.add_constant(other.error)
+            return node
+        if isinstance(other, NUMERIC_TYPE):
+            return self.add("const", (), DIMENSIONLESS, self.add_constant(other))
+        return None
+
+
+class TraceNode:
+    # Заглушка Quantity при трассировке: хранит только размерность и место в графе операций
+    __slots__ = ("trace", "index", "measure")
+
+    def __init__(self, trace: _Trace, index: int, measure: UnitBase) -> None:
+        self.trace = trace
+        self.index = index
+        self.measure = measure
+
+    def is_dimensionless(self) -> bool:
+        return self.measure.is_dimensionless()
+
+    def __repr__(self) -> str:
+        return f"TraceNode({self.trace.ops[self.index].op}, {self.measure!r})"
+
+    def __binary__(self, op: str, left: TRACE_OPERAND_UNION, right: TRACE_OPERAND_UNION) -> TraceNode:
+        left, right = self.trace.operand(left), self.trace.operand(right)
+        if left is None or right is None:
+            return NotImplemented
+
+        if op == "add":
+            measure = left.measure + right.measure
+        elif op == "sub":
+            measure = left.measure - right.measure
+        elif op == "mul":
+            measure = left.measure * right.measure
+        else:
+            measure = left.measure / right.measure
+        return self.trace.add(op, (left.index, right.index), measure)
+
+    def __add__(self, other: TRACE_OPERAND_UNION) -> TraceNode:
+        return self.__binary__("add", self, other)
+
+    def __radd__(self, other: TRACE_OPERAND_UNION) -> TraceNode:
+        return self.__binary__("add", other, self)
+
+    def __sub__(self, other: TRACE_OPERAND_UNION) -> TraceNode:
+        return self.__binary__("sub", self, other)
+
+    def __rsub__(self, other: TRACE_OPERAND_UNION) -> TraceNode:
+        return self.__binary__("sub", other, self)
+
+    def __mul__(self, other: TRACE_OPERAND_UNION) -> TraceNode:
+        return self.__binary__("mul", self, other)
+
+    def __rmul__(self, other: TRACE_OPERAND_UNION) -> TraceNode:
+        return self.__binary__("mul", other, self)
+
+    def __truediv__(self, other: TRACE_OPERAND_UNION) -> TraceNode:
+        return self.__binary__("div", self, other)
+
+    def __rtruediv__(self, other: TRACE_OPERAND_UNION) -> TraceNode:
+        return self.__binary__("div", other, self)
+
+    def __pow__(self, power: TRACE_OPERAND_UNION) -> TraceNode:
+        if isinstance(power, NUMERIC_TYPE):
+            return self.trace.add("pow_const", (self.index,), self.measure ** power, float(power))
+
+        power = self.trace.operand(power)
+        if power is None:
+            return NotImplemented
+        if not power.is_dimensionless():
+            raise TypeError(f"Power must be dimensionless, but power is {repr(power.measure)}")
+        # Размерность результата зависела бы от значения степени - такое не компилируется
+        if not self.is_dimensionless():
+            raise TypeError(f"Base must be dimensionless for traced power, but base is {repr(self.measure)}")
+        return self.trace.add("pow", (self.index, power.index), DIMENSIONLESS)
+
+    def __rpow__(self, base: TRACE_OPERAND_UNION) -> TraceNode:
+        if not self.is_dimensionless():
+            raise TypeError(f"Power must be dimensionless, but power is {repr(self.measure)}")
+        if isinstance(base, NUMERIC_TYPE):
+            return self.trace.add("rpow_const", (self.index,), DIMENSIONLESS, float(base))
+
+        base = self.trace.operand(base)
+        if base is None:
+            return NotImplemented
+        return base.__pow__(self)
+
+    def __neg__(self) -> TraceNode:
+        return self.trace.add("neg", (self.index,), self.measure)
+
+    def __pos__(self) -> TraceNode:
+        return self
+
+    def __abs__(self) -> TraceNode:
+        return self.trace.add("abs", (self.index,), self.measure)
+
+
+# Генерация кода. Погрешности без деления на значения (нулевые значения не дают nan);
+# узлы без погрешности не порождают кода погрешности вовсе
+
+def _combine_errors(terms: list[str], error_calc_type: str) -> Optional[str]:
+    if not terms:
+        return None
+    if len(terms) == 1:
+        return terms[0]
+    if error_calc_type == MAX_DEVIATION:
+        return " + ".join(terms)
+    return f"np.hypot({terms[0]}, {terms[1]})"
+
+
+def _emit_op(ind: int, trace_op: TraceOp, errors: list[Optional[str]],
+             error_calc_type: str) -> tuple[str, Optional[str]]:
+    # (выражение значения, выражение погрешности или None) для узла ind
+    op, args, param = trace_op
+    value = f"v{ind}"
+    a, ea = f"v{args[0]}", errors[args[0]]
+    b, eb = (f"v{args[1]}", errors[args[1]]) if len(args) > 1 else (None, None)
+
+    if op in ("add", "sub"):
+        sign = "+" if op == "add" else "-"
+        return f"{a} {sign} {b}", _combine_errors([error for error in (ea, eb) if error is not None], error_calc_type)
+
+    if op == "mul":
+        # |v1·v2|·(e1/|v1| + e2/|v2|) = |v2|·e1 + |v1|·e2
+        terms = [f"{b} * {ea}" if ea is not None else None, f"{a} * {eb}" if eb is not None else None]
+        terms = [term for term in terms if term is not None]
+        if error_calc_type == MAX_DEVIATION or len(terms) == 1:
+            terms = [f"np.abs({term})" for term in terms]
+        return f"{a} * {b}", _combine_errors(terms, error_calc_type)
+
+    if op == "div":
+        # |v1/v2|·(e1/|v1| + e2/|v2|) = (e1 + |v1/v2|·e2) / |v2| - единственное деление на делитель
+        terms = [ea, f"np.abs({value}) * {eb}" if eb is not None else None]
+        terms = [term for term in terms if term is not None]
+        combined = _combine_errors(terms, error_calc_type)
+        return f"{a} / {b}", None if combined is None else f"({combined}) / np.abs({b})"
+
+    if op == "pow_const":
+        if param == 0 or ea is None:
+            return f"{a} ** {param!r}", None
+        derivative = f"{param!r}" if param == 1 else (f"{param!r} * {a}" if param == 2 else
+                                                      f"{param!r} * {a} ** {param - 1!r}")
+        return f"{a} ** {param!r}", f"np.abs({derivative}) * {ea}"
+
+    if op == "pow":
+        terms = [f"np.abs({b} * {a} ** ({b} - 1)) * {ea}" if ea is not None else None,
+                 f"np.abs({value} * np.log({a})) * {eb}" if eb is not None else None]
+        return f"{a} ** {b}", _combine_errors([term for term in terms if term is not None], error_calc_type)
+
+    if op == "rpow_const":
+        log_base = abs(math.log(param))
+        return f"{param!r} ** {a}", None if ea is None else f"np.abs({value}) * {log_base!r} * {ea}"
+
+    if op == "neg":
+        return f"-{a}", ea
+
+    if op == "abs":
+        return f"np.abs({a})", ea
+
+    raise ValueError(f"Unknown traced operation {op}")
+
+
+def generate_source(ops: Sequence[TraceOp], output: int, const_errors: dict[int, int],
+                    input_has_errors: Sequence[bool], error_calc_type: str) -> str:
+    """Исходный код функции f(v0, e0, v1, e1, ...) -> (значения, погрешности или None)"""
+    input_args = []
+    lines = []
+    errors: list[Optional[str]] = []
+
+    for ind, trace_op in enumerate(ops):
+        if trace_op.op == "input":
+            input_args.append(f"v{ind}, e{ind}")
+            errors.append(f"e{ind}" if input_has_errors[trace_op.param] else None)
+            continue
+        if trace_op.op == "const":
+            lines.append(f"v{ind} = c{trace_op.param}")
+            error_const = const_errors.get(ind)
+            if error_const is not None:
+                lines.append(f"e{ind} = c{error_const}")
+            errors.append(None if error_const is None else f"e{ind}")
+            continue
+
+        value_expr, error_expr = _emit_op(ind, trace_op, errors, error_calc_type)
+        lines.append(f"v{ind} = {value_expr}")
+        if error_expr is not None:
+            lines.append(f"e{ind} = {error_expr}")
+        errors.append(None if error_expr is None else f"e{ind}")
+
+    lines.append(f"return v{output}, {errors[output] or 'None'}")
+    body = "\n".join(f"    {line}" for line in lines)
+    return f"def compiled({', '.join(input_args)}):\n{body}\n"
+
+
+def _scaled(coef: Any, derivative: Optional[ndarray]) -> Optional[ndarray]:
+    return None if derivative is None else np.asarray(coef)[..., None] * derivative
+
+
+def _summed(derivative1: Optional[ndarray], derivative2: Optional[ndarray]) -> Optional[ndarray]:
+    if derivative1 is None:
+        return derivative2
+    if derivative2 is None:
+        return derivative1
+    return derivative1 + derivative2
+
+
+def forward_derivatives(ops: Sequence[TraceOp], output: int, values: Sequence[Any], constants: Sequence[float],
+                        variable_nodes: dict[int, int], variables: int) -> tuple[ndarray, Optional[ndarray]]:
+    """Прямой проход по графу с аналитическими производными.
+
+    variable_nodes: узел -> номер переменной (входы и константы с погрешностью).
+    Производная узла хранится как массив (*форма значения, variables) или None, если она нулевая.
+    """
+    node_values: list[Any] = []
+    node_derivatives: list[Optional[ndarray]] = []
+
+    for ind, (op, args, param) in enumerate(ops):
+        a, da = (node_values[args[0]], node_derivatives[args[0]]) if args else (None, None)
+        b, db = (node_values[args[1]], node_derivatives[args[1]]) if len(args) > 1 else (None, None)
+
+        if op == "input":
+            value, derivative = np.asarray(values[param], dtype=np.float64), None
+        elif op == "const":
+            value, derivative = constants[param], None
+        elif op == "add":
+            value, derivative = a + b, _summed(da, db)
+        elif op == "sub":
+            value, derivative = a - b, _summed(da, _scaled(-1.0, db))
+        elif op == "mul":
+            value, derivative = a * b, _summed(_scaled(b, da), _scaled(a, db))
+        elif op == "div":
+            value = a / b
+            derivative = _scaled(1.0 / b, _summed(da, _scaled(-value, db)))
+        elif op == "pow_const":
+            value, derivative = a ** param, _scaled(param * a ** (param - 1), da)
+        elif op == "pow":
+            value = a ** b
+            derivative = _summed(_scaled(b * a ** (b - 1), da), _scaled(value * np.log(a), db))
+        elif op == "rpow_const":
+            value = param ** a
+            derivative = _scaled(value * math.log(param), da)
+        elif op == "neg":
+            value, derivative = -a, _scaled(-1.0, da)
+        elif op == "abs":
+            value, derivative = np.abs(a), _scaled(np.sign(a), da)
+        else:
+            raise ValueError(f"Unknown traced operation {op}")
+
+        variable = variable_nodes.get(ind)
+        if variable is not None:
+            derivative = np.zeros((*np.shape(value), variables))
+            derivative[..., variable] = 1.0
+
+        node_values.append(value)
+        node_derivatives.append(derivative)
+
+    return node_values[output], node_derivatives[output]
+
+
+class CompiledFormula:
+    """Формула с проверенной при компиляции размерностью результата.
+
+    Вызов принимает QuantityArray/Quantity (значения в СИ) или массивы/числа в единицах,
+    заданных при компиляции, и возвращает QuantityArray. Код генерируется отдельно для
+    каждого сочетания входов с погрешностью и без неё.
+    """
+
+    def __init__(self, trace: _Trace, output: TraceNode, input_measures: tuple[UnitBase, ...],
+                 input_factors: tuple[float, ...], error_calc_type: str) -> None:
+        self.ops = tuple(trace.ops)
+        self.constants = tuple(trace.constants)
+        self.const_errors = dict(trace.const_errors)
+        self.output = output.index
+        self.measure = output.measure
+        self.input_measures = input_measures
+        self.input_factors = input_factors
+        self.error_calc_type = error_calc_type
+        self._kernels: dict[tuple[bool, ...], tuple[str, Callable]] = {}
+
+    def kernel(self, input_has_errors: tuple[bool, ...]) -> tuple[str, Callable]:
+        kernel = self._kernels.get(input_has_errors)
+        if kernel is None:
+            source = generate_source(self.ops, self.output, self.const_errors, input_has_errors, self.error_calc_type)
+            namespace = {"np": np, **{f"c{ind}": value for ind, value in enumerate(self.constants)}}
+            exec(compile(source, "<compiled formula>", "exec"), namespace)
+            kernel = self._kernels[input_has_errors] = source, namespace["compiled"]
+        return kernel
+
+    @property
+    def source(self) -> str:
+        """Сгенерированный код для случая, когда у всех входов есть погрешности"""
+        return self.kernel((True,) * len(self.input_measures))[0]
+
+    def __unpack_input__(self, ind: int, value: Any) -> tuple[Any, Optional[Any]]:
+        if isinstance(value, QuantityArray):
+            if value.measure is not self.input_measures[ind]:
+                raise ValueError(f"Argument {ind}: expected {self.input_measures[ind]}, got {value.measure}")
+            return value.values, value.errors
+        if isinstance(value, Quantity):
+            if value.measure is not self.input_measures[ind]:
+                raise ValueError(f"Argument {ind}: expected {self.input_measures[ind]}, got {value.measure}")
+            return float(value.value), (float(value.error) if value.error else None)
+
+        values = np.asarray(value, dtype=np.float64)
+        factor = self.input_factors[ind]
+        return (values if factor == 1.0 else values * factor), None
+
+    def evaluate(self, values: Sequence[Any], errors: Optional[Sequence[Optional[Any]]] = None) -> tuple[Any, Any]:
+        """Сырые массивы в СИ -> (значения, погрешности): без проверок размерности"""
+        if errors is None:
+            errors = (None,) * len(values)
+        _, compiled = self.kernel(tuple(error is not None for error in errors))
+        args = [arg for pair in zip(values, errors) for arg in pair]
+        return compiled(*args)
+
+    def __unpack_inputs__(self, inputs: Sequence[Any]) -> list[tuple[Any, Optional[Any]]]:
+        if len(inputs) != len(self.input_measures):
+            raise TypeError(f"Compiled formula takes {len(self.input_measures)} arguments, got {len(inputs)}")
+        return [self.__unpack_input__(ind, value) for ind, value in enumerate(inputs)]
+
+    def __call__(self, *inputs: Any) -> QuantityArray:
+        unpacked = self.__unpack_inputs__(inputs)
+        values, errors = self.evaluate([value for value, _ in unpacked], [error for _, error in unpacked])
+        return QuantityArray(values, self.measure, errors, self.error_calc_type)
+
+    # Распространение погрешностей по якобиану или методом Монте-Карло.
+    # Переменные: входы формулы, затем константы-Quantity с погрешностью (они независимы от входов)
+
+    def __variable_nodes__(self) -> dict[int, int]:
+        inputs = {ind: trace_op.param for ind, trace_op in enumerate(self.ops) if trace_op.op == "input"}
+        constants = {node: len(inputs) + ind for ind, node in enumerate(self.const_errors)}
+        return {**inputs, **constants}
+
+    def jacobian(self, values: Sequence[Any]) -> tuple[ndarray, ndarray]:
+        """(значения (n,), якобиан (n, k + c)) по сырым значениям входов в СИ"""
+        variables = len(self.input_measures) + len(self.const_errors)
+        value, derivative = forward_derivatives(self.ops, self.output, values, self.constants,
+                                                self.__variable_nodes__(), variables)
+
+        value = np.atleast_1d(value)
+        if derivative is None:
+            return value.ravel(), np.zeros((value.size, variables))
+        derivative = np.broadcast_to(derivative, (*np.shape(value), variables))
+        return value.ravel(), derivative.reshape(-1, variables)
+
+    def __variable_errors__(self, errors: Sequence[Optional[Any]], rows: int) -> ndarray:
+        columns = [np.zeros(rows) if error is None else np.broadcast_to(np.asarray(error, dtype=np.float64), rows)
+                   for error in errors]
+        columns += [np.full(rows, self.constants[error_ind]) for error_ind in self.const_errors.values()]
+        return np.stack(columns, axis=-1)
+
+    def __variable_covariance__(self, covariance: ndarray) -> ndarray:
+        # Ковариация входов (k, k) или (n, k, k), дополненная дисперсиями констант по диагонали
+        covariance = np.asarray(covariance, dtype=np.float64)
+        if not self.const_errors:
+            return covariance
+
+        inputs = len(self.input_measures)
+        size = inputs + len(self.const_errors)
+        extended = np.zeros((*covariance.shape[:-2], size, size))
+        extended[..., :inputs, :inputs] = covariance
+        for ind, error_ind in enumerate(self.const_errors.values()):
+            extended[..., inputs + ind, inputs + ind] = self.constants[error_ind] ** 2
+        return extended
+
+    def propagate(self, *inputs: Any, covariance: Optional[ndarray] = None,
+                  method: Literal["linear", "monte_carlo"] = "linear", draws: int = MONTE_CARLO_DRAWS,
+                  rng: Union[np.random.Generator, int, None] = None) -> QuantityArray:
+        """Вычисление формулы с погрешностью через якобиан (с учётом ковариации входов) или Монте-Карло.
+
+        covariance - ковариация входов в СИ: (k, k) общая или (n, k, k) для каждой строки;
+        без неё входы независимы с погрешностями из самих QuantityArray/Quantity.
+        """
+        unpacked = self.__unpack_inputs__(inputs)
+        values = [value for value, _ in unpacked]
+        rows = int(np.prod(np.broadcast_shapes(*(np.shape(value) for value in values)), dtype=np.int64))
+
+        errors = self.__variable_errors__([error for _, error in unpacked], rows)
+        if covariance is not None:
+            covariance = self.__variable_covariance__(covariance)
+
+        if method == "linear":
+            new_values, jacobian = self.jacobian(values)
+            new_errors = propagate_linear(jacobian, errors, covariance, self.error_calc_type)
+            return QuantityArray(new_values, self.measure, new_errors, self.error_calc_type)
+
+        if method == "monte_carlo":
+            variable_nodes = self.__variable_nodes__()
+            const_nodes = list(self.const_errors)
+            means = np.stack([np.broadcast_to(np.asarray(value, dtype=np.float64), rows) for value in values] +
+                             [np.full(rows, self.constants[self.ops[node].param]) for node in const_nodes], axis=-1)
+
+            def evaluate_samples(columns: list[ndarray]) -> ndarray:
+                constants = list(self.constants)
+                for node in const_nodes:
+                    constants[self.ops[node].param] = columns[variable_nodes[node]]
+                value, _ = forward_derivatives(self.ops, self.output, columns, constants, {}, 0)
+                return np.broadcast_to(value, columns[0].shape)
+
+            new_values, new_errors = propagate_monte_carlo(evaluate_samples, means, errors, covariance, draws, rng)
+            return QuantityArray(new_values, self.measure, new_errors, self.error_calc_type)
+
+        raise ValueError(f"Unknown propagation method {method}")
+
+
+def trace_formula(func: Callable[..., Any], measures: Sequence[Union[UnitBase, str]]) -> tuple[_Trace, Any, list]:
+    trace = _Trace()
+    resolved = []
+    placeholders = []
+    for ind, measure in enumerate(measures):
+        factor = 1.0
+        if isinstance(measure, str):
+            measure, factor = resolve_unit(measure)
+        elif not isinstance(measure, UnitBase):
+            measure = UnitBase(measure)
+        resolved.append((measure, factor))
+        placeholders.append(trace.add("input", (), measure, ind))
+
+    return trace, func(*placeholders), resolved
+
+
+def compile_formula(func: Callable[..., Any], measures: Sequence[Union[UnitBase, str]],
+                    error_calculation_type: ERROR_CALCULATION_TYPES = DEFAULT_ERROR_CALCULATION_TYPE
+                    ) -> CompiledFormula:
+    """Трассировка func на заглушках с размерностями measures и компиляция в CompiledFormula.
+
+    Строковые единицы ("км/ч") задают, в каких единицах передаются сырые массивы.
+    """
+    if error_calculation_type not in ERROR_CALCULATION_TYPE_NAMES:
+        raise TypeError(f"Unknown error (inaccuracy) calculation type {error_calculation_type}")
+
+    trace, result, resolved = trace_formula(func, measures)
+    output = trace.operand(result)
+    if output is None:
+        raise TypeError(f"Formula must return Quantity-like result, got {type(result)}")
+
+    return CompiledFormula(trace, output, tuple(measure for measure, _ in resolved),
+                           tuple(factor for _, factor in resolved), error_calculation_type)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from typing import Iterable, NamedTuple, Optional, Union
+
+import numpy as np
+
+from bestsupport_units_tests.config import DEFAULT_ERROR_CALCULATION_TYPE
+from bestsupport_units_tests.quantity import Quantity, ERROR_CALCULATION_TYPES
+from bestsupport_units_tests.quantity_array import QuantityArray
+from bestsupport_units_tests.units_conversion import resolve_unit
+from bestsupport_units_tests.units_lib import UnitBase, NUMERIC_UNION
+from bestsupport_units_tests.units_registry import RegistrySnapshot
+
+# Разбиение разнородной коллекции величин по размерности и свёртки внутри групп.
+# UnitBase интернирован: одна размерность - один объект единицы, так что он и есть канонический ключ группы.
+# Разбиение - один проход с накоплением чисел в списки, дальше каждая группа - QuantityArray в СИ,
+# и суммы/средние/экстремумы считаются векторно, без Quantity.__add__ и нового Decimal на каждый элемент.
+
+# Quantity или (значение, строка единиц[, погрешность]): ("5", "км"), (1.5, "т", 0.1)
+GROUP_ITEM_UNION = Union[Quantity, tuple[Union[NUMERIC_UNION, str], str], tuple[Union[NUMERIC_UNION, str], str,
+                                                                                Union[NUMERIC_UNION, str]]]
+
+
+class GroupSummary(NamedTuple):
+    count: int
+    sum: Quantity  # погрешность - свёртка погрешностей группы по способу её расчёта
+    mean: Quantity
+    min: Quantity
+    max: Quantity
+
+
+def group_by_dimension(items: Iterable[GROUP_ITEM_UNION],
+                       error_calculation_type: Optional[ERROR_CALCULATION_TYPES] = None,
+                       units: Optional[RegistrySnapshot] = None) -> dict[UnitBase, QuantityArray]:
+    """Группы величин одной размерности: единица СИ -> QuantityArray значений в СИ (в порядке появления).
+
+    Строки единиц переводятся в СИ множителями снимка реестра (км -> м * 1000), каждая строка разбирается
+    один раз. Способ расчёта погрешности группы - error_calculation_type, иначе первой Quantity группы.
+    """
+    # Ключ - id интернированной единицы: хэш int считается в C, а UnitBase.__hash__ - вызов метода Python
+    # [единица, значения, погрешности, способ расчёта погрешности (None, пока в группе не было Quantity)]
+    columns: dict[int, list] = {}
+    parsed_units: dict[str, tuple[UnitBase, float]] = {}
+
+    for item in items:
+        if isinstance(item, Quantity):
+            measure = item.measure
+            column = columns.get(id(measure))
+            if column is None:
+                column = columns[id(measure)] = [measure, [], [], item.error_calc_type]
+            elif column[3] is None:
+                # Группу начал кортеж: способ расчёта берётся у первой Quantity
+                column[3] = item.error_calc_type
+            # Числа бэкенда (Decimal/Fraction/float) переводятся во float разом при сборке массива группы
+            column[1].append(item.value)
+            column[2].append(item.error)
+            continue
+
+        value, unit, *error = item
+        parsed = parsed_units.get(unit)
+        if parsed is None:
+            parsed = parsed_units[unit] = resolve_unit(unit, units)
+        measure, factor = parsed
+        column = columns.get(id(measure))
+        if column is None:
+            column = columns[id(measure)] = [measure, [], [], None]
+        column[1].append(float(value) * factor)
+        column[2].append(float(error[0]) * factor if error else 0.0)
+
+    groups = {}
+    for measure, values, errors, error_type in columns.values():
+        values = np.fromiter(map(float, values), dtype=np.float64, count=len(values))
+        errors = np.fromiter(map(float, errors), dtype=np.float64, count=len(errors))
+        error_type = error_calculation_type or error_type or DEFAULT_ERROR_CALCULATION_TYPE
+        groups[measure] = QuantityArray(values, measure, errors if errors.any() else None, error_type)
+    return groups
+
+
+def summarize_group(group: QuantityArray) -> GroupSummary:
+    return GroupSummary(group.values.size, group.sum(), group.mean(), group.min(), group.max())
+
+
+def summarize_by_dimension(items: Iterable[GROUP_ITEM_UNION],
+                           error_calculation_type: Optional[ERROR_CALCULATION_TYPES] = None,
+                           units: Optional[RegistrySnapshot] = None) -> dict[UnitBase, GroupSummary]:
+    """Число, сумма (с общей погрешностью), среднее, минимум и максимум по каждой размерности"""
+    return {measure: summarize_group(group)
+            for measure, group in group_by_dimension(items, error_calculation_type, units).items()}
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import csv
+import os
+import re
+from typing import Iterator, Optional, Union, TextIO, Iterable
+
+from bestsupport_units_tests.config import DEFAULT_ERROR_CALCULATION_TYPE, NUMERIC_BACKEND
+from bestsupport_units_tests.numeric_backends import get_numeric_backend, NUMERIC_BACKEND_NAMES
+from bestsupport_units_tests.quantity import Quantity, ERROR_CALCULATION_TYPES, ERROR_CALCULATION_TYPE_NAMES
+from bestsupport_units_tests.units_parsing import parse_unit_str, ParsedUnit
+
+# Чтение величин из текста: "9.81 м/с^2 ± 0.01" или "9.81 ± 0.01 м/с^2" (формат Quantity.__str__)
+
+READ_CHUNK_SIZE = 1 << 20
+BATCH_SIZE = 1 << 16
+
+_NUMBER = r"[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?"
+_ERROR_SIGN = r"(?:±|\+-|\+/-)"
+QUANTITY_RE = re.compile(
+    rf"\s*(?P<value>{_NUMBER})\s*(?:{_ERROR_SIGN}\s*(?P<error>{_NUMBER}))?"
+    rf"\s*(?P<unit>.*?)\s*(?:{_ERROR_SIGN}\s*(?P<error_after>{_NUMBER}))?\s*"
+)
+
+PATH_UNION = Union[str, os.PathLike]
+
+
+def split_quantity_str(quantity_str: str) -> tuple[str, Optional[str], str]:
+    match = QUANTITY_RE.fullmatch(quantity_str)
+    if match is None:
+        raise ValueError(f"Не удалось разобрать величину '{quantity_str}'")
+
+    error = match.group("error") or match.group("error_after")
+    return match.group("value"), error, match.group("unit")
+
+
+def parse_quantity(quantity_str: str, error_calculation_type: ERROR_CALCULATION_TYPES = DEFAULT_ERROR_CALCULATION_TYPE,
+                   numeric_backend: Optional[NUMERIC_BACKEND_NAMES] = None) -> Quantity:
+    value, error, unit_str = split_quantity_str(quantity_str)
+    measure, factor = parse_unit_str(unit_str)
+
+    quantity = Quantity(value, measure, error=error, error_calculation_type=error_calculation_type,
+                        numeric_backend=numeric_backend)
+    if factor != 1.0:
+        quantity = quantity * factor
+    return quantity
+
+
+def iter_text_lines(file: TextIO, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[str]:
+    """Строки файла, читаемого блоками по chunk_size символов (память ограничена размером блока)"""
+    tail = ""
+    while chunk := file.read(chunk_size):
+        lines = (tail + chunk).split("\n")
+        tail = lines.pop()
+        yield from lines
+    if tail:
+        yield tail
+
+
+def _iter_quantity_fields(lines: Iterable[str], column: Union[int, str, None], delimiter: str,
+                          has_header: Optional[bool]) -> Iterator[tuple[int, str, Optional[str], ParsedUnit]]:
+    # (номер строки, значение, погрешность, единицы); повторяющаяся строка единиц разбирается один раз
+    last_unit_str, last_parsed = None, None
+
+    if has_header is None:
+        has_header = isinstance(column, str)
+
+    if column is None:
+        rows = ((line,) for line in lines)
+    else:
+        rows = csv.reader(lines, delimiter=delimiter)
+
+    header = next(rows, None) if has_header else None
+    if isinstance(column, str):
+        if header is None or column not in header:
+            raise ValueError(f"Column '{column}' not found in header {header}")
+        column_index = header.index(column)
+    else:
+        column_index = column or 0
+
+    for row_number, row in enumerate(rows, start=2 if has_header else 1):
+        if not row or column_index >= len(row) or not row[column_index].strip():
+            continue
+
+        try:
+            value, error, unit_str = split_quantity_str(row[column_index])
+            if unit_str != last_unit_str:
+                last_unit_str, last_parsed = unit_str, parse_unit_str(unit_str)
+        except ValueError as exc:
+            raise ValueError(f"Строка {row_number}: {exc}") from None
+
+        yield row_number, value, error, last_parsed
+
+
+def _open_text(file: Union[PATH_UNION, TextIO]) -> tuple[TextIO, bool]:
+    if isinstance(file, (str, os.PathLike)):
+        return open(file, "r", encoding="utf-8", newline=""), True
+    return file, False
+
+
+def iter_quantities(file: Union[PATH_UNION, TextIO], column: Union[int, str, None] = None, delimiter: str = ",",
+                    has_header: Optional[bool] = None,
+                    error_calculation_type: ERROR_CALCULATION_TYPES = DEFAULT_ERROR_CALCULATION_TYPE,
+                    numeric_backend: Optional[NUMERIC_BACKEND_NAMES] = None,
+                    chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Quantity]:
+    """Потоковое чтение Quantity из текстового/CSV файла.
+
+    column=None - вся строка является величиной, int - номер колонки CSV, str - имя колонки из заголовка.
+    has_header=None - заголовок есть, только если колонка задана именем.
+    """
+    if error_calculation_type not in ERROR_CALCULATION_TYPE_NAMES:
+        raise TypeError(f"Unknown error (inaccuracy) calculation type {error_calculation_type}")
+    backend = get_numeric_backend(NUMERIC_BACKEND if numeric_backend is None else numeric_backend)
+    zero_error = backend.convert(0)
+
+    stream, should_close = _open_text(file)
+    try:
+        lines = iter_text_lines(stream, chunk_size)
+        last_factor, backend_factor = 1.0, backend.convert(1)
+
+        for _, value, error, (measure, factor) in _iter_quantity_fields(lines, column, delimiter, has_header):
+            value = backend.convert(value)
+            error = zero_error if error is None else backend.convert(error)
+
+            if factor != 1.0:
+                if factor != last_factor:
+                    last_factor, backend_factor = factor, backend.convert(factor)
+                value, error = value * backend_factor, error * backend_factor
+
+            yield Quantity.__from_trusted__(value, measure, error, error_calculation_type, backend)
+    finally:
+        if should_close:
+            stream.close()
+
+
+def iter_quantity_batches(file: Union[PATH_UNION, TextIO], column: Union[int, str, None] = None,
+                          delimiter: str = ",", has_header: Optional[bool] = None, batch_size: int = BATCH_SIZE,
+                          error_calculation_type: ERROR_CALCULATION_TYPES = DEFAULT_ERROR_CALCULATION_TYPE,
+                          chunk_size: int = READ_CHUNK_SIZE) -> Iterator["QuantityArray"]:
+    """Потоковое чтение колонки в пакеты QuantityArray (значения в СИ).
+
+    Пакет завершается досрочно, если размерность в колонке меняется.
+    """
+    import numpy as np
+
+    from bestsupport_units_tests.quantity_array import QuantityArray
+
+    stream, should_close = _open_text(file)
+    try:
+        lines = iter_text_lines(stream, chunk_size)
+
+        values: list[float] = []
+        errors: list[float] = []
+        batch_measure = None
+
+        def flush() -> QuantityArray:
+            batch_errors = np.array(errors) if any(errors) else None
+            batch = QuantityArray(values, batch_measure, batch_errors, error_calculation_type)
+            values.clear()
+            errors.clear()
+            return batch
+
+        for _, value, error, (measure, factor) in _iter_quantity_fields(lines, column, delimiter, has_header):
+            if measure is not batch_measure:
+                if values:
+                    yield flush()
+                batch_measure = measure
+
+            values.append(float(value) * factor)
+            errors.append(0.0 if error is None else float(error) * factor)
+
+            if len(values) >= batch_size:
+                yield flush()
+
+        if values:
+            yield flush()
+    finally:
+        if should_close:
+            stream.close()
@@ -0,0 +1,484 @@
+from __future__ import annotations
+
+import math
+import operator
+from fractions import Fraction
+from typing import Any, Callable, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+from numpy import ndarray
+
+from bestsupport_units_tests.config import DEFAULT_ERROR_CALCULATION_TYPE
+from bestsupport_units_tests.error_propagation import ERROR_ACCUMULATE_KERNELS, ERROR_COMBINE_KERNELS, \
+    ERROR_REDUCE_KERNELS, get_error_kernel
+from bestsupport_units_tests.quantity import Quantity
+from bestsupport_units_tests.quantity_array import QuantityArray
+from bestsupport_units_tests.units_lib import UnitBase, NUMERIC_TYPE, DIMENSIONLESS, rad
+
+# Протоколы NumPy для QuantityArray: np.sqrt(array), np.sum(array), ndarray * array и т.п.
+# ufunc считается на сырых float64 одним вызовом, единица результата - один раз на вызов по таблице правил
+# (сложение требует равных единиц, sqrt делит показатели пополам, exp/log требуют безразмерного аргумента).
+# Погрешность переносится первым порядком: |f'(x)|·e. Всё, чего нет в таблицах, отклоняется TypeError -
+# без тихого перехода к object-массивам и поэлементным вызовам Python.
+
+
+class UfuncRule(NamedTuple):
+    measure: Callable[[UnitBase], UnitBase]  # единица результата по единице аргумента (TypeError - недопустима)
+    derivative: Callable[[ndarray, ndarray], Any]  # f'(x) по (x, f(x)) для переноса погрешности
+
+
+def _keep(measure: UnitBase) -> UnitBase:
+    return measure
+
+
+def _power(power: Any) -> Callable[[UnitBase], UnitBase]:
+    def measure_rule(measure: UnitBase) -> UnitBase:
+        return measure ** power
+    return measure_rule
+
+
+def _dimensionless(name: str) -> Callable[[UnitBase], UnitBase]:
+    def measure_rule(measure: UnitBase) -> UnitBase:
+        if not measure.is_dimensionless():
+            raise TypeError(f"np.{name} requires dimensionless argument, got {measure!r}")
+        return DIMENSIONLESS
+    return measure_rule
+
+
+def _angle(name: str) -> Callable[[UnitBase], UnitBase]:
+    # Угол - радианы (базовая размерность рад) или безразмерное число
+    def measure_rule(measure: UnitBase) -> UnitBase:
+        if measure is not rad and not measure.is_dimensionless():
+            raise TypeError(f"np.{name} requires angle in radians or dimensionless argument, got {measure!r}")
+        return DIMENSIONLESS
+    return measure_rule
+
+
+def _inverse_angle(name: str) -> Callable[[UnitBase], UnitBase]:
+    dimensionless = _dimensionless(name)
+
+    def measure_rule(measure: UnitBase) -> UnitBase:
+        dimensionless(measure)
+        return rad
+    return measure_rule
+
+
+def _unit_derivative(x: ndarray, value: ndarray) -> float:
+    return 1.0
+
+
+UNARY_UFUNC_RULES: dict[np.ufunc, UfuncRule] = {
+    np.sqrt: UfuncRule(_power(Fraction(1, 2)), lambda x, value: 0.5 / value),
+    np.cbrt: UfuncRule(_power(Fraction(1, 3)), lambda x, value: 1 / (3 * value ** 2)),
+    np.square: UfuncRule(_power(2), lambda x, value: 2 * x),
+    np.reciprocal: UfuncRule(_power(-1), lambda x, value: value ** 2),
+    np.exp: UfuncRule(_dimensionless("exp"), lambda x, value: value),
+    np.expm1: UfuncRule(_dimensionless("expm1"), lambda x, value: value + 1),
+    np.exp2: UfuncRule(_dimensionless("exp2"), lambda x, value: value * np.log(2)),
+    np.log: UfuncRule(_dimensionless("log"), lambda x, value: 1 / x),
+    np.log2: UfuncRule(_dimensionless("log2"), lambda x, value: 1 / (x * np.log(2))),
+    np.log10: UfuncRule(_dimensionless("log10"), lambda x, value: 1 / (x * np.log(10))),
+    np.log1p: UfuncRule(_dimensionless("log1p"), lambda x, value: 1 / (1 + x)),
+    np.sin: UfuncRule(_angle("sin"), lambda x, value: np.cos(x)),
+    np.cos: UfuncRule(_angle("cos"), lambda x, value: np.sin(x)),
+    np.tan: UfuncRule(_angle("tan"), lambda x, value: 1 + value ** 2),
+    np.arcsin: UfuncRule(_inverse_angle("arcsin"), lambda x, value: 1 / np.sqrt(1 - x ** 2)),
+    np.arccos: UfuncRule(_inverse_angle("arccos"), lambda x, value: 1 / np.sqrt(1 - x ** 2)),
+    np.arctan: UfuncRule(_inverse_angle("arctan"), lambda x, value: 1 / (1 + x ** 2)),
+    np.sinh: UfuncRule(_dimensionless("sinh"), lambda x, value: np.cosh(x)),
+    np.cosh: UfuncRule(_dimensionless("cosh"), lambda x, value: np.sinh(x)),
+    np.tanh: UfuncRule(_dimensionless("tanh"), lambda x, value: 1 - value ** 2),
+    # Округление не уменьшает погрешность измерения - она остаётся прежней
+    np.floor: UfuncRule(_keep, _unit_derivative),
+    np.ceil: UfuncRule(_keep, _unit_derivative),
+    np.rint: UfuncRule(_keep, _unit_derivative),
+    np.trunc: UfuncRule(_keep, _unit_derivative),
+    np.fabs: UfuncRule(_keep, _unit_derivative),
+}
+
+# Операторы QuantityArray: (метод, если массив слева; метод, если справа)
+OPERATOR_UFUNCS: dict[np.ufunc, tuple[str, str]] = {
+    np.add: ("__add__", "__radd__"),
+    np.subtract: ("__sub__", "__rsub__"),
+    np.multiply: ("__mul__", "__rmul__"),
+    np.divide: ("__truediv__", "__rtruediv__"),
+    np.power: ("__pow__", "__rpow__"),
+}
+UNARY_OPERATOR_UFUNCS: dict[np.ufunc, Callable[[QuantityArray], QuantityArray]] = {
+    np.negative: QuantityArray.__neg__,
+    np.positive: lambda array: array.__new_array__(array.values.copy(), array.measure, array.errors),
+    np.absolute: QuantityArray.__abs__,
+}
+
+# Сравнения: единицы должны совпадать, результат - обычный ndarray из bool
+COMPARISON_UFUNCS = frozenset({np.equal, np.not_equal, np.less, np.less_equal, np.greater, np.greater_equal})
+# Проверки значений: единица не важна, результат - обычный ndarray
+VALUE_PREDICATE_UFUNCS = frozenset({np.isnan, np.isinf, np.isfinite, np.signbit, np.sign})
+# Выбор одного из аргументов с равными единицами: погрешность берётся у выбранного
+SELECT_UFUNCS: dict[np.ufunc, Callable[[ndarray, ndarray], ndarray]] = {
+    np.maximum: np.greater_equal,
+    np.fmax: np.greater_equal,
+    np.minimum: np.less_equal,
+    np.fmin: np.less_equal,
+}
+
+
+def _unpack(operand: Any) -> tuple[ndarray, Optional[ndarray], UnitBase]:
+    unpacked = QuantityArray.__unpack_operand__(operand)
+    if unpacked is None:
+        raise TypeError(f"Unsupported operand type for QuantityArray ufunc: {type(operand)}")
+    return unpacked
+
+
+def _same_measure(measure1: UnitBase, measure2: UnitBase) -> UnitBase:
+    # Та же проверка, что при сложении: ValueError для разных единиц
+    return measure1 + measure2
+
+
+def _error_calc_type(operands: Sequence[Any]) -> str:
+    return next((operand.error_calc_type for operand in operands if isinstance(operand, (QuantityArray, Quantity))),
+                DEFAULT_ERROR_CALCULATION_TYPE)
+
+
+def _zeros_if_none(errors: Optional[ndarray], shape: tuple[int, ...]) -> ndarray:
+    return np.zeros(shape) if errors is None else np.broadcast_to(errors, shape)
+
+
+def array_ufunc(ufunc: np.ufunc, method: str, inputs: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+    """QuantityArray.__array_ufunc__: вызов ufunc над значениями, единица результата - по таблицам правил"""
+    if method != "__call__":
+        raise TypeError(f"np.{ufunc.__name__}.{method} is not supported for QuantityArray")
+    if kwargs.get("out") is not None or set(kwargs) - {"out"}:
+        raise TypeError(f"np.{ufunc.__name__} keyword arguments are not supported for QuantityArray: "
+                        f"{', '.join(sorted(kwargs))}")
+
+    if ufunc in OPERATOR_UFUNCS:
+        left, right = inputs
+        direct, reflected = OPERATOR_UFUNCS[ufunc]
+        # Методы, а не операторы: ndarray + QuantityArray снова привёл бы в ufunc
+        result = getattr(left, direct)(right) if isinstance(left, QuantityArray) else getattr(right, reflected)(left)
+        if result is NotImplemented:
+            raise TypeError(f"np.{ufunc.__name__} is not supported for operands "
+                            f"{type(left).__name__} and {type(right).__name__}")
+        return result
+
+    if ufunc in UNARY_OPERATOR_UFUNCS:
+        return UNARY_OPERATOR_UFUNCS[ufunc](inputs[0])
+
+    rule = UNARY_UFUNC_RULES.get(ufunc)
+    if rule is not None:
+        array = inputs[0]
+        measure = rule.measure(array.measure)
+        values = ufunc(array.values)
+        errors = None
+        if array.errors is not None:
+            errors = np.abs(rule.derivative(array.values, values)) * array.errors
+        return array.__new_array__(values, measure, errors)
+
+    if ufunc in VALUE_PREDICATE_UFUNCS:
+        return ufunc(_unpack(inputs[0])[0])
+
+    if ufunc not in COMPARISON_UFUNCS and ufunc not in SELECT_UFUNCS and ufunc not in (np.hypot, np.arctan2):
+        raise TypeError(f"np.{ufunc.__name__} is not supported for QuantityArray")
+
+    (values1, errors1, measure1), (values2, errors2, measure2) = map(_unpack, inputs)
+    measure = _same_measure(measure1, measure2)
+    if ufunc in COMPARISON_UFUNCS:
+        return ufunc(values1, values2)
+
+    error_calc_type = _error_calc_type(inputs)
+    values = ufunc(values1, values2)
+    errors = None
+    if errors1 is not None or errors2 is not None:
+        errors1, errors2 = _zeros_if_none(errors1, values.shape), _zeros_if_none(errors2, values.shape)
+        if ufunc in SELECT_UFUNCS:
+            errors = np.where(SELECT_UFUNCS[ufunc](values1, values2), errors1, errors2)
+        else:
+            combine = get_error_kernel(ERROR_COMBINE_KERNELS, error_calc_type)
+            # hypot: ∂/∂x = x/h; arctan2(y, x): ∂/∂y = x/r², ∂/∂x = -y/r²
+            if ufunc is np.hypot:
+                scale1, scale2 = values1 / values, values2 / values
+            else:
+                squared = values1 ** 2 + values2 ** 2
+                scale1, scale2 = values2 / squared, values1 / squared
+            errors = combine(np.abs(scale1) * errors1, np.abs(scale2) * errors2)
+
+    if ufunc is np.arctan2:
+        measure = rad
+    return QuantityArray(values, measure, errors, error_calc_type)
+
+
+def unit_array_ufunc(ufunc: np.ufunc, method: str, inputs: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+    """UnitBase.__array_ufunc__: ndarray * м и ndarray / м дают QuantityArray, остальное отклоняется"""
+    if method != "__call__" or kwargs or ufunc not in (np.multiply, np.divide):
+        raise TypeError(f"np.{ufunc.__name__} is not supported for UnitBase")
+
+    left, right = inputs
+    unit_left = isinstance(left, UnitBase)
+    unit, other = (left, right) if unit_left else (right, left)
+    if isinstance(other, UnitBase):
+        return left * right if ufunc is np.multiply else left / right
+    if isinstance(other, (QuantityArray, Quantity)):
+        raise TypeError(f"np.{ufunc.__name__} of {type(other).__name__} and UnitBase is not supported")
+
+    if np.ndim(other) == 0 and isinstance(other, NUMERIC_TYPE):
+        # Скаляр NumPy (np.float64 - подкласс float) ведёт себя как число Python
+        if ufunc is np.multiply:
+            return unit.__rmul__(other)
+        if not unit_left:
+            return unit.__rtruediv__(other)
+        raise TypeError(f"UnitBase cannot be divided by number {other!r}")
+
+    values = np.asarray(other, dtype=np.float64)
+    if ufunc is np.multiply:
+        return QuantityArray(values, unit)
+    if unit_left:
+        return QuantityArray(1.0 / values, unit)
+    return QuantityArray(values, unit ** -1)
+
+
+# __array_function__: функция NumPy -> реализация для QuantityArray
+HANDLED_FUNCTIONS: dict[Callable, Callable] = {}
+
+
+def implements(*functions: Callable) -> Callable[[Callable], Callable]:
+    def decorator(implementation: Callable) -> Callable:
+        for function in functions:
+            HANDLED_FUNCTIONS[function] = implementation
+        return implementation
+    return decorator
+
+
+def array_function(func: Callable, types: tuple[type, ...], args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+    """QuantityArray.__array_function__"""
+    # Чужие типы с __array_function__ - пусть решают они (протокол NumPy)
+    if not all(issubclass(cls, (QuantityArray, ndarray)) for cls in types):
+        return NotImplemented
+    implementation = HANDLED_FUNCTIONS.get(func)
+    if implementation is None:
+        raise TypeError(f"np.{func.__name__} is not supported for QuantityArray "
+                        f"(use .values for unitless NumPy operations)")
+    return implementation(*args, **kwargs)
+
+
+def _scalar(array: QuantityArray, value: Any, error: Optional[Any]) -> Quantity:
+    return Quantity(float(value), array.measure, error=None if error is None else float(error),
+                    error_calculation_type=array.error_calc_type)
+
+
+AXIS_UNION = Union[int, tuple[int, ...]]
+
+
+def _reduce_axes(array: QuantityArray, axis: AXIS_UNION) -> tuple[int, ...]:
+    # Ось или кортеж осей -> неотрицательные номера (границы и повторы уже проверила свёртка значений)
+    axes = axis if isinstance(axis, tuple) else (axis,)
+    return tuple(operator.index(ax) % array.values.ndim for ax in axes)
+
+
+def _reduce_errors(array: QuantityArray, axes: tuple[int, ...], keepdims: bool) -> Optional[ndarray]:
+    if array.errors is None:
+        return None
+    # Ядра свёртки работают по последней оси: свёртываемые оси переносятся в конец и сливаются в одну
+    errors = np.moveaxis(np.broadcast_to(array.errors, array.values.shape), axes, range(-len(axes), 0))
+    kept = errors.ndim - len(axes)
+    errors = errors.reshape(errors.shape[:kept] + (math.prod(errors.shape[kept:]),))
+    errors = get_error_kernel(ERROR_REDUCE_KERNELS, array.error_calc_type)(errors)
+    return np.expand_dims(errors, axes) if keepdims else errors
+
+
+@implements(np.sum)
+def _sum(array: QuantityArray, axis: Optional[AXIS_UNION] = None, keepdims: bool = False) -> Any:
+    if axis is None:
+        return array.sum()
+    values = array.values.sum(axis=axis, keepdims=keepdims)
+    return array.__new_array__(values, array.measure, _reduce_errors(array, _reduce_axes(array, axis), keepdims))
+
+
+@implements(np.mean)
+def _mean(array: QuantityArray, axis: Optional[AXIS_UNION] = None, keepdims: bool = False) -> Any:
+    if axis is None:
+        return array.mean()
+    values = array.values.sum(axis=axis, keepdims=keepdims)
+    axes = _reduce_axes(array, axis)
+    count = math.prod(array.values.shape[ax] for ax in axes)
+    errors = _reduce_errors(array, axes, keepdims)
+    return array.__new_array__(values / count, array.measure, None if errors is None else errors / count)
+
+
+def _select_extreme(array: QuantityArray, arg_function: Callable, axis: Optional[int], keepdims: bool) -> Any:
+    if axis is None:
+        return array[np.unravel_index(int(arg_function(array.values)), array.shape)]
+    if isinstance(axis, tuple):
+        raise TypeError(f"np.{arg_function.__name__[3:]} with tuple axis is not supported for QuantityArray")
+    indices = np.expand_dims(arg_function(array.values, axis=axis), axis)
+
+    def take(column: ndarray) -> ndarray:
+        taken = np.take_along_axis(column, indices, axis=axis)
+        return taken if keepdims else np.squeeze(taken, axis=axis)
+
+    return array.__new_array__(take(array.values), array.measure, None if array.errors is None else take(array.errors))
+
+
+@implements(np.min, np.amin)
+def _min(array: QuantityArray, axis: Optional[int] = None, keepdims: bool = False) -> Any:
+    return _select_extreme(array, np.argmin, axis, keepdims)
+
+
+@implements(np.max, np.amax)
+def _max(array: QuantityArray, axis: Optional[int] = None, keepdims: bool = False) -> Any:
+    return _select_extreme(array, np.argmax, axis, keepdims)
+
+
+@implements(np.argmin)
+def _argmin(array: QuantityArray, axis: Optional[int] = None) -> Any:
+    return np.argmin(array.values, axis=axis)
+
+
+@implements(np.argmax)
+def _argmax(array: QuantityArray, axis: Optional[int] = None) -> Any:
+    return np.argmax(array.values, axis=axis)
+
+
+@implements(np.argsort)
+def _argsort(array: QuantityArray, axis: Optional[int] = -1) -> ndarray:
+    return np.argsort(array.values, axis=axis)
+
+
+@implements(np.sort)
+def _sort(array: QuantityArray, axis: Optional[int] = -1) -> QuantityArray:
+    if axis is None:
+        array, axis = _ravel(array), -1
+    order = np.argsort(array.values, axis=axis)
+    errors = None if array.errors is None else np.take_along_axis(array.errors, order, axis=axis)
+    return array.__new_array__(np.take_along_axis(array.values, order, axis=axis), array.measure, errors)
+
+
+def _join(join: Callable, arrays: Sequence[QuantityArray], axis: int) -> QuantityArray:
+    arrays = [array if isinstance(array, QuantityArray) else QuantityArray(array) for array in arrays]
+    measure = arrays[0].measure
+    for array in arrays[1:]:
+        measure = _same_measure(measure, array.measure)
+
+    errors = None
+    if any(array.errors is not None for array in arrays):
+        errors = join([_zeros_if_none(array.errors, array.shape) for array in arrays], axis=axis)
+    return QuantityArray(join([array.values for array in arrays], axis=axis), measure, errors,
+                         arrays[0].error_calc_type)
+
+
+@implements(np.concatenate)
+def _concatenate(arrays: Sequence[QuantityArray], axis: int = 0) -> QuantityArray:
+    return _join(np.concatenate, arrays, axis)
+
+
+@implements(np.stack)
+def _stack(arrays: Sequence[QuantityArray], axis: int = 0) -> QuantityArray:
+    return _join(np.stack, arrays, axis)
+
+
+@implements(np.where)
+def _where(condition: Any, x: Any, y: Any) -> QuantityArray:
+    (values1, errors1, measure1), (values2, errors2, measure2) = _unpack(x), _unpack(y)
+    measure = _same_measure(measure1, measure2)
+    condition = np.asarray(condition, dtype=bool)
+    values = np.where(condition, values1, values2)
+    errors = None
+    if errors1 is not None or errors2 is not None:
+        errors = np.where(condition, _zeros_if_none(errors1, values.shape), _zeros_if_none(errors2, values.shape))
+    return QuantityArray(values, measure, errors, _error_calc_type((x, y)))
+
+
+def _map_columns(array: QuantityArray, function: Callable[[ndarray], ndarray]) -> QuantityArray:
+    # Функции формы: одно и то же преобразование значений и погрешностей
+    errors = None if array.errors is None else function(np.broadcast_to(array.errors, array.shape))
+    return array.__new_array__(function(array.values), array.measure, errors)
+
+
+@implements(np.reshape)
+def _reshape(array: QuantityArray, shape: Any) -> QuantityArray:
+    return _map_columns(array, lambda column: np.reshape(column, shape))
+
+
+@implements(np.ravel)
+def _ravel(array: QuantityArray) -> QuantityArray:
+    return _map_columns(array, np.ravel)
+
+
+@implements(np.transpose)
+def _transpose(array: QuantityArray, axes: Any = None) -> QuantityArray:
+    return _map_columns(array, lambda column: np.transpose(column, axes))
+
+
+@implements(np.copy)
+def _copy(array: QuantityArray) -> QuantityArray:
+    return _map_columns(array, np.copy)
+
+
+@implements(np.cumsum)
+def _cumsum(array: QuantityArray, axis: Optional[int] = None) -> QuantityArray:
+    if axis is None:
+        array, axis = _ravel(array), 0
+    errors = None
+    if array.errors is not None:
+        errors = get_error_kernel(ERROR_ACCUMULATE_KERNELS, array.error_calc_type)(array.errors, axis)
+    return array.__new_array__(np.cumsum(array.values, axis=axis), array.measure, errors)
+
+
+@implements(np.diff)
+def _diff(array: QuantityArray, n: int = 1, axis: int = -1) -> QuantityArray:
+    combine = get_error_kernel(ERROR_COMBINE_KERNELS, array.error_calc_type)
+    values, errors = array.values, array.errors
+    for _ in range(n):
+        if errors is not None:
+            errors = np.broadcast_to(errors, values.shape)
+            ndim = errors.ndim
+            head = tuple(slice(1, None) if dim == axis % ndim else slice(None) for dim in range(ndim))
+            tail = tuple(slice(None, -1) if dim == axis % ndim else slice(None) for dim in range(ndim))
+            errors = combine(errors[head], errors[tail])
+        values = np.diff(values, axis=axis)
+    return array.__new_array__(values, array.measure, errors)
+
+
+@implements(np.std)
+def _std(array: QuantityArray, axis: Optional[int] = None, ddof: int = 0) -> Any:
+    # Разброс значений - статистика выборки, погрешности измерений в нём не участвуют
+    values = np.std(array.values, axis=axis, ddof=ddof)
+    if axis is None:
+        return _scalar(array, values, None)
+    return array.__new_array__(values, array.measure, None)
+
+
+@implements(np.var)
+def _var(array: QuantityArray, axis: Optional[int] = None, ddof: int = 0) -> Any:
+    values = np.var(array.values, axis=axis, ddof=ddof)
+    if axis is None:
+        return Quantity(float(values), array.measure ** 2, error_calculation_type=array.error_calc_type)
+    return array.__new_array__(values, array.measure ** 2, None)
+
+
+@implements(np.isclose)
+def _isclose(a: Any, b: Any, rtol: float = 1e-05, atol: float = 1e-08) -> ndarray:
+    """atol - в единицах СИ общей единицы a и b"""
+    (values1, _, measure1), (values2, _, measure2) = _unpack(a), _unpack(b)
+    _same_measure(measure1, measure2)
+    return np.isclose(values1, values2, rtol=rtol, atol=atol)
+
+
+@implements(np.allclose)
+def _allclose(a: Any, b: Any, rtol: float = 1e-05, atol: float = 1e-08) -> bool:
+    return bool(_isclose(a, b, rtol, atol).all())
+
+
+@implements(np.shape)
+def _shape(array: QuantityArray) -> tuple[int, ...]:
+    return array.shape
+
+
+@implements(np.ndim)
+def _ndim(array: QuantityArray) -> int:
+    return array.values.ndim
+
+
+@implements(np.size)
+def _size(array: QuantityArray, axis: Optional[int] = None) -> int:
+    return np.size(array.values, axis)
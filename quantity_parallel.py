@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, NamedTuple, Optional, Union
+
+import numpy as np
+from numpy import ndarray
+
+from bestsupport_units_tests.quantity import Quantity
+from bestsupport_units_tests.quantity_array import QuantityArray
+from bestsupport_units_tests.quantity_compile import CompiledFormula, compile_formula
+
+# Параллельное вычисление формулы по колонкам на нескольких процессах.
+# Размерность проверяется один раз в родителе (трассировка compile_formula и проверка единиц входов),
+# воркеры получают только исходный код ядра, константы и имена блоков разделяемой памяти:
+# колонки не сериализуются, каждый воркер пишет свой диапазон строк прямо в выходной блок, так что порядок сохраняется.
+
+SHARDS_PER_WORKER = 4  # больше частей, чем воркеров: выравнивание нагрузки при неравных процессах
+PARALLEL_MIN_ROWS = 1 << 16  # меньше строк - считаем в текущем процессе (запуск воркеров дороже)
+
+
+class SharedColumn(NamedTuple):
+    name: str  # имя блока SharedMemory; пустая строка - скаляр, значение в scalar
+    scalar: Optional[float] = None
+
+
+class ShardTask(NamedTuple):
+    source: str
+    constants: tuple[Any, ...]
+    values: tuple[SharedColumn, ...]
+    errors: tuple[Optional[SharedColumn], ...]
+    out_values: str
+    out_errors: Optional[str]
+    rows: int
+    start: int
+    stop: int
+
+
+# Ядра, уже скомпилированные в процессе-воркере (по исходному коду)
+_WORKER_KERNELS: dict[tuple[str, tuple], Callable] = {}
+
+
+def _worker_kernel(source: str, constants: tuple[Any, ...]) -> Callable:
+    kernel = _WORKER_KERNELS.get((source, constants))
+    if kernel is None:
+        namespace = {"np": np, **{f"c{ind}": value for ind, value in enumerate(constants)}}
+        exec(compile(source, "<compiled formula>", "exec"), namespace)
+        kernel = _WORKER_KERNELS[(source, constants)] = namespace["compiled"]
+    return kernel
+
+
+def _run_shard(task: ShardTask, attach: Callable[[Optional[SharedColumn]], Any]) -> None:
+    # Отдельная функция: представления буферов освобождаются при выходе из неё, до закрытия блоков
+    args = []
+    for value, error in zip(task.values, task.errors):
+        args += [attach(value), attach(error)]
+    values, errors = _worker_kernel(task.source, task.constants)(*args)
+
+    attach(SharedColumn(task.out_values))[:] = values
+    if task.out_errors is not None:
+        attach(SharedColumn(task.out_errors))[:] = errors
+
+
+def _evaluate_shard(task: ShardTask) -> int:
+    """Вычисление строк [start, stop) в воркере; возвращает число строк"""
+    opened: list[shared_memory.SharedMemory] = []
+
+    def attach(column: Optional[SharedColumn]) -> Any:
+        if column is None:
+            return None
+        if not column.name:
+            return column.scalar
+        block = shared_memory.SharedMemory(name=column.name)
+        opened.append(block)
+        return np.ndarray((task.rows,), dtype=np.float64, buffer=block.buf)[task.start:task.stop]
+
+    try:
+        _run_shard(task, attach)
+        return task.stop - task.start
+    finally:
+        for block in opened:
+            try:
+                block.close()
+            except BufferError:
+                # Представление ещё живо в трассировке исключения - блок закроется вместе с процессом
+                pass
+
+
+def _shard_bounds(rows: int, shards: int) -> list[tuple[int, int]]:
+    step = -(-rows // shards)
+    return [(start, min(rows, start + step)) for start in range(0, rows, step)]
+
+
+def evaluate_parallel(formula: Union[CompiledFormula, Callable[..., Any]], *inputs: Union[QuantityArray, Quantity],
+                      workers: Optional[int] = None, executor: Optional[Executor] = None,
+                      min_rows: int = PARALLEL_MIN_ROWS) -> QuantityArray:
+    """Формула по колонкам QuantityArray (и скалярам Quantity), разбитая на части по процессам.
+
+    formula - CompiledFormula или функция, которая компилируется по единицам входов
+    (тип погрешности берётся у первого QuantityArray). executor - готовый пул, иначе создаётся
+    ProcessPoolExecutor(workers). Меньше min_rows строк считается в текущем процессе.
+    """
+    if not isinstance(formula, CompiledFormula):
+        arrays = [value for value in inputs if isinstance(value, QuantityArray)]
+        error_calc_type = arrays[0].error_calc_type if arrays else inputs[0].error_calc_type
+        formula = compile_formula(formula, [value.measure for value in inputs], error_calc_type)
+
+    # Единственная проверка размерностей: дальше воркеры работают с сырыми float64
+    unpacked = formula.__unpack_inputs__(inputs)
+    shape = np.broadcast_shapes(*(np.shape(value) for value, _ in unpacked))
+    rows = int(np.prod(shape, dtype=np.int64))
+    # Пустой вход - тоже в текущем процессе: общей памяти нулевого размера не бывает
+    if rows == 0 or rows < min_rows:
+        return formula(*inputs)
+
+    input_has_errors = tuple(error is not None for _, error in unpacked)
+    source, kernel = formula.kernel(input_has_errors)
+    # Пробный расчёт первой строки: есть ли у результата погрешность (и ошибки формулы - до запуска воркеров)
+    _, probe_errors = kernel(*(None if arg is None else np.asarray(arg, dtype=np.float64).reshape(-1)[:1]
+                               for pair in unpacked for arg in pair))
+
+    blocks: list[shared_memory.SharedMemory] = []
+
+    def allocate() -> SharedColumn:
+        block = shared_memory.SharedMemory(create=True, size=rows * np.dtype(np.float64).itemsize)
+        blocks.append(block)
+        return SharedColumn(block.name)
+
+    def share(array: Any) -> SharedColumn:
+        if np.ndim(array) == 0:
+            return SharedColumn("", float(array))
+        column = allocate()
+        np.ndarray(shape, dtype=np.float64, buffer=blocks[-1].buf)[...] = array
+        return column
+
+    own_executor = executor is None
+    try:
+        values = tuple(share(value) for value, _ in unpacked)
+        errors = tuple(None if error is None else share(error) for _, error in unpacked)
+        out_values = allocate()
+        out_errors = None if probe_errors is None else allocate()
+
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        shards = (workers or os.cpu_count() or 1) * SHARDS_PER_WORKER
+        tasks = [ShardTask(source, formula.constants, values, errors, out_values.name,
+                           None if out_errors is None else out_errors.name, rows, start, stop)
+                 for start, stop in _shard_bounds(rows, shards)]
+        for future in [executor.submit(_evaluate_shard, task) for task in tasks]:
+            future.result()
+
+        def gather(column: Optional[SharedColumn]) -> Optional[ndarray]:
+            if column is None:
+                return None
+            block = next(block for block in blocks if block.name == column.name)
+            return np.ndarray((rows,), dtype=np.float64, buffer=block.buf).reshape(shape).copy()
+
+        return QuantityArray(gather(out_values), formula.measure, gather(out_errors), formula.error_calc_type)
+    finally:
+        if own_executor and executor is not None:
+            executor.shutdown()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
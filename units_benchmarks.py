@@ -0,0 +1,450 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from bestsupport_units_tests.numeric_backends import NUMERIC_BACKENDS
+from bestsupport_units_tests.quantity import Quantity
+from bestsupport_units_tests.quantity_io import iter_quantities, iter_quantity_batches
+from bestsupport_units_tests.units_dim import DIM_BACKENDS
+from bestsupport_units_tests.units_lib import kg, m, s
+from bestsupport_units_tests.units_list import BASE_UNITS, COMPOSITE_UNITS
+
+BENCH_NUMBER = 100_000
+
+
+def time_per_op(stmt, number: int = BENCH_NUMBER, repeat: int = 5) -> float:
+    """Лучшее время одной операции в наносекундах"""
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1e9
+
+
+def bench_dim_backends(number: int = BENCH_NUMBER) -> dict[str, dict[str, float]]:
+    """Сравнение бэкендов хранения размерности (операции без кэша UnitBase)"""
+    results = {}
+
+    for name, backend in DIM_BACKENDS.items():
+        newton, _ = backend.make(COMPOSITE_UNITS["Н"])
+        meter, _ = backend.make(BASE_UNITS["м"])
+
+        results[name] = {
+            "make": time_per_op(lambda: backend.make(COMPOSITE_UNITS["Н"]), number),
+            "add": time_per_op(lambda: backend.from_result(backend.add(newton, meter)), number),
+            "sub": time_per_op(lambda: backend.from_result(backend.sub(newton, meter)), number),
+            "pow": time_per_op(lambda: backend.from_result(backend.scale(newton, 2)), number),
+            "neg": time_per_op(lambda: backend.from_result(backend.neg(newton)), number),
+            "is_zero": time_per_op(lambda: backend.is_zero(newton), number),
+        }
+
+    return results
+
+
+def bench_sparse_dims(dim_counts: tuple[int, ...] = (10, 50, 200),
+                      number: int = BENCH_NUMBER) -> dict[int, dict[str, float]]:
+    """Плотный tuple против разреженных пар при разном числе базовых размерностей (нс/операция, байт/вектор).
+
+    Единицы типичные: три-четыре ненулевые степени (Н, умноженный на одну доменную размерность).
+    """
+    from bestsupport_units_tests.units_dim import SparseDim, SparseDimBackend, TupleDimBackend
+
+    def dense_size(dim: tuple) -> int:
+        return sys.getsizeof(dim)  # показатели - кэшированные малые int
+
+    def sparse_size(dim: SparseDim) -> int:
+        return sys.getsizeof(dim) + sys.getsizeof(dim.pairs) + sum(map(sys.getsizeof, dim.pairs))
+
+    results = {}
+    for count in dim_counts:
+        domain = [0] * count
+        domain[count - 1] = 1
+        dense_price = tuple(domain)
+        dense_newton = COMPOSITE_UNITS["Н"] + (0,) * (count - len(COMPOSITE_UNITS["Н"]))
+        # Доменная размерность разреженного вектора называется обозначением (сама строка в паре - по ссылке)
+        sparse_price = SparseDim(((f"d{count - 1}", 1),))
+        sparse_newton = SparseDim(((0, 1), (1, 1), (2, -2)))
+        dense_product = TupleDimBackend.add(dense_newton, dense_price)
+        sparse_product, _ = SparseDimBackend.from_result(SparseDimBackend.add(sparse_newton, sparse_price))
+
+        results[count] = {
+            "dense_add_ns": time_per_op(lambda: TupleDimBackend.add(dense_newton, dense_price), number),
+            "sparse_add_ns": time_per_op(lambda: SparseDimBackend.add(sparse_newton, sparse_price), number),
+            "dense_pow_ns": time_per_op(lambda: TupleDimBackend.scale(dense_product, 2), number),
+            "sparse_pow_ns": time_per_op(lambda: SparseDimBackend.scale(sparse_product, 2), number),
+            "dense_hash_ns": time_per_op(lambda: hash(dense_product), number),
+            "sparse_hash_ns": time_per_op(lambda: hash(sparse_product.pairs), number),
+            "dense_bytes": dense_size(dense_product),
+            "sparse_bytes": sparse_size(sparse_product),
+        }
+
+    return results
+
+
+def bench_numeric_backends(number: int = BENCH_NUMBER // 10) -> dict[str, dict[str, float]]:
+    """Сравнение числовых бэкендов Quantity на путях __mul__/__truediv__/__pow__"""
+    results = {}
+
+    for name in NUMERIC_BACKENDS:
+        mass = Quantity(2.5, kg, error=0.1, numeric_backend=name)
+        acc = Quantity(9.81, m / s ** 2, error=0.01, numeric_backend=name)
+
+        results[name] = {
+            "mul": time_per_op(lambda: mass * acc, number),
+            "truediv": time_per_op(lambda: mass / acc, number),
+            "pow": time_per_op(lambda: acc ** 2, number),
+            "mul_number": time_per_op(lambda: mass * 1.5, number),
+        }
+
+    return results
+
+
+def bench_chained_expression(pairs: int = 100_000) -> dict[str, float]:
+    """Пропускная способность F = m * a по массиву пар (пар/с)"""
+    masses = [Quantity(1 + index % 100, kg, error=0.1) for index in range(pairs)]
+    accelerations = [Quantity(9.81, m / s ** 2, error=0.01) for _ in range(pairs)]
+
+    start = time.perf_counter()
+    forces = [mass * acc for mass, acc in zip(masses, accelerations)]
+    elapsed = time.perf_counter() - start
+
+    assert len(forces) == pairs
+    return {"pairs_per_sec": pairs / elapsed}
+
+
+def bench_numpy_dispatch(rows: int = 100_000) -> dict[str, float]:
+    """Произведение и сумма: object-массив Quantity против ufunc по QuantityArray (строк/с)"""
+    import numpy as np
+
+    from bestsupport_units_tests.quantity_array import QuantityArray
+
+    masses = QuantityArray(1.0 + np.arange(rows) % 100, kg, 0.1)
+    accelerations = QuantityArray(np.full(rows, 9.81), m / s ** 2, 0.01)
+    mass_objects = np.array(masses.to_quantities(), dtype=object)
+    acc_objects = np.array(accelerations.to_quantities(), dtype=object)
+
+    start = time.perf_counter()
+    np.sum(np.multiply(mass_objects, acc_objects))
+    object_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    np.sum(np.multiply(masses, accelerations))
+    array_elapsed = time.perf_counter() - start
+
+    return {"object_rows_per_sec": rows / object_elapsed, "array_rows_per_sec": rows / array_elapsed}
+
+
+def bench_compiled_formula(rows: int = 100_000) -> dict[str, float]:
+    """Сопротивление 0.5*C*p*S*v^2: поэлементно на Quantity, на QuantityArray и скомпилированной формулой (строк/с)"""
+    import numpy as np
+
+    from bestsupport_units_tests.quantity_array import QuantityArray
+    from bestsupport_units_tests.quantity_compile import compile_formula
+
+    def drag(coef, density, area, speed):
+        return 0.5 * coef * density * area * speed ** 2
+
+    speeds = np.linspace(1.0, 50.0, rows)
+    inputs = (
+        QuantityArray(np.full(rows, 0.47), None, 0.01),
+        QuantityArray(np.full(rows, 1.2), kg / m ** 3, 0.05),
+        QuantityArray(np.full(rows, 2.0), m ** 2),
+        QuantityArray(speeds, m / s, 0.1),
+    )
+    scalar_rows = min(rows, 10_000)
+    scalar_inputs = [[quantity for quantity, _ in zip(array, range(scalar_rows))] for array in inputs]
+
+    start = time.perf_counter()
+    for row in zip(*scalar_inputs):
+        drag(*row)
+    scalar_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    drag(*inputs)
+    array_elapsed = time.perf_counter() - start
+
+    compiled = compile_formula(drag, [None, kg / m ** 3, m ** 2, m / s])
+    compiled(*inputs)  # генерация кода не входит в замер
+    start = time.perf_counter()
+    compiled(*inputs)
+    compiled_elapsed = time.perf_counter() - start
+
+    return {
+        "quantity_rows_per_sec": scalar_rows / scalar_elapsed,
+        "array_rows_per_sec": rows / array_elapsed,
+        "compiled_rows_per_sec": rows / compiled_elapsed,
+    }
+
+
+def bench_error_propagation(rows: int = 1_000_000) -> dict[str, float]:
+    """Погрешность F = m * a для rows значений: Decimal-цикл Quantity против якобиана и Монте-Карло (строк/с)"""
+    import numpy as np
+
+    from bestsupport_units_tests.quantity_array import QuantityArray
+    from bestsupport_units_tests.quantity_compile import compile_formula
+
+    masses = QuantityArray(np.linspace(1.0, 100.0, rows), kg, 0.1)
+    accelerations = QuantityArray(np.full(rows, 9.81), m / s ** 2, 0.01)
+    force = compile_formula(lambda mass, acc: mass * acc, [kg, m / s ** 2])
+
+    scalar_rows = min(rows, 10_000)
+    scalar_masses = [Quantity(value, kg, error=0.1) for value in masses.values[:scalar_rows].tolist()]
+    acc = Quantity(9.81, m / s ** 2, error=0.01)
+    start = time.perf_counter()
+    for mass in scalar_masses:
+        mass * acc
+    scalar_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    force.propagate(masses, accelerations)
+    linear_elapsed = time.perf_counter() - start
+
+    mc_rows = min(rows, 10_000)
+    start = time.perf_counter()
+    force.propagate(masses[:mc_rows], accelerations[:mc_rows], method="monte_carlo", draws=1000, rng=0)
+    mc_elapsed = time.perf_counter() - start
+
+    return {
+        "decimal_rows_per_sec": scalar_rows / scalar_elapsed,
+        "linear_rows_per_sec": rows / linear_elapsed,
+        "monte_carlo_rows_per_sec": mc_rows / mc_elapsed,
+    }
+
+
+def bench_formatting(rows: int = 100_000) -> dict[str, float]:
+    """Вывод колонки величин: str() каждой Quantity против format_quantities (строк/с)"""
+    from bestsupport_units_tests.units_format import format_quantities
+
+    quantities = [Quantity(index % 100, kg * m / s ** 2, error=0.1, numeric_backend="float") for index in range(rows)]
+
+    start = time.perf_counter()
+    "\n".join(str(quantity) for quantity in quantities)
+    str_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    format_quantities(quantities)
+    bulk_elapsed = time.perf_counter() - start
+
+    return {"str_rows_per_sec": rows / str_elapsed, "bulk_rows_per_sec": rows / bulk_elapsed}
+
+
+def bench_best_unit(number: int = BENCH_NUMBER // 10) -> dict[str, float]:
+    """Подбор единицы вывода: одна величина (нс/операцию) и колонка из 10^6 значений (значений/с)"""
+    import numpy as np
+
+    from bestsupport_units_tests.units_ladder import best_unit_indices, unit_ladder
+
+    duration = Quantity(5400, s, numeric_backend="float")
+    single_ns = time_per_op(duration.best_unit, number)
+
+    values = np.geomspace(1e-9, 1e9, 1_000_000)
+    ladder = unit_ladder(s)
+    start = time.perf_counter()
+    best_unit_indices(ladder, values)
+    column_elapsed = time.perf_counter() - start
+
+    return {"single_ns": single_ns, "column_values_per_sec": values.size / column_elapsed}
+
+
+def bench_binary_io(rows: int = 1_000_000) -> dict[str, float]:
+    """Сохранение и чтение колонки: pickle списка Quantity против колоночного формата (строк/с, байт/строку)"""
+    import pickle
+
+    import numpy as np
+
+    from bestsupport_units_tests.quantity_array import QuantityArray
+    from bestsupport_units_tests.quantity_binary import save_quantities, load_quantity_array
+
+    array = QuantityArray(np.linspace(0.0, 1.0, rows), m / s, 0.01)
+    pickled_rows = min(rows, 50_000)
+    quantities = array[:pickled_rows].to_quantities()
+
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path = os.path.join(directory, "quantities.pickle")
+        binary_path = os.path.join(directory, "quantities.bsq")
+
+        start = time.perf_counter()
+        with open(pickle_path, "wb") as file:
+            pickle.dump(quantities, file)
+        with open(pickle_path, "rb") as file:
+            pickle.load(file)
+        pickle_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        save_quantities(binary_path, array)
+        loaded = load_quantity_array(binary_path)
+        float(loaded.values.sum())  # чтение всех страниц memmap
+        binary_elapsed = time.perf_counter() - start
+
+        result = {
+            "pickle_rows_per_sec": pickled_rows / pickle_elapsed,
+            "binary_rows_per_sec": rows / binary_elapsed,
+            "pickle_bytes_per_row": os.path.getsize(pickle_path) / pickled_rows,
+            "binary_bytes_per_row": os.path.getsize(binary_path) / rows,
+        }
+        del loaded
+
+    return result
+
+
+def bench_parallel_formula(rows: int = 4_000_000, workers: int = 4) -> dict[str, float]:
+    """0.5*m*v^2.5 с погрешностями: скомпилированная формула в одном процессе и evaluate_parallel (строк/с)"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    import numpy as np
+
+    from bestsupport_units_tests.quantity_array import QuantityArray
+    from bestsupport_units_tests.quantity_compile import compile_formula
+    from bestsupport_units_tests.quantity_parallel import evaluate_parallel
+
+    rng = np.random.default_rng(0)
+    masses = QuantityArray(rng.uniform(1, 2, rows), kg, np.full(rows, 0.01))
+    speeds = QuantityArray(rng.uniform(1, 2, rows), m / s, np.full(rows, 0.01))
+    formula = compile_formula(lambda mass, speed: 0.5 * mass * speed ** 2.5, [kg, m / s])
+
+    start = time.perf_counter()
+    formula(masses, speeds)
+    single = time.perf_counter() - start
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        evaluate_parallel(formula, masses[:1 << 16], speeds[:1 << 16], executor=executor, workers=workers)  # запуск воркеров
+        start = time.perf_counter()
+        evaluate_parallel(formula, masses, speeds, executor=executor, workers=workers)
+        parallel = time.perf_counter() - start
+
+    return {"single_rows_per_sec": rows / single, "parallel_rows_per_sec": rows / parallel}
+
+
+def bench_quantity_stream(rows: int = 200_000) -> dict[str, float]:
+    """Потоковый разбор синтетического CSV вида '9.81 м/с^2 ± 0.01' (строк/с)"""
+    units = ["м/с^2"] * 9 + ["км/ч"]
+
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", encoding="utf-8", delete=False) as file:
+        file.write("time,reading\n")
+        for index in range(rows):
+            # Единицы меняются блоками, как в реальных логах
+            file.write(f"{index},{9.81 + index % 7 * 0.01:.2f} {units[index // 1000 % 10]} ± 0.01\n")
+        path = file.name
+
+    try:
+        start = time.perf_counter()
+        count = sum(1 for _ in iter_quantities(path, column="reading"))
+        quantities_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = sum(len(batch) for batch in iter_quantity_batches(path, column="reading"))
+        batches_elapsed = time.perf_counter() - start
+    finally:
+        os.remove(path)
+
+    assert count == batched == rows
+    return {"quantities_rows_per_sec": rows / quantities_elapsed, "batches_rows_per_sec": rows / batches_elapsed}
+
+
+def bench_unit_table_startup(repeat: int = 20) -> dict[str, float]:
+    """Сборка таблицы обозначений единиц при старте: развёртывание приставок против чтения файла кэша (мс)"""
+    from bestsupport_units_tests.units_registry import default_registry
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, "units_table.marshal")
+        default_registry().freeze(cache_path)  # первый запуск пишет файл
+
+        # Реестр создаётся внутри замера: при старте библиотеки он тоже собирается заново
+        result = {
+            "rebuild_ms": min(timeit.repeat(lambda: default_registry().freeze(), number=1, repeat=repeat)) * 1e3,
+            "cached_ms": min(timeit.repeat(lambda: default_registry().freeze(cache_path),
+                                           number=1, repeat=repeat)) * 1e3,
+        }
+    return result
+
+
+def bench_group_reductions(rows: int = 100_000) -> dict[str, float]:
+    """Суммы по размерностям разнородного списка: цикл Quantity.__add__ против group_by_dimension (строк/с)"""
+    from bestsupport_units_tests.quantity_groups import summarize_by_dimension
+
+    units = ["кг", "т", "м", "км", "с", "мс"]
+    quantities = [Quantity(1 + index % 100, units[index % len(units)], error=0.1) for index in range(rows)]
+
+    start = time.perf_counter()
+    totals: dict = {}
+    for quantity in quantities:
+        total = totals.get(quantity.measure)
+        totals[quantity.measure] = quantity if total is None else total + quantity
+    loop_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    summaries = summarize_by_dimension(quantities)
+    grouped_elapsed = time.perf_counter() - start
+
+    assert len(summaries) == len(totals)
+    return {"loop_rows_per_sec": rows / loop_elapsed, "grouped_rows_per_sec": rows / grouped_elapsed}
+
+
+def measure_import_time(module: str = "bestsupport_units_tests.quantity") -> tuple[int, set[str]]:
+    """Холодный импорт в отдельном процессе (python -X importtime): (суммарное время в мкс, загруженные модули)"""
+    code = f"import sys, {module}; print(','.join(sys.modules))"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, env=env, check=True)
+
+    # Строки вида "import time:       self |  cumulative | module"
+    cumulative_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, self_us, cumulative, name = line.split("|")[0].split(":") + line.split("|")[1:]
+        if name.strip() == module:
+            cumulative_us = int(cumulative)
+
+    return cumulative_us, set(result.stdout.strip().split(","))
+
+
+def print_results(title: str, results: dict[str, dict[str, float]], baseline: str) -> None:
+    print(f"{title} (нс/операция):")
+    for name, ops in results.items():
+        for op, ns in ops.items():
+            speedup = results[baseline][op] / ns
+            print(f"  {name:>8} {op:>10}: {ns:9.1f} нс  (x{speedup:.1f} к {baseline})")
+
+
+if __name__ == "__main__":
+    print_results("Бэкенды размерности UnitBase", bench_dim_backends(), "numpy")
+    for count, sparse in bench_sparse_dims().items():
+        print(f"{count} базовых размерностей: сложение {sparse['dense_add_ns']:.0f} / {sparse['sparse_add_ns']:.0f} нс, "
+              f"степень {sparse['dense_pow_ns']:.0f} / {sparse['sparse_pow_ns']:.0f} нс, "
+              f"хэш {sparse['dense_hash_ns']:.0f} / {sparse['sparse_hash_ns']:.0f} нс, "
+              f"{sparse['dense_bytes']:.0f} / {sparse['sparse_bytes']:.0f} байт (tuple / sparse)")
+    print_results("Числовые бэкенды Quantity", bench_numeric_backends(), "decimal")
+    print(f"F = m * a: {bench_chained_expression()['pairs_per_sec']:.0f} пар/с")
+    dispatch = bench_numpy_dispatch()
+    print(f"np.sum(np.multiply(m, a)): {dispatch['object_rows_per_sec']:.0f} строк/с (object-массив Quantity), "
+          f"{dispatch['array_rows_per_sec']:.0f} строк/с (QuantityArray)")
+    drag = bench_compiled_formula()
+    print(f"0.5*C*p*S*v^2: {drag['quantity_rows_per_sec']:.0f} строк/с (Quantity), "
+          f"{drag['array_rows_per_sec']:.0f} строк/с (QuantityArray), "
+          f"{drag['compiled_rows_per_sec']:.0f} строк/с (скомпилированная)")
+    propagation = bench_error_propagation()
+    print(f"Погрешность F = m * a: {propagation['decimal_rows_per_sec']:.0f} строк/с (Decimal), "
+          f"{propagation['linear_rows_per_sec']:.0f} строк/с (якобиан), "
+          f"{propagation['monte_carlo_rows_per_sec']:.0f} строк/с (Монте-Карло, 1000 выборок)")
+    formatting = bench_formatting()
+    print(f"Вывод величин: {formatting['str_rows_per_sec']:.0f} строк/с (str), "
+          f"{formatting['bulk_rows_per_sec']:.0f} строк/с (format_quantities)")
+    best = bench_best_unit()
+    print(f"best_unit: {best['single_ns']:.0f} нс/величину, {best['column_values_per_sec']:.0f} значений/с (колонка)")
+    binary = bench_binary_io()
+    print(f"Сохранение+чтение: {binary['pickle_rows_per_sec']:.0f} строк/с ({binary['pickle_bytes_per_row']:.0f} байт, "
+          f"pickle), {binary['binary_rows_per_sec']:.0f} строк/с ({binary['binary_bytes_per_row']:.0f} байт, колонки)")
+    startup = bench_unit_table_startup()
+    print(f"Таблица обозначений единиц: {startup['rebuild_ms']:.2f} мс (развёртывание), "
+          f"{startup['cached_ms']:.2f} мс (файл кэша)")
+    grouped = bench_group_reductions()
+    print(f"Суммы по размерностям: {grouped['loop_rows_per_sec']:.0f} строк/с (Quantity.__add__), "
+          f"{grouped['grouped_rows_per_sec']:.0f} строк/с (summarize_by_dimension)")
+    import_us, _ = measure_import_time()
+    print(f"Холодный импорт quantity: {import_us / 1000:.1f} мс")
+    stream = bench_quantity_stream()
+    print(f"Потоковый разбор: {stream['quantities_rows_per_sec']:.0f} строк/с (Quantity), "
+          f"{stream['batches_rows_per_sec']:.0f} строк/с (QuantityArray)")
+    parallel = bench_parallel_formula()
+    print(f"0.5*m*v^2.5 (4 процесса): {parallel['single_rows_per_sec']:.0f} строк/с (один процесс), "
+          f"{parallel['parallel_rows_per_sec']:.0f} строк/с (evaluate_parallel)")
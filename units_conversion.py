@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import NamedTuple, Any, Mapping, Optional
+
+from bestsupport_units_tests.config import UNIT_PARSE_CACHE_SIZE
+from bestsupport_units_tests.units_lib import UnitBase
+from bestsupport_units_tests.units_parsing import parse_unit_str, clean_unit_str
+from bestsupport_units_tests.units_registry import ParsedUnit, RegistrySnapshot, get_default_units
+
+# Перевод единиц по снимку реестра (units_registry): символ (с приставкой) -> (размерность, множитель в СИ).
+# Quantity хранит значения в СИ, поэтому перевод - это одно деление на закэшированный множитель
+
+
+class ConvertedQuantity(NamedTuple):
+    value: Any  # число бэкенда Quantity или ndarray для QuantityArray
+    error: Any
+    unit: str
+
+    def __str__(self) -> str:
+        # У массивов погрешностей истинность проверяется через any()
+        has_error = self.error is not None and (self.error.any() if hasattr(self.error, "any") else bool(self.error))
+        if not has_error:
+            return f"{self.value} {self.unit}"
+        return f"{self.value} ± {self.error} {self.unit}"
+
+
+def get_conversion_index(units: Optional[RegistrySnapshot] = None) -> Mapping[str, tuple[int, float]]:
+    """Символ -> (номер размерности в units.dimensions, множитель в СИ) снимка реестра"""
+    return (get_default_units() if units is None else units).index
+
+
+def resolve_unit(unit: str, units: Optional[RegistrySnapshot] = None) -> ParsedUnit:
+    # Простые обозначения берутся из плоской таблицы снимка напрямую, составные ("км/ч") - через парсер
+    parsed = (get_default_units() if units is None else units).symbols.get(clean_unit_str(unit))
+    if parsed is not None:
+        return parsed
+    return parse_unit_str(unit, units)
+
+
+@lru_cache(maxsize=UNIT_PARSE_CACHE_SIZE)
+def conversion_factor(from_unit: str, to_unit: str, units: Optional[RegistrySnapshot] = None) -> float:
+    from_measure, from_factor = resolve_unit(from_unit, units)
+    to_measure, to_factor = resolve_unit(to_unit, units)
+
+    if from_measure is not to_measure:
+        raise ValueError(f"Несовместимые единицы: '{from_unit}' ({from_measure}) и '{to_unit}' ({to_measure})")
+    return from_factor / to_factor
+
+
+def convert(values: Any, from_unit: str, to_unit: str, units: Optional[RegistrySnapshot] = None) -> Any:
+    """Перевод числа или целого массива значений из одних единиц в другие"""
+    return values * conversion_factor(from_unit, to_unit, units)
+
+
+def si_factor(measure: UnitBase, unit: str, units: Optional[RegistrySnapshot] = None) -> float:
+    """Множитель единицы unit в СИ с проверкой, что её размерность совпадает с measure"""
+    unit_measure, factor = resolve_unit(unit, units)
+    if unit_measure is not measure:
+        raise ValueError(f"Cannot convert {measure} to '{unit}' ({unit_measure})")
+    return factor
+
+
+def from_si(values: Any, errors: Optional[Any], measure: UnitBase, unit: str,
+            units: Optional[RegistrySnapshot] = None) -> ConvertedQuantity:
+    factor = si_factor(measure, unit, units)
+    if errors is None:
+        return ConvertedQuantity(values / factor, None, unit)
+    return ConvertedQuantity(values / factor, errors / factor, unit)
@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import operator
+from decimal import Decimal
+from fractions import Fraction
+from numbers import Integral
+from typing import Any, Hashable, Iterator, Mapping, Sequence, Union, TypeAlias, TYPE_CHECKING
+
+from bestsupport_units_tests.config import DIM_MAX_DENOMINATOR, DIM_EXPONENT_TOLERANCE
+from bestsupport_units_tests.units_list import LEN_DIM, UNITS_INDEXES
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+
+# Бэкенды хранения вектора размерности UnitBase.
+# Каждый бэкенд умеет: построить вектор из входных данных (+ ключ для интернирования),
+# сложить/вычесть два вектора, умножить вектор на степень, проверить на нулевой вектор.
+
+EXPONENT_UNION: TypeAlias = Union[int, Fraction]
+# Ключ базовой размерности: номер встроенной (0..LEN_DIM-1, порядок units_list) или обозначение добавленной.
+# Добавленные размерности (валюта, штуки, пиксели, запросы) объявляет UnitRegistry.register_base_dimension,
+# а в векторе они называются своим обозначением - общего для процесса списка номеров нет.
+# Такие размерности поддерживает только разреженный бэкенд
+DIM_KEY: TypeAlias = Union[int, str]
+
+
+def to_exponent(value: Any) -> EXPONENT_UNION:
+    """Точный показатель степени: int или несократимая Fraction.
+
+    float/Decimal приводятся к ближайшей дроби со знаменателем не больше DIM_MAX_DENOMINATOR
+    (0.1 + 0.2 -> 3/10, Decimal("0.333333") -> 1/3), поэтому равенство и хэш размерностей точные.
+    """
+    if type(value) is int:
+        return value
+    if isinstance(value, Integral):
+        return int(value)
+    if isinstance(value, Fraction):
+        return value.numerator if value.denominator == 1 else value
+    if isinstance(value, (float, Decimal)) or hasattr(value, "is_integer"):
+        if float(value).is_integer():
+            return int(value)
+
+        exact = Fraction(value)
+        rational = exact.limit_denominator(DIM_MAX_DENOMINATOR)
+        # Decimal округлён до своих знаков (при prec = 6 1/3 - это 0.333333): допуск - единица последнего знака
+        tolerance = DIM_EXPONENT_TOLERANCE
+        if isinstance(value, Decimal):
+            tolerance = max(tolerance, Fraction(1, 10 ** -value.as_tuple().exponent))
+        if abs(rational - exact) > tolerance:
+            raise ValueError(f"Exponent {value} is not close to a rational with denominator <= {DIM_MAX_DENOMINATOR}")
+        return rational.numerator if rational.denominator == 1 else rational
+
+    raise TypeError(f"Exponent must be numeric, got {type(value)}")
+
+
+def base_dimension_key(dim: DIM_KEY) -> DIM_KEY:
+    """Ключ базовой размерности: номер встроенной ("м" -> 0) или обозначение добавленной ("шт" -> "шт")"""
+    if isinstance(dim, str):
+        if not dim:
+            raise ValueError("Base dimension symbol must not be empty")
+        return UNITS_INDEXES.index(dim) if dim in UNITS_INDEXES else dim
+    if isinstance(dim, Integral) and 0 <= dim < LEN_DIM:
+        return int(dim)
+    raise ValueError(f"Unknown base dimension {dim!r}")
+
+
+def base_dimension_symbol(key: DIM_KEY) -> str:
+    return UNITS_INDEXES[key] if isinstance(key, int) else key
+
+
+def dim_key_order(key: DIM_KEY) -> tuple[bool, DIM_KEY]:
+    # Встроенные размерности по номеру, за ними добавленные по обозначению
+    return isinstance(key, str), key
+
+
+def dim_items(dim: Sequence) -> tuple[tuple[DIM_KEY, EXPONENT_UNION], ...]:
+    """Ненулевые показатели вектора любого бэкенда: ((ключ базовой размерности, показатель), ...)"""
+    if isinstance(dim, SparseDim):
+        return dim.pairs
+    if hasattr(dim, "tolist"):
+        dim = dim.tolist()
+    return tuple((dim_id, to_exponent(exponent)) for dim_id, exponent in enumerate(dim) if exponent)
+
+
+def _dense_from_mapping(init_dim: Mapping) -> list:
+    # Словарь {номер или обозначение: показатель} для плотных бэкендов: только встроенные размерности
+    dense = [0] * LEN_DIM
+    for dim, exponent in init_dim.items():
+        key = base_dimension_key(dim)
+        if isinstance(key, str):
+            raise ValueError(f"Base dimension '{key}' requires UNIT_DIM_BACKEND = 'sparse'")
+        dense[key] = exponent
+    return dense
+
+
+class NumpyDimBackend:
+    # NumPy импортируется только при построении векторов: операции используют методы самих ndarray
+    name = "numpy"
+
+    @staticmethod
+    def zero() -> ndarray:
+        import numpy
+
+        return numpy.zeros(LEN_DIM)
+
+    @staticmethod
+    def make(init_dim: Union[Sequence, Mapping]) -> tuple[ndarray, Hashable]:
+        import numpy
+
+        if isinstance(init_dim, Mapping):
+            init_dim = _dense_from_mapping(init_dim)
+        if isinstance(init_dim, numpy.ndarray):
+            if init_dim.shape != (LEN_DIM,):
+                raise ValueError("Init dim doesn't shape")
+        elif len(init_dim) != LEN_DIM:
+            raise ValueError("Init dim doesn't shape")
+
+        return NumpyDimBackend.from_result(numpy.asarray(init_dim, dtype=numpy.float64))
+
+    @staticmethod
+    def from_result(dim: ndarray) -> tuple[ndarray, Hashable]:
+        import numpy
+
+        # Ключ - те же точные показатели, что у tuple-бэкенда: 0.1 + 0.2 и 0.3 дают одну размерность,
+        # а сам вектор округляется до этих показателей, чтобы ошибка не накапливалась в цепочках операций
+        key = tuple(map(to_exponent, dim.tolist()))
+        dim = numpy.array([float(exponent) for exponent in key])
+        dim.setflags(write=False)
+        return dim, key
+
+    @staticmethod
+    def add(dim1: ndarray, dim2: ndarray) -> ndarray:
+        return dim1 + dim2
+
+    @staticmethod
+    def sub(dim1: ndarray, dim2: ndarray) -> ndarray:
+        return dim1 - dim2
+
+    @staticmethod
+    def scale(dim: ndarray, power: Any) -> ndarray:
+        return dim * float(power)
+
+    @staticmethod
+    def neg(dim: ndarray) -> ndarray:
+        return -dim
+
+    @staticmethod
+    def is_zero(dim: ndarray) -> bool:
+        return not dim.any()
+
+
+class TupleDimBackend:
+    # Неизменяемый tuple из int (или Fraction для дробных степеней): без накладных расходов NumPy
+    name = "tuple"
+
+    @staticmethod
+    def zero() -> tuple[EXPONENT_UNION, ...]:
+        return (0,) * LEN_DIM
+
+    @staticmethod
+    def make(init_dim: Union[Sequence, Mapping]) -> tuple[tuple[EXPONENT_UNION, ...], Hashable]:
+        if isinstance(init_dim, Mapping):
+            init_dim = _dense_from_mapping(init_dim)
+        if len(init_dim) != LEN_DIM:
+            raise ValueError("Init dim doesn't shape")
+
+        if hasattr(init_dim, "tolist"):
+            # ndarray: tolist() сразу даёт int вместо numpy.int64
+            init_dim = init_dim.tolist()
+
+        dim = tuple(map(to_exponent, init_dim))
+        return dim, dim
+
+    @staticmethod
+    def from_result(dim: tuple) -> tuple[tuple, Hashable]:
+        # Fraction(2, 1) == 2 и hash(Fraction(2, 1)) == hash(2), так что ключ не требует нормализации
+        return dim, dim
+
+    @staticmethod
+    def add(dim1: tuple, dim2: tuple) -> tuple:
+        return tuple(map(operator.add, dim1, dim2))
+
+    @staticmethod
+    def sub(dim1: tuple, dim2: tuple) -> tuple:
+        return tuple(map(operator.sub, dim1, dim2))
+
+    @staticmethod
+    def scale(dim: tuple, power: Any) -> tuple:
+        power = to_exponent(power)
+        if isinstance(power, int):
+            return tuple([dim_power * power for dim_power in dim])
+        return tuple([to_exponent(dim_power * power) for dim_power in dim])
+
+    @staticmethod
+    def neg(dim: tuple) -> tuple:
+        return tuple(map(operator.neg, dim))
+
+    @staticmethod
+    def is_zero(dim: tuple) -> bool:
+        return not any(dim)
+
+
+class SparseDim(Sequence):
+    """Разреженный вектор размерности: пары (ключ базовой размерности, показатель) с ненулевыми показателями.
+
+    Как последовательность - плотный вектор встроенных размерностей длины LEN_DIM (как у tuple-бэкенда).
+    Добавленные размерности в него не входят: полный вектор - items() или dim_items().
+    """
+    __slots__ = ("pairs",)
+
+    def __init__(self, pairs: tuple[tuple[DIM_KEY, EXPONENT_UNION], ...] = ()) -> None:
+        self.pairs = pairs  # отсортированы по dim_key_order
+
+    def __len__(self) -> int:
+        return LEN_DIM
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Dimension index out of range")
+        for dim_id, exponent in self.pairs:
+            if dim_id == index:
+                return exponent
+        return 0
+
+    def __iter__(self) -> Iterator[EXPONENT_UNION]:
+        dense = [0] * LEN_DIM
+        for dim_id, exponent in self.pairs:
+            if isinstance(dim_id, int):
+                dense[dim_id] = exponent
+        return iter(dense)
+
+    def items(self) -> tuple[tuple[DIM_KEY, EXPONENT_UNION], ...]:
+        return self.pairs
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, SparseDim):
+            return self.pairs == other.pairs
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.pairs)
+
+    def __reduce__(self):
+        return SparseDim, (self.pairs,)
+
+    def __repr__(self) -> str:
+        return f"SparseDim({self.pairs})"
+
+
+def _merge_pairs(pairs1: tuple, pairs2: tuple, sign: int) -> tuple:
+    # Сумма (sign = 1) или разность (sign = -1) разреженных векторов; нулевые показатели выбрасываются
+    if not pairs2:
+        return pairs1
+    merged = dict(pairs1)
+    for dim_id, exponent in pairs2:
+        exponent = merged.get(dim_id, 0) + sign * exponent
+        if exponent:
+            merged[dim_id] = exponent
+        else:
+            merged.pop(dim_id, None)
+    return tuple(sorted(merged.items(), key=lambda pair: dim_key_order(pair[0])))
+
+
+class SparseDimBackend:
+    # Хранятся только ненулевые показатели: память и время операций зависят от числа размерностей
+    # в единице, а не от числа базовых размерностей (десятки-сотни доменных размерностей)
+    name = "sparse"
+
+    @staticmethod
+    def zero() -> SparseDim:
+        return SparseDim()
+
+    @staticmethod
+    def make(init_dim: Union[Sequence, Mapping]) -> tuple[SparseDim, Hashable]:
+        """Из плотного вектора встроенных размерностей, SparseDim или словаря {номер или обозначение: показатель}.
+
+        Обозначение, которого нет среди встроенных, - добавленная базовая размерность ("шт", "руб").
+        """
+        if isinstance(init_dim, SparseDim):
+            return SparseDimBackend.from_result(init_dim.pairs)
+
+        if isinstance(init_dim, Mapping):
+            exponents: dict[DIM_KEY, Any] = {}
+            for dim, exponent in init_dim.items():
+                key = base_dimension_key(dim)
+                if key in exponents:
+                    raise ValueError(f"Base dimension {dim!r} is given twice")
+                exponents[key] = exponent
+            items = exponents.items()
+        else:
+            if hasattr(init_dim, "tolist"):
+                init_dim = init_dim.tolist()
+            if len(init_dim) != LEN_DIM:
+                raise ValueError("Init dim doesn't shape")
+            items = enumerate(init_dim)
+
+        pairs = []
+        for key, exponent in items:
+            exponent = to_exponent(exponent)
+            if exponent:
+                pairs.append((key, exponent))
+        return SparseDimBackend.from_result(tuple(sorted(pairs, key=lambda pair: dim_key_order(pair[0]))))
+
+    @staticmethod
+    def from_result(pairs: tuple) -> tuple[SparseDim, Hashable]:
+        return SparseDim(pairs), pairs
+
+    @staticmethod
+    def add(dim1: SparseDim, dim2: SparseDim) -> tuple:
+        return _merge_pairs(dim1.pairs, dim2.pairs, 1)
+
+    @staticmethod
+    def sub(dim1: SparseDim, dim2: SparseDim) -> tuple:
+        return _merge_pairs(dim1.pairs, dim2.pairs, -1)
+
+    @staticmethod
+    def scale(dim: SparseDim, power: Any) -> tuple:
+        power = to_exponent(power)
+        if not power:
+            return ()
+        if isinstance(power, int):
+            return tuple([(dim_id, exponent * power) for dim_id, exponent in dim.pairs])
+        return tuple([(dim_id, to_exponent(exponent * power)) for dim_id, exponent in dim.pairs])
+
+    @staticmethod
+    def neg(dim: SparseDim) -> tuple:
+        return tuple([(dim_id, -exponent) for dim_id, exponent in dim.pairs])
+
+    @staticmethod
+    def is_zero(dim: SparseDim) -> bool:
+        return not dim.pairs
+
+
+DIM_BACKENDS = {
+    NumpyDimBackend.name: NumpyDimBackend,
+    TupleDimBackend.name: TupleDimBackend,
+    SparseDimBackend.name: SparseDimBackend,
+}
+
+
+def get_dim_backend(name: str):
+    if name not in DIM_BACKENDS:
+        raise ValueError(f"Unknown dimension backend {name} (available: {', '.join(DIM_BACKENDS)})")
+    return DIM_BACKENDS[name]
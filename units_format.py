@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from fractions import Fraction
+from operator import itemgetter
+from typing import Any, Callable, Iterable, Literal, Optional, Sequence, TextIO, TypeAlias
+
+from bestsupport_units_tests.config import MULTIPLY_SIGN, POWER_SIGN, DIMENSIONLESS_STR, SORT_MEASURES_BY_DIM_POWER, \
+    SUPERSCRIPT_POWERS
+from bestsupport_units_tests.units_dim import base_dimension_symbol, dim_items
+
+# Отрисовка единиц и величин в строки.
+# Строка единицы зависит только от вектора размерности (UnitBase интернирован), стиля и знаков,
+# поэтому считается один раз и дальше берётся из кэша
+
+UNIT_STYLES: TypeAlias = Literal["plain", "superscript", "latex"]
+DEFAULT_UNIT_STYLE: UNIT_STYLES = "superscript" if SUPERSCRIPT_POWERS else "plain"
+
+SUPERSCRIPT_DIGITS = str.maketrans("0123456789-", "⁰¹²³⁴⁵⁶⁷⁸⁹⁻")
+
+WRITE_CHUNK_ROWS = 1 << 14
+
+_RENDER_CACHE: dict[tuple, str] = {}
+
+
+def _unit_powers(cur_dim: Sequence) -> list[tuple[str, Any]]:
+    # (обозначение базовой единицы, степень) без нулевых степеней в порядке вывода
+    # Встроенные размерности по номеру, за ними добавленные (только у разреженного вектора) по обозначению
+    powers = [(base_dimension_symbol(key), dim) for key, dim in dim_items(cur_dim)]
+    if SORT_MEASURES_BY_DIM_POWER:
+        powers.sort(key=itemgetter(1), reverse=True)
+    return powers
+
+
+def _plain_power(dim: Any, power_sign: str) -> str:
+    if dim < 0 or isinstance(dim, Fraction):
+        return f"{power_sign}({dim})"
+    if dim == 1:
+        return ""
+    return f"{power_sign}{dim}"
+
+
+def _superscript_power(dim: Any, power_sign: str) -> str:
+    # Дробные степени надстрочными символами не записать - остаются в виде ^(1/2)
+    if isinstance(dim, Fraction):
+        return f"{power_sign}({dim})"
+    if dim == 1:
+        return ""
+    return str(dim).translate(SUPERSCRIPT_DIGITS)
+
+
+def _render_text(cur_dim: Sequence, multiply_sign: str, power_sign: str,
+                 format_power: Callable[[Any, str], str]) -> str:
+    powers = _unit_powers(cur_dim)
+    if not powers:
+        return DIMENSIONLESS_STR
+    return multiply_sign.join(f"{symbol}{format_power(dim, power_sign)}" for symbol, dim in powers)
+
+
+def render_plain(cur_dim: Sequence, multiply_sign: str, power_sign: str) -> str:
+    return _render_text(cur_dim, multiply_sign, power_sign, _plain_power)
+
+
+def render_superscript(cur_dim: Sequence, multiply_sign: str, power_sign: str) -> str:
+    return _render_text(cur_dim, multiply_sign, power_sign, _superscript_power)
+
+
+def render_latex(cur_dim: Sequence, multiply_sign: str, power_sign: str) -> str:
+    # Знаки из конфига в LaTeX не используются: умножение - \cdot, степень - ^{...}
+    return r"\cdot ".join(
+        rf"\mathrm{{{symbol}}}" + ("" if dim == 1 else f"^{{{dim}}}")
+        for symbol, dim in _unit_powers(cur_dim)
+    )
+
+
+UNIT_RENDERERS: dict[str, Callable[[Sequence, str, str], str]] = {
+    "plain": render_plain,
+    "superscript": render_superscript,
+    "latex": render_latex,
+}
+
+
+def render_unit(unit: Any, style: UNIT_STYLES = DEFAULT_UNIT_STYLE, multiply_sign: str = MULTIPLY_SIGN,
+                power_sign: str = POWER_SIGN) -> str:
+    """Строка единицы UnitBase; кэшируется по (единица, стиль, знаки)"""
+    key = (unit, style, multiply_sign, power_sign)
+    rendered = _RENDER_CACHE.get(key)
+    if rendered is None:
+        renderer = UNIT_RENDERERS.get(style)
+        if renderer is None:
+            raise ValueError(f"Unknown unit style {style} (available: {', '.join(UNIT_RENDERERS)})")
+        rendered = _RENDER_CACHE[key] = renderer(unit.cur_dim, multiply_sign, power_sign)
+    return rendered
+
+
+def _measure_suffix(measure: Any, style: UNIT_STYLES) -> str:
+    if measure.is_dimensionless():
+        return ""
+    if style == "latex":
+        return r"\," + render_unit(measure, style)
+    return " " + render_unit(measure, style)
+
+
+def _error_sign(style: UNIT_STYLES) -> str:
+    return r" \pm " if style == "latex" else " ± "
+
+
+def format_quantity(quantity: Any, style: UNIT_STYLES = DEFAULT_UNIT_STYLE) -> str:
+    """Строка одной Quantity в формате Quantity.__str__ (погрешность опускается, если она нулевая)"""
+    error_str = f"{_error_sign(style)}{quantity.error}" if quantity.error else ""
+    return f"{quantity.value}{error_str}{_measure_suffix(quantity.measure, style)}"
+
+
+def _iter_quantity_lines(quantities: Iterable[Any], style: UNIT_STYLES,
+                         value_format: Optional[str]) -> Iterable[str]:
+    suffixes: dict[Any, str] = {}
+    error_sign = _error_sign(style)
+    to_str = str if value_format is None else value_format.format
+
+    for quantity in quantities:
+        suffix = suffixes.get(quantity.measure)
+        if suffix is None:
+            suffix = suffixes[quantity.measure] = _measure_suffix(quantity.measure, style)
+
+        values = getattr(quantity, "values", None)
+        if values is None:
+            if quantity.error:
+                yield f"{to_str(quantity.value)}{error_sign}{to_str(quantity.error)}{suffix}"
+            else:
+                yield f"{to_str(quantity.value)}{suffix}"
+            continue
+
+        # QuantityArray: значения перебираются как числа Python, без создания Quantity
+        if quantity.errors is None:
+            yield from (f"{to_str(value)}{suffix}" for value in values.ravel().tolist())
+        else:
+            errors = quantity.errors.ravel().tolist()
+            yield from (f"{to_str(value)}{error_sign}{to_str(error)}{suffix}" if error else f"{to_str(value)}{suffix}"
+                        for value, error in zip(values.ravel().tolist(), errors))
+
+
+def format_quantities(quantities: Iterable[Any], style: UNIT_STYLES = DEFAULT_UNIT_STYLE,
+                      value_format: Optional[str] = None, separator: str = "\n") -> str:
+    """Колонка Quantity/QuantityArray одной строкой-буфером.
+
+    value_format - шаблон для значений и погрешностей (например, "{:.4g}"), по умолчанию str().
+    """
+    return separator.join(_iter_quantity_lines(quantities, style, value_format))
+
+
+def write_quantities(file: TextIO, quantities: Iterable[Any], style: UNIT_STYLES = DEFAULT_UNIT_STYLE,
+                     value_format: Optional[str] = None, chunk_rows: int = WRITE_CHUNK_ROWS) -> int:
+    """Запись колонки в файл блоками по chunk_rows строк; возвращает число строк"""
+    rows = 0
+    chunk: list[str] = []
+    for line in _iter_quantity_lines(quantities, style, value_format):
+        chunk.append(line)
+        if len(chunk) >= chunk_rows:
+            file.write("\n".join(chunk) + "\n")
+            rows += len(chunk)
+            chunk.clear()
+
+    if chunk:
+        file.write("\n".join(chunk) + "\n")
+        rows += len(chunk)
+    return rows
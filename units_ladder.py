@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from functools import cache
+from typing import Any, NamedTuple, Optional
+
+from bestsupport_units_tests.config import BEST_UNIT_PREFIXES, BEST_UNIT_MAX_PREFIX, BEST_UNIT_SPECIAL_UNITS
+from bestsupport_units_tests.units_lib import UnitBase
+from bestsupport_units_tests.units_registry import RegistrySnapshot, UnitDefinition, get_default_units
+
+# "Лестницы" единиц: для каждой размерности - отсортированные множители единиц вывода (мм, м, км, а.е., ...).
+# Подбор единицы - бинарный поиск модуля значения в СИ: берётся наибольшая единица, в которой значение >= 1
+
+# Запас на погрешность округления: 0.001 м должен попасть в мм, даже если получен как 1 / 1000
+LADDER_TOLERANCE = 1e-9
+
+
+class UnitLadder(NamedTuple):
+    factors: tuple[float, ...]  # множители в СИ по возрастанию
+    symbols: tuple[str, ...]
+
+    def index(self, magnitude: float) -> int:
+        if magnitude == 0:
+            # Нулю подходит любая единица - выводим в единице СИ (или ближайшей к ней)
+            magnitude = 1.0
+        return max(0, bisect_right(self.factors, magnitude * (1 + LADDER_TOLERANCE)) - 1)
+
+
+def _allowed_prefixes(unit: str, definition: UnitDefinition) -> tuple[str, ...]:
+    if not definition.prefixable:
+        return "",
+    max_prefix = BEST_UNIT_MAX_PREFIX.get(unit)
+    if max_prefix is None:
+        return BEST_UNIT_PREFIXES
+    return BEST_UNIT_PREFIXES[:BEST_UNIT_PREFIXES.index(max_prefix) + 1]
+
+
+@cache
+def get_unit_ladders(units: Optional[RegistrySnapshot] = None) -> dict[UnitBase, UnitLadder]:
+    """Лестницы единиц снимка реестра units (по умолчанию - get_default_units())"""
+    if units is None:
+        units = get_default_units()
+    symbols = units.symbols
+    steps: dict[UnitBase, dict[float, str]] = {}
+
+    def add_step(symbol: str, measure: UnitBase) -> None:
+        # Обозначение берётся, только если парсер читает его обратно в ту же размерность ("Тл" - тесла, не тералитр)
+        parsed = symbols.get(symbol)
+        if parsed is None or parsed.measure is not measure:
+            return
+        # Единицы с одинаковым множителем (Гц и Бк): остаётся первая по приоритету таблиц
+        steps.setdefault(measure, {}).setdefault(parsed.factor, symbol)
+
+    for unit, definition in units.units.items():
+        if definition.kind == "special":
+            continue
+        for prefix in _allowed_prefixes(unit, definition):
+            add_step(f"{prefix}{unit}", UnitBase(dict(definition.dim)))
+    for unit in BEST_UNIT_SPECIAL_UNITS:
+        parsed = symbols.get(unit)
+        if parsed is not None:
+            add_step(unit, parsed.measure)
+
+    ladders = {}
+    for measure, measure_steps in steps.items():
+        # Когерентная единица СИ всегда есть на лестнице: объём без неё был бы только в литрах
+        measure_steps.setdefault(1.0, str(measure))
+        factors = sorted(measure_steps)
+        ladders[measure] = UnitLadder(tuple(factors), tuple(measure_steps[factor] for factor in factors))
+    return ladders
+
+
+def unit_ladder(measure: UnitBase, units: Optional[RegistrySnapshot] = None) -> Optional[UnitLadder]:
+    return get_unit_ladders(units).get(measure)
+
+
+def best_unit(measure: UnitBase, magnitude: float, units: Optional[RegistrySnapshot] = None) -> tuple[str, float]:
+    """(обозначение, множитель в СИ) для вывода значения magnitude (в СИ) с размерностью measure"""
+    ladder = unit_ladder(measure, units)
+    if ladder is None:
+        return str(measure), 1.0
+
+    ind = ladder.index(abs(magnitude))
+    return ladder.symbols[ind], ladder.factors[ind]
+
+
+def best_unit_indices(ladder: UnitLadder, magnitudes: Any) -> Any:
+    """Номера ступеней лестницы для массива значений в СИ (поэлементный подбор за один searchsorted)"""
+    import numpy as np
+
+    magnitudes = np.abs(np.asarray(magnitudes, dtype=np.float64))
+    magnitudes = np.where(magnitudes == 0, 1.0, magnitudes)
+    indices = np.searchsorted(np.asarray(ladder.factors), magnitudes * (1 + LADDER_TOLERANCE), side="right") - 1
+    return np.maximum(indices, 0)
+
+
+def column_best_unit(values: Any, measure: UnitBase) -> tuple[str, float]:
+    """Общая единица для колонки значений в СИ: подбирается по медиане модулей ненулевых значений"""
+    import numpy as np
+
+    magnitudes = np.abs(np.asarray(values, dtype=np.float64))
+    magnitudes = magnitudes[magnitudes != 0]
+    return best_unit(measure, float(np.median(magnitudes)) if magnitudes.size else 0.0)
@@ -1,37 +1,79 @@
 from __future__ import annotations
 
 from decimal import Decimal
-from typing import Union, Any, TypeAlias, Optional
+from fractions import Fraction
+from typing import Union, Any, TypeAlias, Optional, Callable, Hashable, Sequence
 
-from numpy import ndarray, array_equal
-from numpy import zeros
-
-from bestsupport_units_tests.config import SORT_MEASURES_BY_DIM_POWER, POWER_SIGN, DIMENSIONLESS_STR, MULTIPLY_SIGN
+from bestsupport_units_tests.config import UNIT_DIM_BACKEND
+from bestsupport_units_tests.units_dim import get_dim_backend, to_exponent
+from bestsupport_units_tests.units_format import render_unit
 from bestsupport_units_tests.units_list import *
 
-NUMERIC_TYPE: TypeAlias = (int, float, Decimal)
-NUMERIC_UNION: TypeAlias = Union[int, float, Decimal]
+NUMERIC_TYPE: TypeAlias = (int, float, Decimal, Fraction)
+NUMERIC_UNION: TypeAlias = Union[int, float, Decimal, Fraction]
+
+DIM_BACKEND = get_dim_backend(UNIT_DIM_BACKEND)
+
+
+def make_zero_dim() -> Sequence:
+    return DIM_BACKEND.zero()
 
 
-def make_zero_dim() -> ndarray:
-    return zeros(LEN_DIM)
+# Таблица интернирования: один неизменяемый UnitBase на каждый вектор размерности
+_INTERNED_UNITS: dict[Hashable, UnitBase] = {}
+# Мемоизация результатов (unit, op, operand) -> UnitBase для mul/div/pow/neg
+_OPERATIONS_CACHE: dict[tuple, UnitBase] = {}
 
 
 class UnitBase:
-    cur_dim: ndarray
+    # Тип cur_dim зависит от бэкенда (config.UNIT_DIM_BACKEND): ndarray, tuple или SparseDim
+    cur_dim: Sequence
 
-    def __init__(self, init_dim: Optional[ndarray] = None) -> None:
+    __slots__ = ("cur_dim", "_hash")
+
+    def __new__(cls, init_dim: Optional[Sequence] = None) -> UnitBase:
         if init_dim is None:
-            self.cur_dim: ndarray = make_zero_dim()
-        else:
-            if init_dim.shape != (LEN_DIM,):
-                raise ValueError("Init dim doesn't shape")
-            self.cur_dim: ndarray = init_dim
+            init_dim = make_zero_dim()
+
+        return cls.__intern__(*DIM_BACKEND.make(init_dim))
+
+    @classmethod
+    def __intern__(cls, dim: Sequence, key: Hashable) -> UnitBase:
+        unit = _INTERNED_UNITS.get(key)
+        if unit is not None:
+            return unit
+
+        unit = super().__new__(cls)
+        unit.cur_dim = dim
+        unit._hash = hash(key)
+        return _INTERNED_UNITS.setdefault(key, unit)
 
-        self.cur_dim.setflags(write=False)
+    def __cached_operation__(self, operation: str, operand: Any,
+                             calc_dim: Callable[[UnitBase, Any], Sequence]) -> UnitBase:
+        key = (self, operation, operand)
+        result = _OPERATIONS_CACHE.get(key)
+        if result is None:
+            result = UnitBase.__intern__(*DIM_BACKEND.from_result(calc_dim(self, operand)))
+            result = _OPERATIONS_CACHE.setdefault(key, result)
+        return result
+
+    def __reduce__(self):
+        return UnitBase, (self.cur_dim,)
+
+    def __array_ufunc__(self, ufunc: Any, method: str, *inputs: Any, **kwargs: Any) -> Any:
+        # ndarray * м -> QuantityArray. Импорт внутри: units_lib не зависит от NumPy и quantity_array
+        from bestsupport_units_tests.quantity_numpy import unit_array_ufunc
+
+        return unit_array_ufunc(ufunc, method, inputs, kwargs)
+
+    def __copy__(self) -> UnitBase:
+        return self
+
+    def __deepcopy__(self, memo: dict) -> UnitBase:
+        return self
 
     def is_dimensionless(self) -> bool:
-        return not self.cur_dim.any()
+        return DIM_BACKEND.is_zero(self.cur_dim)
 
     @staticmethod
     def __check_is_unit__(arg: Any):
@@ -40,44 +82,19 @@ class UnitBase:
         raise TypeError(f"Argument is not UnitBase type (current type: {type(arg)})")
 
     def __hash__(self) -> int:
-        return hash(self.cur_dim.tobytes())
+        return self._hash
 
     def __repr__(self) -> str:
         return f"UnitBase({self.__str__()})"
 
     def __str__(self) -> str:
-        # todo: Добавить в конфиг возможность форматировать степени в виде ² (надстрочные символы)
-        str_dims = []
-
-        enumerated_dim = enumerate(self.cur_dim)
-        if SORT_MEASURES_BY_DIM_POWER:
-            to_for = sorted(enumerated_dim, key=lambda dim_info: dim_info[1], reverse=True)
-        else:
-            to_for = enumerated_dim
-
-        for dim_id, dim in to_for:
-            if dim == 0:
-                continue
-
-            if dim < 0:
-                dim_str = f"{POWER_SIGN}({dim})"
-            elif dim == 1:
-                dim_str = ""
-            else:
-                dim_str = f"{POWER_SIGN}{dim}"
-
-            str_dims.append(f"{UNITS_INDEXES[dim_id]}{dim_str}")
-
-        if not str_dims:
-            return DIMENSIONLESS_STR
-
-        return MULTIPLY_SIGN.join(str_dims)
+        return render_unit(self)
 
     def __add__(self, other: UnitBase) -> UnitBase:
         self.__check_is_unit__(other)
 
-        if self == other:
-            return UnitBase(self.cur_dim)
+        if self is other:
+            return self
         raise ValueError("Addition is impossible with mismatched Units")
 
     def __radd__(self, other: NUMERIC_UNION) -> UnitBase:
@@ -87,13 +104,13 @@ class UnitBase:
         if not self.is_dimensionless():
             raise ValueError(
                 "Addition is impossible with mismatched Units (__radd__, adding with number, but self is not dimensionless)")
-        return UnitBase(self.cur_dim)
+        return self
 
     def __sub__(self, other: UnitBase) -> UnitBase:
         self.__check_is_unit__(other)
 
-        if self == other:
-            return UnitBase(self.cur_dim)
+        if self is other:
+            return self
         raise ValueError("Subtraction is impossible with mismatched Units")
 
     def __rsub__(self, other: NUMERIC_UNION) -> UnitBase:
@@ -103,61 +120,86 @@ class UnitBase:
         if not self.is_dimensionless():
             raise ValueError(
                 "Subtraction is impossible with mismatched Units (__rsub__, subtraction with number, but self is not dimensionless)")
-        return UnitBase(self.cur_dim)
+        return self
 
     def __mul__(self, other: UnitBase) -> UnitBase:
         self.__check_is_unit__(other)
 
-        return UnitBase(self.cur_dim + other.cur_dim)
+        return self.__cached_operation__("mul", other, _mul_dims)
 
     def __rmul__(self, other: NUMERIC_UNION) -> UnitBase:
         if not isinstance(other, NUMERIC_TYPE):
             raise TypeError(f"Multiplier must be numeric in __rmul__, got {type(other)}")
 
-        return UnitBase(self.cur_dim)
+        return self
 
     def __truediv__(self, other: UnitBase) -> UnitBase:
         self.__check_is_unit__(other)
 
-        return UnitBase(self.cur_dim - other.cur_dim)
+        return self.__cached_operation__("div", other, _div_dims)
 
     def __rtruediv__(self, other: NUMERIC_UNION) -> UnitBase:
         if not isinstance(other, NUMERIC_TYPE):
             raise TypeError(f"Multiplier must be numeric in __rtruediv__, got {type(other)}")
 
-        return UnitBase(-self.cur_dim)
+        return -self
 
     def __pow__(self, power: NUMERIC_UNION) -> UnitBase:
         if not isinstance(power, NUMERIC_TYPE):
             raise TypeError(f"Power must be numeric, got {type(power)}")
 
-        return UnitBase(self.cur_dim * power)
+        # Нормализация до ключа кэша: m ** 0.5, m ** Fraction(1, 2) и m ** Decimal("0.5") - одна запись
+        return self.__cached_operation__("pow", to_exponent(power), _pow_dims)
 
     def __rpow__(self, base: UnitBase):
         if self.is_dimensionless():
-            return UnitBase(DIMENSIONLESS)
+            return DIMENSIONLESS
 
         raise TypeError(f"Power cannot be dimensioned Unit")
 
     def __neg__(self) -> UnitBase:
-        return UnitBase(-self.cur_dim)
+        return self.__cached_operation__("neg", None, _neg_dims)
 
     def __eq__(self, other: UnitBase) -> bool:
+        if self is other:
+            return True
         self.__check_is_unit__(other)
 
-        return array_equal(self.cur_dim, other.cur_dim)
+        # Единицы интернированы: равные размерности всегда один и тот же объект
+        return False
 
     def __ne__(self, other: UnitBase) -> bool:
         return not self == other
 
 
+def _mul_dims(unit: UnitBase, other: UnitBase) -> Sequence:
+    return DIM_BACKEND.add(unit.cur_dim, other.cur_dim)
+
+
+def _div_dims(unit: UnitBase, other: UnitBase) -> Sequence:
+    return DIM_BACKEND.sub(unit.cur_dim, other.cur_dim)
+
+
+def _pow_dims(unit: UnitBase, power: NUMERIC_UNION) -> Sequence:
+    return DIM_BACKEND.scale(unit.cur_dim, power)
+
+
+def _neg_dims(unit: UnitBase, _: None) -> Sequence:
+    return DIM_BACKEND.neg(unit.cur_dim)
+
+
+# Обозначение -> вектор размерности одной таблицей; при совпадении обозначений приоритет базовых, затем составных
+_UNIT_DIMS = {
+    **{unit: dim for unit, (dim, _) in SPECIAL_UNITS.items()},
+    **COMPOSITE_UNITS,
+    **BASE_UNITS,
+}
+
+
 def unit_dim(unit: str, raise_error: bool):
-    if unit in BASE_UNITS:
-        return BASE_UNITS[unit]
-    if unit in COMPOSITE_UNITS:
-        return COMPOSITE_UNITS[unit]
-    if unit in SPECIAL_UNITS:
-        return SPECIAL_UNITS[unit][0]
+    dim = _UNIT_DIMS.get(unit)
+    if dim is not None:
+        return dim
 
     if raise_error:
         raise ValueError(f"Неизвестная единица: {unit}")
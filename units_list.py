@@ -1,19 +1,17 @@
-from numpy import array
-
 # Кандела: м^(-2)·кг^(-1)·с^3·кд·ср
 
 # (м, кг, с, А, К, моль, кд, рад, рад, бит)
 BASE_UNITS = {
-    "м": array([1, 0, 0, 0, 0, 0, 0, 0, 0, 0]),
-    "кг": array([0, 1, 0, 0, 0, 0, 0, 0, 0, 0]),
-    "с": array([0, 0, 1, 0, 0, 0, 0, 0, 0, 0]),
-    "А": array([0, 0, 0, 1, 0, 0, 0, 0, 0, 0]),
-    "К": array([0, 0, 0, 0, 1, 0, 0, 0, 0, 0]),
-    "моль": array([0, 0, 0, 0, 0, 1, 0, 0, 0, 0]),
-    "кд": array([0, 0, 0, 0, 0, 0, 1, 0, 0, 0]),
-    "рад": array([0, 0, 0, 0, 0, 0, 0, 1, 0, 0]),
-    "ср": array([0, 0, 0, 0, 0, 0, 0, 0, 1, 0]),
-    "бит": array([0, 0, 0, 0, 0, 0, 0, 0, 0, 1]),
+    "м": (1, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+    "кг": (0, 1, 0, 0, 0, 0, 0, 0, 0, 0),
+    "с": (0, 0, 1, 0, 0, 0, 0, 0, 0, 0),
+    "А": (0, 0, 0, 1, 0, 0, 0, 0, 0, 0),
+    "К": (0, 0, 0, 0, 1, 0, 0, 0, 0, 0),
+    "моль": (0, 0, 0, 0, 0, 1, 0, 0, 0, 0),
+    "кд": (0, 0, 0, 0, 0, 0, 1, 0, 0, 0),
+    "рад": (0, 0, 0, 0, 0, 0, 0, 1, 0, 0),
+    "ср": (0, 0, 0, 0, 0, 0, 0, 0, 1, 0),
+    "бит": (0, 0, 0, 0, 0, 0, 0, 0, 0, 1),
 }
 
 PREFIXES_RU = {
@@ -41,97 +39,97 @@ PREFIXES_RU = {
 
 COMPOSITE_UNITS = {
     # Механика
-    "Н": array([1, 1, -2, 0, 0, 0, 0, 0, 0, 0]),  # Ньютон: кг·м/с²
-    "Па": array([-1, 1, -2, 0, 0, 0, 0, 0, 0, 0]),  # Паскаль: Н/м² = кг/(м·с²)
-    "Дж": array([2, 1, -2, 0, 0, 0, 0, 0, 0, 0]),  # Джоуль: Н·м = кг·м²/с²
-    "Вт": array([2, 1, -3, 0, 0, 0, 0, 0, 0, 0]),  # Ватт: Дж/с = кг·м²/с³
+    "Н": (1, 1, -2, 0, 0, 0, 0, 0, 0, 0),  # Ньютон: кг·м/с²
+    "Па": (-1, 1, -2, 0, 0, 0, 0, 0, 0, 0),  # Паскаль: Н/м² = кг/(м·с²)
+    "Дж": (2, 1, -2, 0, 0, 0, 0, 0, 0, 0),  # Джоуль: Н·м = кг·м²/с²
+    "Вт": (2, 1, -3, 0, 0, 0, 0, 0, 0, 0),  # Ватт: Дж/с = кг·м²/с³
 
     # Электричество
-    "Кл": array([0, 0, 1, 1, 0, 0, 0, 0, 0, 0]),  # Кулон: А·с
-    "В": array([2, 1, -3, -1, 0, 0, 0, 0, 0, 0]),  # Вольт: Дж/Кл = кг·м²/(с³·А)
-    "Ом": array([2, 1, -3, -2, 0, 0, 0, 0, 0, 0]),  # Ом: В/А = кг·м²/(с³·А²)
-    "Ф": array([-2, -1, 4, 2, 0, 0, 0, 0, 0, 0]),  # Фарад: Кл/В = с⁴·А²/(кг·м²)
-    "Гн": array([2, 1, -2, -2, 0, 0, 0, 0, 0, 0]),  # Генри: Вб/А = кг·м²/(с²·А²)
-    "См": array([-2, -1, 3, 2, 0, 0, 0, 0, 0, 0]),  # Сименс: 1/Ом = с³·А²/(кг·м²)
-    "Вб": array([2, 1, -2, -1, 0, 0, 0, 0, 0, 0]),  # Вебер: В·с = кг·м²/(с²·А)
-    "Тл": array([0, 1, -2, -1, 0, 0, 0, 0, 0, 0]),  # Тесла: Вб/м² = кг/(с²·А)
+    "Кл": (0, 0, 1, 1, 0, 0, 0, 0, 0, 0),  # Кулон: А·с
+    "В": (2, 1, -3, -1, 0, 0, 0, 0, 0, 0),  # Вольт: Дж/Кл = кг·м²/(с³·А)
+    "Ом": (2, 1, -3, -2, 0, 0, 0, 0, 0, 0),  # Ом: В/А = кг·м²/(с³·А²)
+    "Ф": (-2, -1, 4, 2, 0, 0, 0, 0, 0, 0),  # Фарад: Кл/В = с⁴·А²/(кг·м²)
+    "Гн": (2, 1, -2, -2, 0, 0, 0, 0, 0, 0),  # Генри: Вб/А = кг·м²/(с²·А²)
+    "См": (-2, -1, 3, 2, 0, 0, 0, 0, 0, 0),  # Сименс: 1/Ом = с³·А²/(кг·м²)
+    "Вб": (2, 1, -2, -1, 0, 0, 0, 0, 0, 0),  # Вебер: В·с = кг·м²/(с²·А)
+    "Тл": (0, 1, -2, -1, 0, 0, 0, 0, 0, 0),  # Тесла: Вб/м² = кг/(с²·А)
 
     # Термодинамика
-    "Гц": array([0, 0, -1, 0, 0, 0, 0, 0, 0, 0]),  # Герц: 1/с
-    "лм": array([0, 0, 0, 0, 0, 0, 1, 0, 0, 0]),  # Люмен: кд·ср
-    "лк": array([-2, 0, 0, 0, 0, 0, 1, 0, 0, 0]),  # Люкс: лм/м² = кд·ср/м²
+    "Гц": (0, 0, -1, 0, 0, 0, 0, 0, 0, 0),  # Герц: 1/с
+    "лм": (0, 0, 0, 0, 0, 0, 1, 0, 0, 0),  # Люмен: кд·ср
+    "лк": (-2, 0, 0, 0, 0, 0, 1, 0, 0, 0),  # Люкс: лм/м² = кд·ср/м²
 
     # Химия и радиация
-    "Бк": array([0, 0, -1, 0, 0, 0, 0, 0, 0, 0]),  # Беккерель: 1/с (распад/с)
-    "Гр": array([2, 0, -2, 0, 0, 0, 0, 0, 0, 0]),  # Грей: Дж/кг = м²/с²
-    "Зв": array([2, 0, -2, 0, 0, 0, 0, 0, 0, 0]),  # Зиверт: Дж/кг = м²/с²
-    "кат": array([0, 0, -1, 0, 0, 1, 0, 0, 0, 0]),  # Катал: моль/с
+    "Бк": (0, 0, -1, 0, 0, 0, 0, 0, 0, 0),  # Беккерель: 1/с (распад/с)
+    "Гр": (2, 0, -2, 0, 0, 0, 0, 0, 0, 0),  # Грей: Дж/кг = м²/с²
+    "Зв": (2, 0, -2, 0, 0, 0, 0, 0, 0, 0),  # Зиверт: Дж/кг = м²/с²
+    "кат": (0, 0, -1, 0, 0, 1, 0, 0, 0, 0),  # Катал: моль/с
 }
 
 SPECIAL_UNITS = {
     # --- Энергия ---
-    "эВ": (array([2, 1, -2, 0, 0, 0, 0, 0, 0, 0]), 1.602176634e-19),  # электрон-вольт
-    "кал": (array([2, 1, -2, 0, 0, 0, 0, 0, 0, 0]), 4.184),  # калория
-    "эрг": (array([2, 1, -2, 0, 0, 0, 0, 0, 0, 0]), 1e-7),  # эрг
+    "эВ": ((2, 1, -2, 0, 0, 0, 0, 0, 0, 0), 1.602176634e-19),  # электрон-вольт
+    "кал": ((2, 1, -2, 0, 0, 0, 0, 0, 0, 0), 4.184),  # калория
+    "эрг": ((2, 1, -2, 0, 0, 0, 0, 0, 0, 0), 1e-7),  # эрг
 
     # --- Масса ---
-    "а.е.м.": (array([0, 1, 0, 0, 0, 0, 0, 0, 0, 0]), 1.66053906660e-27),  # атомная единица массы
-    "Да": (array([0, 1, 0, 0, 0, 0, 0, 0, 0, 0]), 1.66053906660e-27),  # дальтон (синоним а.е.м.)
-    "т": (array([0, 1, 0, 0, 0, 0, 0, 0, 0, 0]), 1000.0),  # тонна
-    "ц": (array([0, 1, 0, 0, 0, 0, 0, 0, 0, 0]), 100.0),  # центнер
+    "а.е.м.": ((0, 1, 0, 0, 0, 0, 0, 0, 0, 0), 1.66053906660e-27),  # атомная единица массы
+    "Да": ((0, 1, 0, 0, 0, 0, 0, 0, 0, 0), 1.66053906660e-27),  # дальтон (синоним а.е.м.)
+    "т": ((0, 1, 0, 0, 0, 0, 0, 0, 0, 0), 1000.0),  # тонна
+    "ц": ((0, 1, 0, 0, 0, 0, 0, 0, 0, 0), 100.0),  # центнер
 
     # --- Давление ---
-    "бар": (array([-1, 1, -2, 0, 0, 0, 0, 0, 0, 0]), 1e5),  # бар
-    "атм": (array([-1, 1, -2, 0, 0, 0, 0, 0, 0, 0]), 101325),  # стандартная атмосфера
-    "мм рт.ст.": (array([-1, 1, -2, 0, 0, 0, 0, 0, 0, 0]), 133.322368),  # миллиметр ртутного столба
+    "бар": ((-1, 1, -2, 0, 0, 0, 0, 0, 0, 0), 1e5),  # бар
+    "атм": ((-1, 1, -2, 0, 0, 0, 0, 0, 0, 0), 101325),  # стандартная атмосфера
+    "мм рт.ст.": ((-1, 1, -2, 0, 0, 0, 0, 0, 0, 0), 133.322368),  # миллиметр ртутного столба
 
     # --- Длина ---
-    "Å": (array([1, 0, 0, 0, 0, 0, 0, 0, 0, 0]), 1e-10),  # ангстрем
-    "фм": (array([1, 0, 0, 0, 0, 0, 0, 0, 0, 0]), 1e-15),  # ферми (фемтометр)
-    "пк": (array([1, 0, 0, 0, 0, 0, 0, 0, 0, 0]), 3.085677581e16),  # парсек
-    "св.год": (array([1, 0, 0, 0, 0, 0, 0, 0, 0, 0]), 9.460730472e15),  # световой год
-    "а.е.": (array([1, 0, 0, 0, 0, 0, 0, 0, 0, 0]), 1.495978707e11),  # астрономическая единица
-    "микрон": (array([1, 0, 0, 0, 0, 0, 0, 0, 0, 0]), 1e-6),  # микрометр
+    "Å": ((1, 0, 0, 0, 0, 0, 0, 0, 0, 0), 1e-10),  # ангстрем
+    "фм": ((1, 0, 0, 0, 0, 0, 0, 0, 0, 0), 1e-15),  # ферми (фемтометр)
+    "пк": ((1, 0, 0, 0, 0, 0, 0, 0, 0, 0), 3.085677581e16),  # парсек
+    "св.год": ((1, 0, 0, 0, 0, 0, 0, 0, 0, 0), 9.460730472e15),  # световой год
+    "а.е.": ((1, 0, 0, 0, 0, 0, 0, 0, 0, 0), 1.495978707e11),  # астрономическая единица
+    "микрон": ((1, 0, 0, 0, 0, 0, 0, 0, 0, 0), 1e-6),  # микрометр
 
     # --- Химия ---
-    "Ф": (array([0, 0, 1, 1, 0, 0, 0, 0, 0, 0]), 96485.33212),  # фарадей (1 моль электронов = 96485 Кл)
+    "Ф": ((0, 0, 1, 1, 0, 0, 0, 0, 0, 0), 96485.33212),  # фарадей (1 моль электронов = 96485 Кл)
 
     # --- Оптика ---
-    "Эйнштейн": (array([0, 0, 1, 0, 0, 1, 0, 0, 0, 0]), 1.0),  # 1 моль фотонов (как количество вещества)
+    "Эйнштейн": ((0, 0, 1, 0, 0, 1, 0, 0, 0, 0), 1.0),  # 1 моль фотонов (как количество вещества)
 
     # --- Квантовая физика ---
-    "lₚ": (array([1, 0, 0, 0, 0, 0, 0, 0, 0, 0]), 1.616255e-35),  # планковская длина
-    "tₚ": (array([0, 0, 1, 0, 0, 0, 0, 0, 0, 0]), 5.391247e-44),  # планковское время
-    "mₚ": (array([0, 1, 0, 0, 0, 0, 0, 0, 0, 0]), 2.176434e-8),  # планковская масса
-    "Eₚ": (array([2, 1, -2, 0, 0, 0, 0, 0, 0, 0]), 1.9561e9),  # планковская энергия (Дж)
+    "lₚ": ((1, 0, 0, 0, 0, 0, 0, 0, 0, 0), 1.616255e-35),  # планковская длина
+    "tₚ": ((0, 0, 1, 0, 0, 0, 0, 0, 0, 0), 5.391247e-44),  # планковское время
+    "mₚ": ((0, 1, 0, 0, 0, 0, 0, 0, 0, 0), 2.176434e-8),  # планковская масса
+    "Eₚ": ((2, 1, -2, 0, 0, 0, 0, 0, 0, 0), 1.9561e9),  # планковская энергия (Дж)
     # --- Площадь ---
-    "га": (array([2, 0, 0, 0, 0, 0, 0, 0, 0, 0]), 1e4),  # гектар
-    "б": (array([2, 0, 0, 0, 0, 0, 0, 0, 0, 0]), 1e-28),  # барн
+    "га": ((2, 0, 0, 0, 0, 0, 0, 0, 0, 0), 1e4),  # гектар
+    "б": ((2, 0, 0, 0, 0, 0, 0, 0, 0, 0), 1e-28),  # барн
 
     # --- Время ---
-    "мин": (array([0, 0, 1, 0, 0, 0, 0, 0, 0, 0]), 60.0),  # минута
-    "ч": (array([0, 0, 1, 0, 0, 0, 0, 0, 0, 0]), 3600.0),  # час
-    "сут": (array([0, 0, 1, 0, 0, 0, 0, 0, 0, 0]), 86400.0),  # сутки
-    "год": (array([0, 0, 1, 0, 0, 0, 0, 0, 0, 0]), 31557600.0),  # год (365.25 суток)
+    "мин": ((0, 0, 1, 0, 0, 0, 0, 0, 0, 0), 60.0),  # минута
+    "ч": ((0, 0, 1, 0, 0, 0, 0, 0, 0, 0), 3600.0),  # час
+    "сут": ((0, 0, 1, 0, 0, 0, 0, 0, 0, 0), 86400.0),  # сутки
+    "год": ((0, 0, 1, 0, 0, 0, 0, 0, 0, 0), 31557600.0),  # год (365.25 суток)
 
     # --- Активность / радиация ---
-    "Ки": (array([0, 0, -1, 0, 0, 0, 0, 0, 0, 0]), 3.7e10),  # кюри
-    "Р": (array([-1, -1, 1, 1, 0, 0, 0, 0, 0, 0]), 2.58e-4),  # рентген: 2.58e-4 Кл/кг
-    "рад": (array([2, 0, -2, 0, 0, 0, 0, 0, 0, 0]), 0.01),  # рад = 0.01 Дж/кг
+    "Ки": ((0, 0, -1, 0, 0, 0, 0, 0, 0, 0), 3.7e10),  # кюри
+    "Р": ((-1, -1, 1, 1, 0, 0, 0, 0, 0, 0), 2.58e-4),  # рентген: 2.58e-4 Кл/кг
+    "рад": ((2, 0, -2, 0, 0, 0, 0, 0, 0, 0), 0.01),  # рад = 0.01 Дж/кг
 
     # --- Сила / мощность ---
-    "лс": (array([2, 1, -3, 0, 0, 0, 0, 0, 0, 0]), 735.49875),  # лошадиная сила
+    "лс": ((2, 1, -3, 0, 0, 0, 0, 0, 0, 0), 735.49875),  # лошадиная сила
 
     # --- Объём ---
-    "л": (array([3, 0, 0, 0, 0, 0, 0, 0, 0, 0]), 1e-3),  # литр = 1e-3 м³
+    "л": ((3, 0, 0, 0, 0, 0, 0, 0, 0, 0), 1e-3),  # литр = 1e-3 м³
 
     # --- Астрономические постоянные ---
-    "M☉": (array([0, 1, 0, 0, 0, 0, 0, 0, 0, 0]), 1.98847e30),  # солнечная масса
-    "R☉": (array([1, 0, 0, 0, 0, 0, 0, 0, 0, 0]), 6.957e8),  # солнечный радиус
-    "L☉": (array([2, 1, -3, 0, 0, 0, 0, 0, 0, 0]), 3.828e26),  # солнечная светимость
+    "M☉": ((0, 1, 0, 0, 0, 0, 0, 0, 0, 0), 1.98847e30),  # солнечная масса
+    "R☉": ((1, 0, 0, 0, 0, 0, 0, 0, 0, 0), 6.957e8),  # солнечный радиус
+    "L☉": ((2, 1, -3, 0, 0, 0, 0, 0, 0, 0), 3.828e26),  # солнечная светимость
 
     # --- Информатика ---
-    "Б": (array([0, 0, 0, 0, 0, 0, 0, 0, 0, 1]), 8),  # байт = 8 бит
+    "Б": ((0, 0, 0, 0, 0, 0, 0, 0, 0, 1), 8),  # байт = 8 бит
 }
 # todo: Отдельно обрабатывать температурные единицы
 
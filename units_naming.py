@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from functools import cache, lru_cache
+from typing import Optional
+
+from bestsupport_units_tests.config import NAMED_UNIT_PRIORITY, MULTIPLY_SIGN, POWER_SIGN, UNIT_PARSE_CACHE_SIZE
+from bestsupport_units_tests.units_lib import UnitBase, DIMENSIONLESS
+from bestsupport_units_tests.units_list import BASE_UNITS, COMPOSITE_UNITS
+
+# Обратный индекс "размерность -> имя единицы" (Н, Дж, ...) и разложение произвольной размерности
+# в кратчайшее произведение именованных единиц (Дж·с, В/м). Ключи - интернированные UnitBase (хэш, а не перебор)
+
+# Глубина разложения по умолчанию - число шагов (атомов) в произведении, не больше 4
+MAX_DECOMPOSITION_DEPTH = 4
+
+UNIT_DECOMPOSITION = tuple[tuple[str, int], ...]  # ((обозначение, степень), ...)
+
+
+@cache
+def get_named_units(domain: str = "default") -> dict[UnitBase, str]:
+    """Размерность -> предпочтительное имя: базовые единицы, затем составные с приоритетами domain"""
+    if domain not in NAMED_UNIT_PRIORITY:
+        raise ValueError(f"Unknown unit domain {domain} (available: {', '.join(NAMED_UNIT_PRIORITY)})")
+
+    named: dict[UnitBase, str] = {}
+    for unit in NAMED_UNIT_PRIORITY[domain]:
+        named[UnitBase(COMPOSITE_UNITS[unit])] = unit
+    # Базовые единицы важнее составных с той же размерностью (кд, а не лм)
+    for unit, dim in BASE_UNITS.items():
+        named[UnitBase(dim)] = unit
+    for unit, dim in COMPOSITE_UNITS.items():
+        named.setdefault(UnitBase(dim), unit)
+
+    named.pop(DIMENSIONLESS, None)
+    return named
+
+
+# Степени базовых единиц, которые считаются одним шагом разложения (м^2, с^(-2))
+BASE_UNIT_POWERS = (1, -1, 2, -2, 3, -3, 4, -4)
+# Единицы предметных областей называют только свою размерность целиком и в произведения не входят (не "Гр/м")
+DOMAIN_ONLY_UNITS = frozenset({"Гц", "Бк", "Гр", "Зв", "кат", "лм", "лк"})
+
+# Цена шага при равной длине разложения: составная единица - 300 (+ её номер в COMPOSITE_UNITS, чтобы при
+# равенстве побеждала более употребимая: Н*м^(-1), а не Па*м), базовая - 200 за единицу модуля степени.
+# Так Н*м^(-1) лучше кг*с^(-2), а Вт*м^(-2)*К^(-1) лучше кг*с^(-3)*К^(-1)
+COMPOSITE_UNIT_COST = 300
+BASE_POWER_COST = 200
+
+DECOMPOSITION_STEP = tuple[int, tuple[tuple[str, int], ...]]  # (цена, шаги)
+
+
+def _better(candidate: DECOMPOSITION_STEP, best: Optional[DECOMPOSITION_STEP]) -> bool:
+    return best is None or candidate[0] < best[0]
+
+
+@cache
+def _atoms(domain: str) -> dict[UnitBase, DECOMPOSITION_STEP]:
+    # Один шаг: составная единица в степени ±1 или базовая в степени из BASE_UNIT_POWERS
+    atoms: dict[UnitBase, DECOMPOSITION_STEP] = {}
+    composite_ranks = {unit: rank for rank, unit in enumerate(COMPOSITE_UNITS)}
+    for measure, unit in get_named_units(domain).items():
+        if unit in DOMAIN_ONLY_UNITS:
+            continue
+        is_base = unit in BASE_UNITS
+        for power in (BASE_UNIT_POWERS if is_base else (1, -1)):
+            cost = BASE_POWER_COST * abs(power) if is_base else COMPOSITE_UNIT_COST + composite_ranks[unit]
+            step = (cost, ((unit, power),))
+            if _better(step, atoms.get(measure ** power)):
+                atoms[measure ** power] = step
+    return atoms
+
+
+@cache
+def _pairs(domain: str) -> dict[UnitBase, DECOMPOSITION_STEP]:
+    # Все произведения двух шагов (лучшее для каждой размерности) - половина глубины для "встречи посередине"
+    pairs: dict[UnitBase, DECOMPOSITION_STEP] = {}
+    atoms = list(_atoms(domain).items())
+    for ind, (measure1, (cost1, steps1)) in enumerate(atoms):
+        for measure2, (cost2, steps2) in atoms[ind:]:
+            step = (cost1 + cost2, steps1 + steps2)
+            if _better(step, pairs.get(measure1 * measure2)):
+                pairs[measure1 * measure2] = step
+    return pairs
+
+
+def _best_split(measure: UnitBase, halves: dict[UnitBase, DECOMPOSITION_STEP],
+                rests: dict[UnitBase, DECOMPOSITION_STEP]) -> Optional[DECOMPOSITION_STEP]:
+    best = None
+    for half_measure, (half_cost, half_steps) in halves.items():
+        rest = rests.get(measure / half_measure)
+        if rest is not None:
+            step = (half_cost + rest[0], half_steps + rest[1])
+            if _better(step, best):
+                best = step
+    return best
+
+
+def _combine(steps: tuple[tuple[str, int], ...]) -> UNIT_DECOMPOSITION:
+    # Одинаковые единицы сворачиваются в степень; составные единицы и положительные степени первыми
+    powers: dict[str, int] = {}
+    for unit, power in steps:
+        powers[unit] = powers.get(unit, 0) + power
+    return tuple(sorted(((unit, power) for unit, power in powers.items() if power),
+                        key=lambda item: (item[1] < 0, item[0] in BASE_UNITS)))
+
+
+@lru_cache(maxsize=UNIT_PARSE_CACHE_SIZE)
+def decompose_unit(measure: UnitBase, domain: str = "default",
+                   max_depth: int = MAX_DECOMPOSITION_DEPTH) -> Optional[UNIT_DECOMPOSITION]:
+    """Кратчайшее произведение именованных единиц (не длиннее max_depth шагов, глубже 4 поиск не идёт).
+
+    Среди разложений одной длины выбирается самое дешёвое (COMPOSITE_UNIT_COST, BASE_POWER_COST).
+    None - разложение не найдено.
+    """
+    if measure.is_dimensionless():
+        return ()
+
+    named = get_named_units(domain)
+    if measure in named:
+        return (named[measure], 1),
+
+    # (глубина, поиск) по возрастанию глубины: таблицы пар строятся, только если до них дошло
+    searches = (
+        (1, lambda: _atoms(domain).get(measure)),
+        (2, lambda: _pairs(domain).get(measure)),
+        (3, lambda: _best_split(measure, _atoms(domain), _pairs(domain))),
+        (4, lambda: _best_split(measure, _pairs(domain), _pairs(domain))),
+    )
+    for depth, search in searches:
+        if depth > max_depth:
+            break
+        found = search()
+        if found is not None:
+            return _combine(found[1])
+    return None
+
+
+def format_decomposition(decomposition: UNIT_DECOMPOSITION, multiply_sign: str = MULTIPLY_SIGN,
+                         power_sign: str = POWER_SIGN) -> str:
+    parts = []
+    for unit, power in decomposition:
+        if power == 1:
+            parts.append(unit)
+        elif power < 0:
+            parts.append(f"{unit}{power_sign}({power})")
+        else:
+            parts.append(f"{unit}{power_sign}{power}")
+    return multiply_sign.join(parts)
+
+
+@lru_cache(maxsize=UNIT_PARSE_CACHE_SIZE)
+def named_unit_str(measure: UnitBase, domain: str = "default") -> str:
+    """Запись размерности через именованные единицы ("Дж*с"), или через базовые, если разложение не найдено"""
+    decomposition = decompose_unit(measure, domain)
+    if decomposition is None or not decomposition:
+        return str(measure)
+    return format_decomposition(decomposition)
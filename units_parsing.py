@@ -1,28 +1,195 @@
-# todo: Это файл, где будет обработка (парсинг) ручного ввода и перевода его в вектор единиц измерения (например, Н*кг -> [1, 0, ...])
+# Обработка (парсинг) ручного ввода и перевод его в вектор единиц измерения (например, Н*кг -> [1, 0, ...])
+from __future__ import annotations
+
+import re
+from fractions import Fraction
+from functools import lru_cache
+from typing import Mapping, NamedTuple, Optional, Union
+
+from bestsupport_units_tests.config import UNIT_PARSE_CACHE_SIZE
+from bestsupport_units_tests.units_dim import to_exponent
+from bestsupport_units_tests.units_lib import DIMENSIONLESS
+from bestsupport_units_tests.units_registry import ParsedUnit, RegistrySnapshot, get_default_units
+
+MULTIPLY_SIGNS = frozenset("*·⋅×")
+DIVIDE_SIGN = "/"
+POWER_SIGNS = ("**", "^")
+SUPERSCRIPT_CHARS = "⁰¹²³⁴⁵⁶⁷⁸⁹⁻⁺"
+SUPERSCRIPTS = str.maketrans(SUPERSCRIPT_CHARS, "0123456789-+")
+
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_EXPONENT_RE = re.compile(r"[+-]?\d+(?:\.\d+)?")
+
+
+class UnitToken(NamedTuple):
+    kind: str  # "unit", "number", "mul", "div", "pow", "(", ")"
+    value: Union[ParsedUnit, float, Fraction, int, None] = None
+
 
 def clean_unit_str(unit_str: str) -> str:
-    return unit_str.replace(" ", "").lower()
+    # Регистр не трогаем: "Па" и "па", "М" (мега) и "м" (милли) различаются
+    return "".join(unit_str.split())
+
 
+def expand_unit_symbols(units: Optional[RegistrySnapshot] = None) -> Mapping[str, ParsedUnit]:
+    """Все обозначения единиц, включая варианты с приставками: символ -> (размерность, множитель)"""
+    return (get_default_units() if units is None else units).symbols
 
-def tokenize_unit_str(unit_str: str) -> list[str]:
-    tokens: list[str] = []
+
+def match_unit_symbol(unit_str: str, start: int,
+                      units: Optional[RegistrySnapshot] = None) -> tuple[int, ParsedUnit | None]:
+    """Самое длинное обозначение из таблицы снимка, с которого начинается unit_str[start:]"""
+    if units is None:
+        units = get_default_units()
+    symbols = units.symbols
+
+    for end in range(min(len(unit_str), start + units.max_symbol_length), start, -1):
+        parsed = symbols.get(unit_str[start:end])
+        if parsed is not None:
+            return end, parsed
+    return start, None
+
+
+def parse_exponent(exponent_str: str, unit_str: str) -> Union[int, Fraction]:
+    try:
+        if "/" in exponent_str:
+            numerator, denominator = exponent_str.split("/")
+            return to_exponent(Fraction(int(numerator), int(denominator)))
+        return to_exponent(Fraction(exponent_str))
+    except (ValueError, ZeroDivisionError):
+        raise ValueError(f"Неверная степень '{exponent_str}' в '{unit_str}'") from None
+
+
+def tokenize_unit_str(unit_str: str, units: Optional[RegistrySnapshot] = None) -> list[UnitToken]:
+    tokens: list[UnitToken] = []
+    if units is None:
+        units = get_default_units()
 
     ind = 0
     while ind < len(unit_str):
         char = unit_str[ind]
 
-        print(char)
+        if unit_str.startswith(POWER_SIGNS, ind):
+            ind += 2 if unit_str.startswith("**", ind) else 1
 
-        ind += 1
+            if unit_str.startswith("(", ind):
+                end = unit_str.find(")", ind)
+                if end == -1:
+                    raise ValueError(f"Незакрытая скобка степени в '{unit_str}'")
+                tokens.append(UnitToken("pow", parse_exponent(unit_str[ind + 1:end], unit_str)))
+                ind = end + 1
+            else:
+                match = _EXPONENT_RE.match(unit_str, ind)
+                if match is None:
+                    raise ValueError(f"Ожидалась степень в '{unit_str}' (позиция {ind})")
+                tokens.append(UnitToken("pow", parse_exponent(match.group(), unit_str)))
+                ind = match.end()
+        elif char in MULTIPLY_SIGNS:
+            tokens.append(UnitToken("mul"))
+            ind += 1
+        elif char == DIVIDE_SIGN:
+            tokens.append(UnitToken("div"))
+            ind += 1
+        elif char in "()":
+            tokens.append(UnitToken(char))
+            ind += 1
+        elif char in SUPERSCRIPT_CHARS:
+            end = ind
+            while end < len(unit_str) and unit_str[end] in SUPERSCRIPT_CHARS:
+                end += 1
+            tokens.append(UnitToken("pow", parse_exponent(unit_str[ind:end].translate(SUPERSCRIPTS), unit_str)))
+            ind = end
+        else:
+            end, parsed = match_unit_symbol(unit_str, ind, units)
+            if parsed is not None:
+                tokens.append(UnitToken("unit", parsed))
+                ind = end
+                continue
+
+            match = _NUMBER_RE.match(unit_str, ind)
+            if match is None:
+                raise ValueError(f"Неизвестная единица в '{unit_str}' (позиция {ind})")
+            tokens.append(UnitToken("number", float(match.group())))
+            ind = match.end()
 
     return tokens
 
 
-def parse_unit_str(unit_str: str) -> ...:
-    cleaned_str = clean_unit_str(unit_str)
-    tokens: list[str] = tokenize_unit_str(cleaned_str)
+class _UnitParser:
+    # Рекурсивный спуск, операции левоассоциативны как в Python: "Н/кг*Па" == (Н/кг)*Па
+    # expr := term (("*" | "/" | <пусто>) term)*
+    # term := atom ("^" exponent)*
+    # atom := unit | number | "(" expr ")"
 
-    pass
+    def __init__(self, tokens: list[UnitToken], unit_str: str) -> None:
+        self.tokens = tokens
+        self.unit_str = unit_str
+        self.pos = 0
 
+    def peek(self) -> str | None:
+        return self.tokens[self.pos].kind if self.pos < len(self.tokens) else None
+
+    def parse(self) -> ParsedUnit:
+        result = self.parse_expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Лишние символы в '{self.unit_str}'")
+        return result
+
+    def parse_expr(self) -> ParsedUnit:
+        measure, factor = self.parse_term()
+
+        while (kind := self.peek()) is not None and kind != ")":
+            if kind == "div":
+                self.pos += 1
+                other_measure, other_factor = self.parse_term()
+                measure, factor = measure / other_measure, factor / other_factor
+                continue
+
+            if kind == "mul":
+                self.pos += 1
+            other_measure, other_factor = self.parse_term()
+            measure, factor = measure * other_measure, factor * other_factor
+
+        return ParsedUnit(measure, factor)
+
+    def parse_term(self) -> ParsedUnit:
+        measure, factor = self.parse_atom()
+
+        while self.peek() == "pow":
+            power = self.tokens[self.pos].value
+            self.pos += 1
+            measure, factor = measure ** power, factor ** float(power)
+
+        return ParsedUnit(measure, factor)
+
+    def parse_atom(self) -> ParsedUnit:
+        kind = self.peek()
+        if kind is None:
+            raise ValueError(f"Неожиданный конец строки единиц '{self.unit_str}'")
+
+        token = self.tokens[self.pos]
+        self.pos += 1
+
+        if kind == "unit":
+            return token.value
+        if kind == "number":
+            return ParsedUnit(DIMENSIONLESS, token.value)
+        if kind == "(":
+            result = self.parse_expr()
+            if self.peek() != ")":
+                raise ValueError(f"Незакрытая скобка в '{self.unit_str}'")
+            self.pos += 1
+            return result
+
+        raise ValueError(f"Неожиданный символ в '{self.unit_str}'")
+
+
+@lru_cache(maxsize=UNIT_PARSE_CACHE_SIZE)
+def parse_unit_str(unit_str: str, units: Optional[RegistrySnapshot] = None) -> ParsedUnit:
+    """Разбор строки единиц по снимку реестра units (по умолчанию - get_default_units())"""
+    cleaned_str = clean_unit_str(unit_str)
+    if not cleaned_str:
+        return ParsedUnit(DIMENSIONLESS, 1.0)
 
-parse_unit_str("Н/кг*Па")
+    tokens: list[UnitToken] = tokenize_unit_str(cleaned_str, units)
+    return _UnitParser(tokens, cleaned_str).parse()
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import hashlib
+import marshal
+import os
+from fractions import Fraction
+from functools import cache
+from itertools import repeat
+from types import MappingProxyType
+from typing import Any, Iterable, Literal, Mapping, NamedTuple, Optional, Sequence, TypeAlias, Union
+
+from bestsupport_units_tests.config import UNIT_TABLE_CACHE, UNIT_TABLE_CACHE_DIR
+from bestsupport_units_tests.units_dim import DIM_KEY, SparseDimBackend, base_dimension_key, dim_items
+from bestsupport_units_tests.units_lib import DIM_BACKEND, UnitBase
+from bestsupport_units_tests.units_list import BASE_UNITS, COMPOSITE_UNITS, SPECIAL_UNITS, PREFIXES_RU, LEN_DIM, \
+    UNITS_INDEXES
+
+# Реестр единиц: пользователь регистрирует единицы, приставки и синонимы, затем freeze() собирает
+# неизменяемый снимок с одной плоской таблицей "обозначение (с приставкой) -> (размерность, множитель)".
+# Конфликты обозначений ищутся при freeze(), а не в тестах. Реестров в процессе может быть сколько угодно:
+# состояние хранится в объектах, модульный только снимок реестра по умолчанию (get_default_units).
+
+UNIT_KINDS: TypeAlias = Literal["base", "composite", "special"]
+
+PATH_UNION = Union[str, os.PathLike]
+
+# Файл кэша развёрнутой таблицы: marshal от (версия, sha256 определений реестра, таблицы).
+# Версия меняется вместе с раскладкой таблиц; устаревший или битый файл просто пересобирается
+CACHE_FORMAT_VERSION = 2
+DEFAULT_CACHE_FILE = "units_table.marshal"
+
+# Единицы, к которым приставки не применяются (килограмм уже содержит приставку)
+UNPREFIXABLE_UNITS = frozenset({"кг"})
+# Приставочные варианты, совпадающие с собственными обозначениями: остаются собственные
+ALLOWED_SYMBOL_CONFLICTS = frozenset({
+    "Гц",  # Гигацентнер и Герц
+    "Тл",  # Тералитр и Тесла
+})
+# Специальные единицы, чьи обозначения заняты базовыми/составными и недоступны по символу
+SHADOWED_SPECIAL_UNITS = frozenset({
+    "рад",  # радиан, а не внесистемный рад (0.01 Гр)
+    "Ф",  # фарад, а не фарадей
+})
+
+
+class UnitConflictError(ValueError):
+    pass
+
+
+class ParsedUnit(NamedTuple):
+    measure: UnitBase
+    factor: float  # Множитель перевода в СИ: 1 км -> (м, 1000.0)
+
+
+class UnitDefinition(NamedTuple):
+    dim: tuple[tuple[DIM_KEY, Any], ...]  # ненулевые показатели: ((ключ базовой размерности, показатель), ...)
+    factor: float
+    kind: str
+    prefixable: bool
+
+
+class PrefixDefinition(NamedTuple):
+    symbols: tuple[str, ...]
+    multiplier: float
+
+
+def normalize_symbol(symbol: str) -> str:
+    # Как clean_unit_str при разборе: пробелы внутри обозначения не значимы ("мм рт.ст.")
+    return "".join(symbol.split())
+
+
+class ExpandedTable(NamedTuple):
+    symbols: dict[str, ParsedUnit]  # обозначение (с приставкой) -> (размерность, множитель в СИ)
+    index: dict[str, tuple[int, float]]  # обозначение -> (номер размерности в dimensions, множитель в СИ)
+    dimensions: tuple[UnitBase, ...]
+
+
+class RegistrySnapshot:
+    """Неизменяемый снимок реестра: плоские таблицы обозначений с развёрнутыми приставками"""
+
+    def __init__(self, units: dict[str, UnitDefinition], prefixes: dict[str, PrefixDefinition],
+                 aliases: dict[str, str], table: ExpandedTable, base_dimensions: tuple[str, ...] = UNITS_INDEXES) -> None:
+        # Обозначения базовых размерностей: встроенные, затем добавленные в реестр (номер - индекс в кортеже)
+        self.base_dimensions: tuple[str, ...] = base_dimensions
+        self.units: Mapping[str, UnitDefinition] = MappingProxyType(units)
+        self.prefixes: Mapping[str, PrefixDefinition] = MappingProxyType(prefixes)
+        self.aliases: Mapping[str, str] = MappingProxyType(aliases)
+        self.symbols: Mapping[str, ParsedUnit] = MappingProxyType(table.symbols)
+        self.index: Mapping[str, tuple[int, float]] = MappingProxyType(table.index)
+        self.dimensions: tuple[UnitBase, ...] = table.dimensions
+        # Самое длинное обозначение ограничивает поиск совпадения при разборе строки
+        self.max_symbol_length = max(map(len, table.symbols), default=0)
+        self._dimension_ids = {measure: dim_id for dim_id, measure in enumerate(table.dimensions)}
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.symbols
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def lookup(self, symbol: str) -> Optional[ParsedUnit]:
+        return self.symbols.get(normalize_symbol(symbol))
+
+    def dimension_id(self, measure: UnitBase) -> Optional[int]:
+        return self._dimension_ids.get(measure)
+
+
+class UnitRegistry:
+    def __init__(self, allowed_conflicts: Iterable[str] = ()) -> None:
+        self._units: dict[str, UnitDefinition] = {}
+        self._prefixes: dict[str, PrefixDefinition] = {}
+        self._aliases: dict[str, str] = {}
+        self._allowed_conflicts: set[str] = set(allowed_conflicts)
+        # Базовые размерности сверх встроенных - свои у каждого реестра
+        self._base_dimensions: list[str] = []
+
+    def __contains__(self, symbol: str) -> bool:
+        symbol = normalize_symbol(symbol)
+        return symbol in self._units or symbol in self._aliases
+
+    def register_unit(self, symbol: str, dim: Union[UnitBase, Sequence, Mapping], factor: float = 1.0,
+                      kind: UNIT_KINDS = "special", prefixable: bool = True) -> None:
+        """Единица symbol = factor * (единица СИ с размерностью dim).
+
+        dim - UnitBase, плотный вектор встроенных размерностей или словарь {базовая размерность: показатель};
+        добавленные базовые размерности должны быть зарегистрированы в этом реестре.
+        """
+        symbol = normalize_symbol(symbol)
+        if not symbol:
+            raise ValueError("Unit symbol must not be empty")
+        if symbol in self:
+            raise UnitConflictError(f"Unit '{symbol}' is already registered")
+
+        if isinstance(dim, Mapping):
+            dim = UnitBase(dim)
+        if isinstance(dim, UnitBase):
+            dim = dim.cur_dim
+        elif len(dim) != LEN_DIM:
+            raise ValueError(f"Unit '{symbol}' dimension must have length {LEN_DIM}, got {len(dim)}")
+        items = dim_items(dim)
+        for key, _ in items:
+            if isinstance(key, str) and key not in self._base_dimensions:
+                raise ValueError(f"Unit '{symbol}' uses unknown base dimension '{key}'")
+        self._units[symbol] = UnitDefinition(items, float(factor), kind, prefixable)
+
+    def register_base_dimension(self, symbol: str, prefixable: bool = True) -> int:
+        """Новая базовая размерность (валюта, штуки, пиксели...) и её единица symbol.
+
+        Возвращает номер размерности в base_dimensions снимка. Размерность видна только этому реестру
+        (и его копиям); в векторе размерности она называется обозначением, поэтому одноимённые размерности
+        разных реестров совпадают. Требует config.UNIT_DIM_BACKEND = "sparse".
+        """
+        symbol = normalize_symbol(symbol)
+        if DIM_BACKEND is not SparseDimBackend:
+            raise ValueError(f"Base dimension '{symbol}' requires UNIT_DIM_BACKEND = 'sparse'")
+        if base_dimension_key(symbol) != symbol or symbol in self._base_dimensions:
+            raise UnitConflictError(f"Base dimension '{symbol}' is already registered")
+        if symbol in self:
+            raise UnitConflictError(f"Unit '{symbol}' is already registered")
+
+        self._base_dimensions.append(symbol)
+        self.register_unit(symbol, {symbol: 1}, kind="base", prefixable=prefixable)
+        return LEN_DIM + len(self._base_dimensions) - 1
+
+    def register_prefix(self, name: str, symbols: Iterable[str], multiplier: float) -> None:
+        if name in self._prefixes:
+            raise UnitConflictError(f"Prefix '{name}' is already registered")
+        self._prefixes[name] = PrefixDefinition(tuple(map(normalize_symbol, symbols)), float(multiplier))
+
+    def add_alias(self, alias: str, symbol: str) -> None:
+        """Другое обозначение той же единицы; приставки к синониму применяются, если применимы к единице"""
+        alias = normalize_symbol(alias)
+        if alias in self:
+            raise UnitConflictError(f"Unit '{alias}' is already registered")
+        self._aliases[alias] = normalize_symbol(symbol)
+
+    def allow_conflict(self, symbol: str) -> None:
+        """Разрешить совпадение приставочного варианта с другим обозначением (побеждает собственное)"""
+        self._allowed_conflicts.add(normalize_symbol(symbol))
+
+    def copy(self) -> UnitRegistry:
+        registry = UnitRegistry(self._allowed_conflicts)
+        registry._units = dict(self._units)
+        registry._prefixes = dict(self._prefixes)
+        registry._aliases = dict(self._aliases)
+        registry._base_dimensions = list(self._base_dimensions)
+        return registry
+
+    def digest(self) -> str:
+        """sha256 всех определений реестра: ключ кэша развёрнутой таблицы"""
+        source = (CACHE_FORMAT_VERSION, tuple(self._base_dimensions),
+                  [(symbol, _encode_dim(unit.dim), unit.factor, unit.kind, unit.prefixable)
+                   for symbol, unit in self._units.items()],
+                  [(name, prefix.symbols, prefix.multiplier) for name, prefix in self._prefixes.items()],
+                  list(self._aliases.items()), sorted(self._allowed_conflicts))
+        # repr, а не marshal: вывод marshal зависит от того, какие объекты разделяются по ссылке
+        return hashlib.sha256(repr(source).encode()).hexdigest()
+
+    def freeze(self, cache_path: Optional[PATH_UNION] = None) -> RegistrySnapshot:
+        """Снимок с развёрнутыми приставками; UnitConflictError со всеми неразрешёнными конфликтами.
+
+        С cache_path таблица читается из файла, если он собран из тех же определений,
+        иначе собирается заново и файл перезаписывается.
+        """
+        if cache_path is None:
+            table = self.__expand__()
+        else:
+            digest = self.digest()
+            table = load_expanded_table(cache_path, digest)
+            if table is None:
+                table = self.__expand__()
+                save_expanded_table(cache_path, table, digest)
+        return RegistrySnapshot(dict(self._units), dict(self._prefixes), dict(self._aliases), table,
+                                UNITS_INDEXES + tuple(self._base_dimensions))
+
+    def __expand__(self) -> ExpandedTable:
+        definitions: dict[str, UnitDefinition] = dict(self._units)
+        for alias, symbol in self._aliases.items():
+            if symbol not in self._units:
+                raise UnitConflictError(f"Alias '{alias}' refers to unknown unit '{symbol}'")
+            definitions[alias] = self._units[symbol]
+
+        plain = {symbol: ParsedUnit(UnitBase(dict(unit.dim)), unit.factor) for symbol, unit in definitions.items()}
+        symbols = dict(plain)
+        owners: dict[str, str] = {}
+        conflicts = []
+
+        for prefix in self._prefixes.values():
+            for prefix_symbol in prefix.symbols:
+                for unit, (measure, factor) in plain.items():
+                    if not definitions[unit].prefixable:
+                        continue
+                    symbol = f"{prefix_symbol}{unit}"
+                    if symbol in symbols:
+                        # Первый вариант остаётся: собственные обозначения важнее приставочных
+                        if symbol not in self._allowed_conflicts:
+                            owner = "unit" if symbol in plain else owners[symbol]
+                            conflicts.append(f"'{symbol}' ({prefix_symbol} + {unit}) conflicts with {owner}")
+                        continue
+                    owners[symbol] = f"{prefix_symbol} + {unit}"
+                    symbols[symbol] = ParsedUnit(measure, factor * prefix.multiplier)
+
+        if conflicts:
+            raise UnitConflictError("Conflicting unit symbols: " + "; ".join(conflicts))
+
+        dimension_ids: dict[UnitBase, int] = {}
+        for measure, _ in symbols.values():
+            dimension_ids.setdefault(measure, len(dimension_ids))
+        index = {symbol: (dimension_ids[measure], factor) for symbol, (measure, factor) in symbols.items()}
+        return ExpandedTable(symbols, index, tuple(dimension_ids))
+
+
+def default_registry() -> UnitRegistry:
+    """Новый реестр с единицами и приставками units_list (его можно дополнять своими единицами)"""
+    registry = UnitRegistry(ALLOWED_SYMBOL_CONFLICTS)
+
+    # Порядок приоритета: базовые, составные, специальные
+    for unit, dim in BASE_UNITS.items():
+        registry.register_unit(unit, dim, kind="base", prefixable=unit not in UNPREFIXABLE_UNITS)
+    for unit, dim in COMPOSITE_UNITS.items():
+        registry.register_unit(unit, dim, kind="composite", prefixable=unit not in UNPREFIXABLE_UNITS)
+    for unit, (dim, factor) in SPECIAL_UNITS.items():
+        if unit in SHADOWED_SPECIAL_UNITS:
+            continue
+        registry.register_unit(unit, dim, factor, prefixable=unit not in UNPREFIXABLE_UNITS)
+
+    for name, prefix_info in PREFIXES_RU.items():
+        registry.register_prefix(name, prefix_info["symbols"], prefix_info["multiplier"])
+    return registry
+
+
+def _encode_dim(dim: tuple) -> tuple:
+    # marshal не умеет Fraction: дробный показатель хранится парой (числитель, знаменатель)
+    return tuple((key, exp if isinstance(exp, int) else (exp.numerator, exp.denominator)) for key, exp in dim)
+
+
+def _decode_dim(dim: tuple) -> dict:
+    return {key: exp if isinstance(exp, int) else Fraction(*exp) for key, exp in dim}
+
+
+def save_expanded_table(path: PATH_UNION, table: ExpandedTable, digest: str) -> bool:
+    """Запись развёрнутой таблицы в файл кэша; False, если записать не удалось (каталог только для чтения)"""
+    # Колонки, а не словарь кортежей: при чтении словари собираются через zip/map без цикла на Python
+    columns = (
+        list(table.index),
+        [dim_id for dim_id, _ in table.index.values()],
+        [factor for _, factor in table.index.values()],
+        [_encode_dim(dim_items(measure.cur_dim)) for measure in table.dimensions],
+    )
+    tmp_path = f"{os.fspath(path)}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as file:
+            marshal.dump((CACHE_FORMAT_VERSION, digest, columns), file)
+        # Замена целиком: параллельный процесс увидит либо старый, либо новый файл
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def load_expanded_table(path: PATH_UNION, digest: str) -> Optional[ExpandedTable]:
+    """Таблица из файла кэша; None, если файла нет, он повреждён или собран из других определений"""
+    try:
+        # read() + loads: marshal.load читает файл мелкими порциями и заметно медленнее
+        with open(path, "rb") as file:
+            version, cached_digest, columns = marshal.loads(file.read())
+        if version != CACHE_FORMAT_VERSION or cached_digest != digest:
+            return None
+        symbols, dim_ids, factors, dimensions = columns
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    measures = tuple(UnitBase(_decode_dim(dim)) for dim in dimensions)
+    parsed = map(tuple.__new__, repeat(ParsedUnit), zip(map(measures.__getitem__, dim_ids), factors))
+    return ExpandedTable(dict(zip(symbols, parsed)), dict(zip(symbols, zip(dim_ids, factors))), measures)
+
+
+def default_cache_path() -> Optional[str]:
+    if not UNIT_TABLE_CACHE:
+        return None
+    directory = UNIT_TABLE_CACHE_DIR or os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__")
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        return None
+    return os.path.join(directory, DEFAULT_CACHE_FILE)
+
+
+@cache
+def get_default_units() -> RegistrySnapshot:
+    return default_registry().freeze(default_cache_path())
@@ -1,17 +1,79 @@
+import io
+import math
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
+from decimal import Decimal
+from fractions import Fraction
 
+import numpy as np
+
+from bestsupport_units_tests.benchmark_suite import BenchmarkResult, compare_results, load_baseline, save_baseline, \
+    run_case
+from bestsupport_units_tests.config import TESTS_DEBUG, UNIT_DIM_BACKEND
+from bestsupport_units_tests.dimension_solver import solve_exponents, solve_exponents_batch
+from bestsupport_units_tests.instrumentation import profile, is_enabled
+from bestsupport_units_tests.quantity import Quantity, AVG_SQRT_DEVIATION
+from bestsupport_units_tests.quantity_array import QuantityArray
+from bestsupport_units_tests.quantity_binary import save_quantities, load_quantities, load_quantity_array
+from bestsupport_units_tests.quantity_compile import compile_formula
+from bestsupport_units_tests.quantity_groups import group_by_dimension, summarize_by_dimension
+from bestsupport_units_tests.quantity_parallel import evaluate_parallel
+from bestsupport_units_tests.quantity_io import parse_quantity, iter_quantities, iter_quantity_batches
+from bestsupport_units_tests.units_benchmarks import measure_import_time
+from bestsupport_units_tests.units_conversion import convert
+from bestsupport_units_tests.units_dim import DIM_BACKENDS, to_exponent
+from bestsupport_units_tests.units_format import render_unit, render_plain, format_quantities
+from bestsupport_units_tests.units_lib import UnitBase, m, kg, s, A, DIMENSIONLESS
+from bestsupport_units_tests.units_naming import decompose_unit, named_unit_str
+from bestsupport_units_tests.units_parsing import parse_unit_str
+from bestsupport_units_tests.units_registry import default_registry, get_default_units, UnitConflictError
 from units_list import (
     COMPOSITE_UNITS,
     LEN_DIM,
     BASE_UNITS,
     SPECIAL_UNITS,
-    PREFIXES_RU
 )
 
-IGNORED_UNITS_VARIATIONS_CONFLICTS = [
-    "Гц",  # Гигацентнер и Герц
-    "Тл",  # Тералитр и Тесла
-]
+# Бюджет холодного импорта quantity (с запасом под медленные CI-машины)
+IMPORT_TIME_BUDGET_US = 100_000
+
+# Проверка реестров с добавленными базовыми размерностями: бэкенд размерностей выбирается до импорта библиотеки
+SPARSE_REGISTRY_CHECK = """
+import os, tempfile
+import bestsupport_units_tests.config as config
+config.UNIT_DIM_BACKEND = "sparse"
+config.UNIT_TABLE_CACHE = False
+from bestsupport_units_tests.dimension_solver import solve_exponents
+from bestsupport_units_tests.quantity_array import QuantityArray
+from bestsupport_units_tests.quantity_binary import save_quantities, load_quantity_array
+from bestsupport_units_tests.units_lib import s
+from bestsupport_units_tests.units_parsing import parse_unit_str
+from bestsupport_units_tests.units_registry import default_registry
+
+# Размерность видна только зарегистрировавшему её реестру
+shop, bank = default_registry(), default_registry()
+items_id = shop.register_base_dimension("шт")
+bank.register_base_dimension("руб")
+shop_units, bank_units = shop.freeze(), bank.freeze()
+assert shop_units.base_dimensions[items_id] == "шт", shop_units.base_dimensions
+assert "руб" not in shop_units.base_dimensions and "шт" not in bank_units
+assert "шт" not in default_registry().freeze()
+
+rate = parse_unit_str("кшт/с", shop_units)
+assert rate.factor == 1000.0 and str(rate.measure) == "шт*с^(-1)", rate
+items = parse_unit_str("шт", shop_units).measure
+assert solve_exponents({"rate": rate.measure, "t": s}, items).exponents == {"rate": 1, "t": 1}
+
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "rates.bsq")
+    save_quantities(path, QuantityArray([[1.0, 2.0]], rate.measure, [[0.1, 0.2]]))
+    loaded = load_quantity_array(path)
+    assert loaded.measure is rate.measure and loaded.values.tolist() == [[1.0, 2.0]], loaded
+    del loaded
+"""
 
 
 # todo: Переведите все-все доки на английский, месье
@@ -37,34 +99,560 @@ class TestUnits(unittest.TestCase):
                 )
 
     def test_prefix_conflicts(self):
-        """Проверка конфликтов префиксов с существующими единицами"""
-        existing_units = set(BASE_UNITS) | set(COMPOSITE_UNITS) | set(SPECIAL_UNITS)
-        candidate_map = {}
-
-        for p_name, p_info in PREFIXES_RU.items():
-            symbols = p_info.get("symbols", [])
-            if not symbols:
-                continue
-            for sym in symbols:
-                for unit in existing_units:
-                    candidate = f"{sym}{unit}"
-                    candidate_map.setdefault(candidate, []).append((p_name, sym, unit))
-
-        for candidate, entries in candidate_map.items():
-            if candidate in IGNORED_UNITS_VARIATIONS_CONFLICTS:
-                continue
-            self.assertNotIn(
-                candidate,
-                existing_units,
-                msg=f"{candidate} конфликтует с существующей единицей"
-            )
-
-        for candidate, entries in candidate_map.items():
-            if len(entries) > 1 and candidate not in IGNORED_UNITS_VARIATIONS_CONFLICTS:
-                self.fail(
-                    f"Конфликт префиксов для {candidate}: {entries}"
-                )
+        """Проверка конфликтов префиксов с существующими единицами (ищутся при freeze() реестра)"""
+        units = default_registry().freeze()
+
+        self.assertIs(units.lookup("Гц").measure, UnitBase(COMPOSITE_UNITS["Гц"]))
+        self.assertIs(units.lookup("Тл").measure, UnitBase(COMPOSITE_UNITS["Тл"]))
+        self.assertEqual(units.lookup("км"), (m, 1000.0))
+        self.assertIsNone(units.lookup("ккг"))
+
+
+class TestUnitRegistry(unittest.TestCase):
+    def test_custom_units(self):
+        """Свои единицы, приставки и синонимы в отдельном реестре, не влияющем на реестр по умолчанию"""
+        registry = default_registry()
+        registry.register_unit("мана", UnitBase(COMPOSITE_UNITS["Дж"]), 42)
+        registry.add_alias("mana", "мана")
+        units = registry.freeze()
+
+        joule = UnitBase(COMPOSITE_UNITS["Дж"])
+        self.assertEqual(units.lookup("кмана"), (joule, 42_000.0))
+        self.assertEqual(units.lookup("mana"), (joule, 42.0))
+        dim_id, factor = units.index["мана"]
+        self.assertIs(units.dimensions[dim_id], joule)
+        self.assertEqual(parse_unit_str("мана/с", units), (joule / s, 42.0))
+        self.assertEqual(convert(1, "кмана", "кДж", units), 42.0)
+        self.assertNotIn("мана", get_default_units())
+
+        with self.assertRaises(UnitConflictError):
+            registry.register_unit("м", m)
+
+        # "мм" - миллиметр, собственное обозначение "мм" конфликтует с ним при freeze()
+        registry.register_unit("мм", s)
+        with self.assertRaises(UnitConflictError):
+            registry.freeze()
+
+    def test_table_cache(self):
+        """Файл кэша развёрнутой таблицы: тот же результат, пересборка при изменении реестра или порче файла"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "units_table.marshal")
+            built = default_registry().freeze(path)
+            self.assertTrue(os.path.exists(path))
+
+            cached = default_registry().freeze(path)
+            self.assertEqual(dict(cached.symbols), dict(built.symbols))
+            self.assertEqual(dict(cached.index), dict(built.index))
+            self.assertEqual(cached.dimensions, built.dimensions)
+            self.assertEqual(parse_unit_str("кВт*ч", cached), parse_unit_str("кВт*ч", built))
+
+            registry = default_registry()
+            registry.register_unit("мана", UnitBase(COMPOSITE_UNITS["Дж"]), 42)
+            self.assertIn("кмана", registry.freeze(path))
+            self.assertNotIn("кмана", default_registry().freeze(path))
+
+            with open(path, "wb") as file:
+                file.write(b"\x00garbage")
+            self.assertEqual(dict(default_registry().freeze(path).symbols), dict(built.symbols))
+
+
+class TestUnitBase(unittest.TestCase):
+    def test_interning(self):
+        """Одинаковые размерности дают один и тот же объект"""
+        self.assertIs(m * kg / s ** 2, kg * m * s ** -2)
+        self.assertIs(m / m, DIMENSIONLESS)
+        self.assertIs(UnitBase(BASE_UNITS["м"]), m)
+        self.assertIs(-(-m), m)
+        self.assertEqual(hash(m * s), hash(s * m))
+
+    def test_cur_dim_is_read_only(self):
+        """Общий вектор размерности нельзя изменить"""
+        with self.assertRaises((ValueError, TypeError)):
+            m.cur_dim[0] = 2
+
+    def test_rational_exponents(self):
+        """Дробные показатели хранятся точно: float и Decimal приводятся к несократимой дроби"""
+        self.assertIs(m ** 0.1 * m ** 0.2, m ** 0.3)
+        self.assertIs((m ** (1 / 3)) ** 3, m)
+        self.assertIs(m ** Decimal("0.5"), m ** Fraction(1, 2))
+        self.assertEqual(to_exponent(Decimal("0.333333")), Fraction(1, 3))
+        with self.assertRaises(ValueError):
+            m ** math.pi
+
+        # Степень-Quantity (Decimal 1/3 с точностью DECIMAL_PRECISE) идёт тем же путём
+        self.assertIs((Quantity(8, m ** 3) ** (Quantity(1) / Quantity(3))).measure, m)
+        for backend in DIM_BACKENDS.values():
+            dim, _ = backend.make((0.1 + 0.2,) + (0,) * (LEN_DIM - 1))
+            self.assertEqual(tuple(map(to_exponent, dim)), (Fraction(3, 10),) + (0,) * (LEN_DIM - 1))
+
+    def test_sparse_dimensions(self):
+        """Разреженный вектор размерности совпадает с плотным по операциям и выводу, допускает новые размерности"""
+        sparse, dense = DIM_BACKENDS["sparse"], DIM_BACKENDS["tuple"]
+        newton, key = sparse.make(COMPOSITE_UNITS["Н"])
+        meter, _ = sparse.make({"м": 1})
+        self.assertEqual(key, ((0, 1), (1, 1), (2, -2)))
+        self.assertEqual(tuple(newton), COMPOSITE_UNITS["Н"])
+        self.assertEqual(newton[2], -2)
+
+        dense_newton, dense_meter = COMPOSITE_UNITS["Н"], BASE_UNITS["м"]
+        for op, args in (("add", ()), ("sub", ()), ("scale", (Fraction(1, 2),)), ("neg", ())):
+            operands = (newton, meter) if op in ("add", "sub") else (newton,)
+            dense_operands = (dense_newton, dense_meter) if op in ("add", "sub") else (dense_newton,)
+            result, _ = sparse.from_result(getattr(sparse, op)(*operands, *args))
+            self.assertEqual(tuple(result), getattr(dense, op)(*dense_operands, *args))
+            self.assertEqual(render_plain(result, "*", "^"), render_plain(tuple(result), "*", "^"))
+        self.assertTrue(sparse.is_zero(sparse.from_result(sparse.sub(newton, newton))[0]))
+
+        # Добавленная базовая размерность называется обозначением: плотный вектор её не вмещает,
+        # разреженный хранит одну пару, и общего для процесса списка размерностей нет
+        price, _ = sparse.make({"руб": 1, "кг": -1})
+        self.assertEqual(price.items(), ((1, -1), ("руб", 1)))
+        self.assertEqual(len(price), LEN_DIM)
+        self.assertEqual(render_plain(price, "*", "^"), "руб*кг^(-1)")
+        with self.assertRaises(ValueError):
+            dense.make({"руб": 1})
+
+        if UNIT_DIM_BACKEND != "sparse":
+            with self.assertRaises(ValueError):
+                default_registry().register_base_dimension("шт")
+
+        # Реестр с добавленными размерностями - в отдельном процессе с разреженным бэкендом
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+        result = subprocess.run([sys.executable, "-c", SPARSE_REGISTRY_CHECK], capture_output=True, text=True, env=env)
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+
+
+class TestDimensionSolver(unittest.TestCase):
+    def test_unique_solution(self):
+        """Закон всемирного тяготения: F = k * m**2 * G * r**(-2)"""
+        solution = solve_exponents({"m": kg, "G": m ** 3 / (kg * s ** 2), "r": m}, m * kg / s ** 2)
+
+        self.assertTrue(solution.is_unique)
+        self.assertEqual(solution.exponents, {"m": 2, "G": 1, "r": -2})
+
+    def test_pi_groups(self):
+        """Недоопределённая система возвращает базис безразмерных групп"""
+        solution = solve_exponents({"p": kg / m ** 3, "S": m ** 2, "v": m / s, "l": m}, m * kg / s ** 2)
+
+        self.assertEqual(len(solution.pi_groups), 1)
+        self.assertEqual(solution.pi_groups[0], {"p": 0, "S": 1, "v": 0, "l": -2})
+
+    def test_batch(self):
+        """Пакетное решение, включая несовместные наборы"""
+        solutions = solve_exponents_batch([{"a": m}, {"a": s}, {"a": m, "b": s}], m / s)
+        self.assertIsNone(solutions[0])
+        self.assertIsNone(solutions[1])
+        self.assertEqual(solutions[2].exponents, {"a": 1, "b": -1})
+
+
+class TestQuantity(unittest.TestCase):
+    def assertQuantity(self, quantity, value, error, measure):
+        self.assertIsInstance(quantity.value, quantity.numeric_backend.value_type)
+        self.assertIsInstance(quantity.error, quantity.numeric_backend.value_type)
+        self.assertAlmostEqual(float(quantity.value), value, places=4)
+        self.assertAlmostEqual(float(quantity.error), error, places=4)
+        self.assertIs(quantity.measure, measure)
+
+    def test_numeric_backends(self):
+        """Значение и погрешность *, / и ** с числами и величинами одинаковы для всех числовых бэкендов"""
+        for backend in ("decimal", "float", "fraction"):
+            with self.subTest(backend=backend):
+                length = Quantity(2, m, error=0.1, numeric_backend=backend)
+                time = Quantity(4, s, error=0.2, numeric_backend=backend)
+                power = Quantity(0.5, error=0.1, numeric_backend=backend)
+
+                # Число масштабирует и погрешность, в том числе float слева
+                self.assertQuantity(length * 3, 6, 0.3, m)
+                self.assertQuantity(2.5 * length, 5, 0.25, m)
+                self.assertQuantity(length / 4, 0.5, 0.025, m)
+                self.assertQuantity(1.0 / length, 0.5, 0.025, m ** -1)
+                self.assertQuantity(length ** 2, 4, 0.4, m ** 2)
+                self.assertQuantity(length ** 0.5, math.sqrt(2), math.sqrt(2) * 0.025, m ** 0.5)
+
+                self.assertQuantity(length * time, 8, 8 * (0.05 + 0.05), m * s)
+                self.assertQuantity(length / time, 0.5, 0.5 * (0.05 + 0.05), m / s)
+                self.assertQuantity(Quantity(4, error=0.2, numeric_backend=backend) ** power, 2,
+                                    2 * math.hypot(0.5 * 0.05, math.log(4) * 0.1), DIMENSIONLESS)
+                self.assertQuantity(2.0 ** power, math.sqrt(2), math.sqrt(2) * math.log(2) * 0.1, DIMENSIONLESS)
+
+                # Операнд другого бэкенда приводится к бэкенду левого операнда
+                other = "float" if backend != "float" else "decimal"
+                product = length * Quantity(3, s, error=0.3, numeric_backend=other)
+                self.assertIs(product.numeric_backend, length.numeric_backend)
+                self.assertQuantity(product, 6, 6 * (0.05 + 0.1), m * s)
+
+
+class TestQuantityArray(unittest.TestCase):
+    def test_arithmetic(self):
+        """Операции над массивом совпадают с поэлементными операциями Quantity"""
+        mass = QuantityArray([1.0, 2.0], kg, errors=[0.1, 0.2])
+        acc = QuantityArray([9.8, 10.0], m / s ** 2, errors=0.1)
+
+        force = mass * acc
+        self.assertIs(force.measure, kg * m / s ** 2)
+        for index in range(2):
+            expected = Quantity(mass.values[index], kg, error=mass.errors[index]) * \
+                       Quantity(acc.values[index], m / s ** 2, error=0.1)
+            self.assertAlmostEqual(force.values[index], float(expected.value), places=4)
+            self.assertAlmostEqual(force.errors[index], float(expected.error), places=4)
+
+        with self.assertRaises(ValueError):
+            mass + acc
+
+    def test_reductions(self):
+        """sum/mean/min/max с учётом способа расчёта погрешности"""
+        lengths = QuantityArray([1.0, 3.0, 2.0], m, errors=[0.3, 0.4, 0.0],
+                                error_calculation_type=AVG_SQRT_DEVIATION)
+
+        self.assertAlmostEqual(float(lengths.sum().error), 0.5)
+        self.assertAlmostEqual(float(lengths.mean().value), 2.0)
+        self.assertEqual(float(lengths.max().value), 3.0)
+        self.assertEqual(float(lengths.min().error), 0.3)
+
+        # N-мерный массив: плоский номер argmin/argmax переводится в индекс по осям
+        grid = QuantityArray(np.array([[5.0, 4.0, 3.0], [2.0, 1.0, 0.5]]), m, errors=[[0.1] * 3, [0.1, 0.1, 0.2]])
+        self.assertIsInstance(grid.max(), Quantity)
+        self.assertEqual(float(grid.max().value), 5.0)
+        self.assertEqual((float(grid.min().value), float(grid.min().error)), (0.5, 0.2))
+        self.assertIs(grid.min().measure, m)
+
+    def test_numpy_protocols(self):
+        """ufunc и функции NumPy считаются по значениям, единица - по таблице правил, остальное отклоняется"""
+        areas = QuantityArray([1.0, 4.0, 9.0], m ** 2, errors=0.3, error_calculation_type=AVG_SQRT_DEVIATION)
+
+        sides = np.sqrt(areas)
+        self.assertIs(sides.measure, m)
+        np.testing.assert_allclose(sides.values, [1.0, 2.0, 3.0])
+        np.testing.assert_allclose(sides.errors, 0.3 / (2 * sides.values))
+        self.assertIs((np.arange(3.0) * sides).measure, m)
+        self.assertIs((np.array([1.0, 2.0]) / s).measure, s ** -1)
+        np.testing.assert_array_equal(np.greater(areas, QuantityArray([2.0] * 3, m ** 2)), [False, True, True])
+
+        self.assertAlmostEqual(float(np.sum(areas).value), 14.0)
+        np.testing.assert_allclose(np.cumsum(areas).errors, 0.3 * np.sqrt([1, 2, 3]))
+        self.assertIs(np.concatenate([areas, areas]).measure, m ** 2)
+        self.assertIs(np.var(sides).measure, m ** 2)
+
+        with self.assertRaises(TypeError):
+            np.exp(areas)
+        with self.assertRaises(ValueError):
+            np.add(areas, sides)
+        with self.assertRaises(TypeError):
+            np.median(areas)
+
+        # Кортеж осей: свёртка по всем перечисленным осям сразу
+        grid = QuantityArray(np.ones((2, 3, 4)), m, 0.1)
+        total = np.sum(grid, axis=(0, 2))
+        np.testing.assert_allclose(total.values, [8.0] * 3)
+        np.testing.assert_allclose(total.errors, [0.8] * 3)
+        mean = np.mean(grid, axis=(-1, 0), keepdims=True)
+        self.assertEqual(mean.values.shape, (1, 3, 1))
+        np.testing.assert_allclose(mean.errors, 0.1)
+        self.assertEqual(np.mean(QuantityArray(np.ones((2, 3)), m, 0.1), axis=(0, 1)).values.shape, ())
+        with self.assertRaises(TypeError):
+            np.min(grid, axis=(0, 1))
+
+
+class TestQuantityGroups(unittest.TestCase):
+    def test_summarize_by_dimension(self):
+        """Разнородный список делится по размерности за один проход, свёртки - в СИ с общей погрешностью"""
+        items = [
+            Quantity(2, "кг", error=0.1),
+            (0.5, "т", 0.0001),
+            ("3", "км"),
+            Quantity(200, m),
+            (1.5, "кг"),
+        ]
+        groups = group_by_dimension(items)
+        self.assertEqual(list(groups), [kg, m])
+        np.testing.assert_allclose(groups[kg].values, [2.0, 500.0, 1.5])
+
+        summaries = summarize_by_dimension(items)
+        self.assertEqual(summaries[kg].count, 3)
+        self.assertAlmostEqual(float(summaries[kg].sum.value), 503.5)
+        self.assertAlmostEqual(float(summaries[kg].sum.error), 0.2)
+        self.assertAlmostEqual(float(summaries[m].mean.value), 1600.0)
+        self.assertEqual(float(summaries[m].max.value), 3000.0)
+        self.assertEqual(float(summaries[m].min.value), 200.0)
+        self.assertIsNone(groups[m].errors)
+
+        # Группу начал кортеж: способ расчёта погрешности - у первой Quantity этой размерности
+        mixed = group_by_dimension([(3, "м", 0.3), Quantity(4, m, error=0.4, error_calculation_type=AVG_SQRT_DEVIATION)])
+        self.assertEqual(mixed[m].error_calc_type, AVG_SQRT_DEVIATION)
+        self.assertAlmostEqual(float(mixed[m].sum().error), 0.5)
+
+
+class TestCompiledFormula(unittest.TestCase):
+    def test_matches_quantity_array(self):
+        """Скомпилированная формула совпадает с вычислением на QuantityArray"""
+        def drag(coef, density, area, speed):
+            return 0.5 * coef * density * area * speed ** 2
+
+        inputs = (
+            QuantityArray([0.47, 0.5], None, [0.01, 0.02]),
+            QuantityArray([1.2, 1.3], kg / m ** 3, [0.1, 0.1]),
+            QuantityArray([2.0, 3.0], m ** 2),
+            QuantityArray([10.0, 20.0], m / s, [0.5, 0.0]),
+        )
+        compiled = compile_formula(drag, [None, kg / m ** 3, m ** 2, m / s])
+        result, expected = compiled(*inputs), drag(*inputs)
+
+        self.assertIs(compiled.measure, kg * m / s ** 2)
+        self.assertIs(result.measure, expected.measure)
+        self.assertTrue((abs(result.values - expected.values) < 1e-9).all())
+        self.assertTrue((abs(result.errors - expected.errors) < 1e-9).all())
+
+        # Сырые массивы передаются в единицах, заданных при компиляции
+        per_hour = compile_formula(lambda distance, time: distance / time, ["км", "ч"])
+        self.assertAlmostEqual(float(per_hour(36, 1).values), 10.0)
+
+    def test_propagate(self):
+        """Погрешности через якобиан, с ковариацией входов и методом Монте-Карло"""
+        length = QuantityArray([1.0, 2.0], m, [0.1, 0.2])
+        width = QuantityArray([3.0, 4.0], m, [0.1, 0.1])
+
+        area = compile_formula(lambda a, b: a * b, [m, m], AVG_SQRT_DEVIATION)
+        linear = area.propagate(length, width)
+        self.assertTrue((abs(linear.errors - area(length, width).errors) < 1e-12).all())
+
+        # Полностью коррелированные входы с равными погрешностями: разность точна
+        difference = compile_formula(lambda a, b: a - b, [m, m], AVG_SQRT_DEVIATION)
+        correlated = difference.propagate(length, width, covariance=[[0.01, 0.01], [0.01, 0.01]])
+        self.assertTrue((abs(correlated.errors) < 1e-12).all())
+
+        sampled = area.propagate(length, width, method="monte_carlo", draws=20_000, rng=0)
+        self.assertTrue((abs(sampled.errors / linear.errors - 1) < 0.05).all())
+
+    def test_dimension_checked_at_compile_time(self):
+        """Несовместимые размерности обнаруживаются при компиляции"""
+        with self.assertRaises(ValueError):
+            compile_formula(lambda length, time: length + time, [m, s])
+        with self.assertRaisesRegex(TypeError, "got <class 'str'>"):
+            compile_formula(lambda length: "length", [m])
+
+
+class TestParallelEvaluation(unittest.TestCase):
+    def test_matches_single_process(self):
+        """Результат по частям в процессах совпадает с вычислением в одном процессе и идёт в исходном порядке"""
+        rows = 1000
+        masses = QuantityArray([1 + ind / rows for ind in range(rows)], kg, [0.01] * rows)
+        speed = Quantity(3, m / s, error=0.1)
+        formula = compile_formula(lambda mass, v: mass * v ** 2 / 2, [kg, m / s])
+
+        result = evaluate_parallel(formula, masses, speed, workers=2, min_rows=0)
+        expected = formula(masses, speed)
+        self.assertIs(result.measure, kg * m ** 2 / s ** 2)
+        self.assertEqual(result.values.tolist(), expected.values.tolist())
+        self.assertEqual(result.errors.tolist(), expected.errors.tolist())
+
+        with self.assertRaises(ValueError):
+            evaluate_parallel(formula, masses, Quantity(3, m), workers=2, min_rows=0)
+
+        empty = evaluate_parallel(formula, QuantityArray([], kg, []), speed, workers=2, min_rows=0)
+        self.assertEqual(empty.values.shape, (0,))
+        self.assertIs(empty.measure, kg * m ** 2 / s ** 2)
+
+class TestUnitParsing(unittest.TestCase):
+    def test_parse_unit_str(self):
+        """Разбор составных строк единиц в размерность и множитель"""
+        cases = {
+            "м/с^2": (m / s ** 2, 1.0),
+            "м/с²": (m / s ** 2, 1.0),
+            "Н/кг*Па": (kg / s ** 4, 1.0),
+            "кВт·ч": (kg * m ** 2 / s ** 2, 3.6e6),
+            "км/ч": (m / s, 1 / 3.6),
+            "(м/с)**2": (m ** 2 / s ** 2, 1.0),
+            "мм рт.ст.": (kg / (m * s ** 2), 133.322368),
+        }
+
+        for unit_str, (measure, factor) in cases.items():
+            with self.subTest(unit_str=unit_str):
+                parsed = parse_unit_str(unit_str)
+                self.assertIs(parsed.measure, measure)
+                self.assertAlmostEqual(parsed.factor, factor)
+
+    def test_unknown_unit(self):
+        """Неизвестные обозначения дают ValueError"""
+        with self.assertRaises(ValueError):
+            parse_unit_str("м/абв")
+
+
+class TestUnitFormat(unittest.TestCase):
+    def test_render_unit(self):
+        """Стили отрисовки единиц; надстрочный вид читается парсером обратно"""
+        acceleration = m / s ** 2
+
+        self.assertEqual(render_unit(acceleration, "plain", "*", "^"), "м*с^(-2)")
+        self.assertEqual(render_unit(acceleration, "superscript", "·"), "м·с⁻²")
+        self.assertEqual(render_unit(acceleration, "latex"), r"\mathrm{м}\cdot \mathrm{с}^{-2}")
+        self.assertIs(parse_unit_str(render_unit(acceleration, "superscript", "·")).measure, acceleration)
+
+    def test_format_quantities(self):
+        """Колонка Quantity и QuantityArray в один буфер"""
+        column = [Quantity(9.81, m / s ** 2, error=0.01), QuantityArray([1.0, 2.0], m, [0.0, 0.5])]
+        self.assertEqual(format_quantities(column, "plain"), f"9.81 ± 0.01 {m / s ** 2}\n1.0 м\n2.0 ± 0.5 м")
+
+
+class TestUnitNaming(unittest.TestCase):
+    def test_named_units(self):
+        """Обратный индекс с приоритетами предметных областей"""
+        self.assertEqual(named_unit_str(kg * m / s ** 2), "Н")
+        self.assertEqual(named_unit_str(s ** -1), "Гц")
+        self.assertEqual(named_unit_str(s ** -1, "radiation"), "Бк")
+        self.assertEqual(named_unit_str(m ** 2 / s ** 2, "dosimetry"), "Зв")
+
+    def test_decompose_unit(self):
+        """Кратчайшее разложение в произведение именованных единиц"""
+        self.assertEqual(decompose_unit(kg * m ** 2 / s), (("Дж", 1), ("с", 1)))
+        self.assertEqual(named_unit_str(kg * m / (s ** 3 * A)), "В*м^(-1)")
+        self.assertEqual(str(Quantity(5, kg * m / s).to_base()), "5 Н*с")
+
+        # Дж*с - два шага: при max_depth = 1 не находится
+        self.assertIsNone(decompose_unit(kg * m ** 2 / s, max_depth=1))
+        self.assertEqual(decompose_unit(kg * m ** 2 / s, max_depth=2), (("Дж", 1), ("с", 1)))
+
+
+class TestConversion(unittest.TestCase):
+    def test_to(self):
+        """Перевод значения, погрешности и массивов в другие единицы"""
+        speed = Quantity(36, "км/ч", error=3.6)
+        self.assertIs(speed.measure, m / s)
+        self.assertAlmostEqual(float(speed.to("м/с").value), 10.0)
+        self.assertAlmostEqual(float(speed.to("м/с").error), 1.0)
+
+        self.assertEqual(QuantityArray([1.0, 2.0], "ч").to("мин").value.tolist(), [60.0, 120.0])
+        self.assertAlmostEqual(convert(1.0, "кВт·ч", "МДж"), 3.6)
+
+        with self.assertRaises(ValueError):
+            speed.to("кг")
+
+    def test_best_unit(self):
+        """Подбор единицы вывода по лестнице множителей"""
+        self.assertEqual(Quantity(3600, "с").best_unit().unit, "ч")
+        self.assertEqual(str(Quantity(1500, "м", numeric_backend="float").best_unit()), "1.5 км")
+        self.assertEqual(Quantity(0.001, "м").best_unit().unit, "мм")
+        self.assertEqual(Quantity(2e6, "Па").best_unit().unit, "МПа")
+
+        # Колонка получает одну общую единицу
+        column = QuantityArray([100.0, 1500.0, 2500.0], "м").best_unit()
+        self.assertEqual(column.unit, "км")
+        self.assertEqual(column.value.tolist(), [0.1, 1.5, 2.5])
+
+
+class TestQuantityIO(unittest.TestCase):
+    def test_parse_quantity(self):
+        """Значение переводится в СИ вместе с погрешностью"""
+        quantity = parse_quantity("1.5 км ± 0.01")
+        self.assertIs(quantity.measure, m)
+        self.assertEqual(float(quantity.value), 1500.0)
+        self.assertEqual(float(quantity.error), 10.0)
+
+        self.assertEqual(float(parse_quantity("9.81 ± 0.01 м/с^2").error), 0.01)
+
+    def test_iter_quantities(self):
+        """Потоковое чтение колонки CSV по имени и пакетами"""
+        csv_text = "t,a\n0,9.81 м/с^2 ± 0.01\n1,9.80 м/с^2\n2,1 ч\n"
+
+        quantities = list(iter_quantities(io.StringIO(csv_text), column="a"))
+        self.assertEqual([float(quantity.value) for quantity in quantities], [9.81, 9.80, 3600.0])
+
+        batches = list(iter_quantity_batches(io.StringIO(csv_text), column=1, has_header=True, chunk_size=4))
+        self.assertEqual([batch.measure for batch in batches], [m / s ** 2, s])
+        self.assertEqual(batches[0].errors.tolist(), [0.01, 0.0])
+
+
+
+class TestImportTime(unittest.TestCase):
+    def test_cold_import(self):
+        """Импорт quantity не тянет numpy/sympy и укладывается в бюджет времени"""
+        import_us, modules = measure_import_time("bestsupport_units_tests.quantity")
+
+        self.assertNotIn("numpy", modules)
+        self.assertNotIn("sympy", modules)
+        self.assertLess(import_us, IMPORT_TIME_BUDGET_US)
+
+
+class TestQuantityBinary(unittest.TestCase):
+    def test_round_trip(self):
+        """Запись и чтение колоночного формата с разными единицами и типами погрешности"""
+        quantities = [
+            Quantity(1.5, m, error=0.1),
+            Quantity(2, kg * m ** 0.5, error_calculation_type=AVG_SQRT_DEVIATION),
+            Quantity(3, m),
+        ]
+        array = QuantityArray([1.0, 2.0, 3.0], m / s, [0.1, 0.2, 0.3], AVG_SQRT_DEVIATION)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "quantities.bsq")
+
+            save_quantities(path, quantities)
+            loaded = load_quantities(path)
+            self.assertEqual([quantity.measure for quantity in loaded], [m, kg * m ** 0.5, m])
+            self.assertEqual([float(quantity.value) for quantity in loaded], [1.5, 2.0, 3.0])
+            self.assertEqual([float(quantity.error) for quantity in loaded], [0.1, 0.0, 0.0])
+            self.assertEqual([quantity.error_calc_type for quantity in loaded],
+                             [quantity.error_calc_type for quantity in quantities])
+
+            save_quantities(path, array)
+            loaded_array = load_quantity_array(path)
+            self.assertIs(loaded_array.measure, m / s)
+            self.assertEqual(loaded_array.error_calc_type, AVG_SQRT_DEVIATION)
+            self.assertEqual(loaded_array.errors.tolist(), [0.1, 0.2, 0.3])
+
+            # Форма массива хранится в заголовке
+            save_quantities(path, QuantityArray(np.arange(6.0).reshape(2, 3), m, np.full((2, 3), 0.1)))
+            loaded_matrix = load_quantity_array(path)
+            self.assertEqual(loaded_matrix.values.shape, (2, 3))
+            self.assertEqual(loaded_matrix.errors.shape, (2, 3))
+            self.assertEqual(loaded_matrix.values.tolist(), [[0.0, 1.0, 2.0], [3.0, 4.0, 5.0]])
+            del loaded_array, loaded_matrix  # memmap держит файл открытым (важно для Windows)
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_baseline_regressions(self):
+        """Эталон сохраняется в JSON, а падение скорости или рост памяти сверх порога считается регрессией"""
+        result = run_case(lambda: m * s, min_time=0.001, repeat=1, alloc_calls=10)
+        self.assertGreater(result.ops_per_sec, 0)
+
+        baseline = {"fast": BenchmarkResult(1000.0, 100, 0.0), "heavy": BenchmarkResult(1000.0, 10_000, 0.0)}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            save_baseline(path, baseline)
+            self.assertEqual(load_baseline(path), baseline)
+
+        results = {
+            "fast": BenchmarkResult(900.0, 200, 0.0),
+            "heavy": BenchmarkResult(500.0, 20_000, 0.0),
+            "new": BenchmarkResult(1.0, 0, 0.0),
+        }
+        regressions = compare_results(results, baseline, threshold=0.25)
+        self.assertEqual([(regression.case, regression.metric) for regression in regressions],
+                         [("heavy", "ops_per_sec"), ("heavy", "peak_bytes")])
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_profile(self):
+        """profile() считает созданные объекты и время операторов и возвращает исходные методы после блока"""
+        original_mul = Quantity.__mul__
+        mass = Quantity(2, kg, error=0.1)
+        acc = Quantity(9.81, m / s ** 2)
+        mass * acc  # результат kg * (m / s^2) попадает в кэш операций UnitBase
+
+        with profile() as result:
+            for _ in range(10):
+                mass * acc
+
+        self.assertEqual(result.counters["Quantity.created"], 10)
+        self.assertEqual(result.counters["UnitBase.operation_cache_misses"], 0)
+        self.assertEqual(result.timings["Quantity.__mul__"].count, 10)
+        self.assertIs(Quantity.__mul__, original_mul)
+        self.assertFalse(is_enabled())
 
 
 if __name__ == "__main__":
-    unittest.main()
+    if TESTS_DEBUG:
+        with profile() as tests_profile:
+            unittest.main(exit=False)
+        print(tests_profile.report())
+    else:
+        unittest.main()